@@ -0,0 +1,157 @@
+# Build the route bullet sprite atlas for the subway app: one 8-bit palette BMP with a tile per route (official
+# colors, circles for local and diamonds for express service) and a JSON index of tile by route ID
+#
+# usage: python setup/app/subway/bullets.py [--output DIR]
+
+import os
+import json
+import struct
+import argparse
+
+
+# PARAMETERS
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'src', 'app', 'subway') # app directory on device filesystem
+ATLAS_NAME = "bullets.bmp" # atlas file name (must match ROUTE_BULLETS_PATH in subway/app.py)
+INDEX_NAME = "bullets.json" # index file name (must match ROUTE_BULLETS_INDEX_PATH in subway/app.py)
+
+TILE_SIZE = 20 # bullet tile width and height (as the four overlapping radius 9 circles it replaces) [pixels]
+RADIUS = 9 # bullet circle radius [pixels]
+TEXT_TOP = 6 # first glyph row within tile [pixels]
+
+BACKGROUND_COLOR = 0x000000 # palette index 0 (transparent on device)
+DARK_TEXT_COLOR = 0x000000 # text on light bullets
+LIGHT_TEXT_COLOR = 0xFFFFFF # text on dark bullets
+
+RED = 0xEE352E
+GREEN = 0x00933C
+PURPLE = 0xB933AD
+BLUE = 0x0039A6
+ORANGE = 0xFF6319
+LIME = 0x6CBE45
+BROWN = 0x996633
+LIGHT_GRAY = 0xA7A9AC
+YELLOW = 0xFCCC0A
+DARK_GRAY = 0x808183
+
+# bullets (route ID, text, express, bullet color, text color), first is shown for unknown routes
+BULLETS = [
+    ('?', '', False, 0xFCB80A, DARK_TEXT_COLOR),
+    ('1', '1', False, RED, LIGHT_TEXT_COLOR), ('2', '2', False, RED, LIGHT_TEXT_COLOR), ('3', '3', False, RED, LIGHT_TEXT_COLOR),
+    ('4', '4', False, GREEN, LIGHT_TEXT_COLOR), ('5', '5', False, GREEN, LIGHT_TEXT_COLOR), ('6', '6', False, GREEN, LIGHT_TEXT_COLOR),
+    ('6X', '6', True, GREEN, LIGHT_TEXT_COLOR),
+    ('7', '7', False, PURPLE, LIGHT_TEXT_COLOR), ('7X', '7', True, PURPLE, LIGHT_TEXT_COLOR),
+    ('A', 'A', False, BLUE, LIGHT_TEXT_COLOR), ('C', 'C', False, BLUE, LIGHT_TEXT_COLOR), ('E', 'E', False, BLUE, LIGHT_TEXT_COLOR),
+    ('B', 'B', False, ORANGE, LIGHT_TEXT_COLOR), ('D', 'D', False, ORANGE, LIGHT_TEXT_COLOR), ('F', 'F', False, ORANGE, LIGHT_TEXT_COLOR),
+    ('FX', 'F', True, ORANGE, LIGHT_TEXT_COLOR), ('M', 'M', False, ORANGE, LIGHT_TEXT_COLOR),
+    ('G', 'G', False, LIME, LIGHT_TEXT_COLOR),
+    ('J', 'J', False, BROWN, LIGHT_TEXT_COLOR), ('Z', 'Z', False, BROWN, LIGHT_TEXT_COLOR),
+    ('L', 'L', False, LIGHT_GRAY, LIGHT_TEXT_COLOR),
+    ('N', 'N', False, YELLOW, DARK_TEXT_COLOR), ('Q', 'Q', False, YELLOW, DARK_TEXT_COLOR),
+    ('R', 'R', False, YELLOW, DARK_TEXT_COLOR), ('W', 'W', False, YELLOW, DARK_TEXT_COLOR),
+    ('GS', 'S', False, DARK_GRAY, LIGHT_TEXT_COLOR), ('FS', 'S', False, DARK_GRAY, LIGHT_TEXT_COLOR), ('H', 'S', False, DARK_GRAY, LIGHT_TEXT_COLOR),
+    ('SI', 'SI', False, BLUE, LIGHT_TEXT_COLOR),
+]
+
+# 5x8 column-major glyphs (least significant bit at the top), as the device built-in font
+GLYPHS = {
+    '0': "3e5149453e", '1': "00427f4000", '2': "7249494946", '3': "2141494d33", '4': "1814127f10",
+    '5': "2745454539", '6': "3c4a494931", '7': "4121110907", '8': "3649494936", '9': "464949291e",
+    'A': "7c1211127c", 'B': "7f49494936", 'C': "3e41414122", 'D': "7f4141413e", 'E': "7f49494941",
+    'F': "7f09090901", 'G': "3e41415173", 'H': "7f0808087f", 'I': "00417f4100", 'J': "2040413f01",
+    'K': "7f08142241", 'L': "7f40404040", 'M': "7f021c027f", 'N': "7f0408107f", 'O': "3e4141413e",
+    'P': "7f09090906", 'Q': "3e4151215e", 'R': "7f09192946", 'S': "2649494932", 'T': "03017f0103",
+    'U': "3f4040403f", 'V': "1f2040201f", 'W': "3f4038403f", 'X': "6314081463", 'Y': "0304780403",
+    'Z': "61594d4943",
+}
+
+
+# DRAW BULLET TILE (palette indices, row-major)
+def draw_bullet(text, express, color_index, text_index):
+    tile = [0] * (TILE_SIZE * TILE_SIZE)
+    center = (TILE_SIZE - 1) / 2
+
+    # shape (circle as the union of radius RADIUS circles offset by one pixel, diamond for express)
+    for y in range(TILE_SIZE):
+        for x in range(TILE_SIZE):
+            if express:
+                inside = abs(x - center) + abs(y - center) <= center + 0.5
+            else:
+                inside = any(
+                    (x - RADIUS - dx)**2 + (y - RADIUS - dy)**2 <= RADIUS * (RADIUS + 1)
+                    for dx in (0, 1) for dy in (0, 1)
+                )
+
+            if inside:
+                tile[y*TILE_SIZE + x] = color_index
+
+    # text (bold by drawing each glyph twice, one pixel apart, centered as the labels it replaces)
+    left = TILE_SIZE // 2 - 3*len(text)
+    for i, character in enumerate(text):
+        glyph = bytes.fromhex(GLYPHS[character])
+
+        for column in range(5):
+            for row in range(8):
+                if glyph[column] & (1 << row):
+                    for bold in (0, 1):
+                        x = left + 6*i + column + bold
+                        if 0 <= x < TILE_SIZE:
+                            tile[(TEXT_TOP + row)*TILE_SIZE + x] = text_index
+
+    return tile
+
+
+# WRITE 8-BIT PALETTE BMP (bottom-up rows)
+def write_bmp(path, width, height, pixels, palette):
+    stride = (width + 3) & ~3
+    palette_size = 4 * len(palette)
+    data_offset = 14 + 40 + palette_size
+    size = data_offset + stride * height
+
+    with open(path, 'wb') as file:
+        file.write(struct.pack('<2sIHHI', b'BM', size, 0, 0, data_offset))
+        file.write(struct.pack('<IiiHHIIiiII', 40, width, height, 1, 8, 0, stride * height, 2835, 2835, len(palette), len(palette)))
+
+        for color in palette:
+            file.write(struct.pack('<BBBB', color & 0xFF, (color >> 8) & 0xFF, color >> 16, 0))
+
+        for y in range(height - 1, -1, -1):
+            row = bytes(pixels[y*width:(y + 1)*width])
+            file.write(row + b'\x00' * (stride - width))
+
+
+# BUILD ATLAS
+def build(output_path):
+    palette = [BACKGROUND_COLOR]
+
+    def color_index(color):
+        if color not in palette:
+            palette.append(color)
+        return palette.index(color)
+
+    tiles = [draw_bullet(text, express, color_index(color), color_index(text_color)) for _, text, express, color, text_color in BULLETS]
+
+    # tiles side by side in one row
+    width = TILE_SIZE * len(tiles)
+    pixels = [0] * (width * TILE_SIZE)
+    for t, tile in enumerate(tiles):
+        for y in range(TILE_SIZE):
+            pixels[y*width + t*TILE_SIZE:y*width + (t + 1)*TILE_SIZE] = tile[y*TILE_SIZE:(y + 1)*TILE_SIZE]
+
+    atlas_path = os.path.join(output_path, ATLAS_NAME)
+    write_bmp(atlas_path, width, TILE_SIZE, pixels, palette)
+
+    index = {'tile_width': TILE_SIZE, 'tile_height': TILE_SIZE, 'tiles': {route: i for i, (route, *_) in enumerate(BULLETS)}}
+    index_path = os.path.join(output_path, INDEX_NAME)
+    with open(index_path, 'w') as file:
+        json.dump(index, file)
+
+    print(f"wrote {atlas_path} ({len(tiles)} bullets, {len(palette)} colors)")
+    print(f"wrote {index_path}")
+
+
+# RUN
+parser = argparse.ArgumentParser(description="build subway route bullet sprite atlas")
+parser.add_argument('--output', default=OUTPUT_PATH, help="app directory on device filesystem")
+args = parser.parse_args()
+
+build(os.path.abspath(args.output))
@@ -0,0 +1,160 @@
+# Build the static schedule index for the subway app from MTA static GTFS: scheduled departures at the board stops
+# per day of the week, in fixed-width records sorted by stop, route, direction and time (format in
+# src/lib/led_matrix/schedule.py). The app shows these when live data is unavailable.
+#
+# usage: python setup/app/subway/schedule.py --gtfs google_transit.zip --stop Q03 [--route Q] [--direction S="downtown and brooklyn"] [--output DIR]
+#
+# Board pages select directions by name (Transiter headsigns such as "downtown and brooklyn"), so each name a page uses
+# must be mapped onto a GTFS direction (N or S stop ID suffix) with --direction; uptown and downtown are mapped by default.
+#
+# Service is taken from calendar.txt only (calendar_dates.txt holiday exceptions are not applied), so rebuild after
+# each MTA schedule change.
+
+import io
+import os
+import csv
+import struct
+import zipfile
+import argparse
+
+
+# PARAMETERS
+OUTPUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'src', 'app', 'subway') # app directory on device filesystem
+INDEX_NAME = "schedule.bin" # index file name (must match SCHEDULE_PATH in subway/app.py)
+
+MAGIC = b'SI' # as in led_matrix/schedule.py
+VERSION = 1
+HEADER_FORMAT = '<2sBB' # magic, version, record size
+SECTION_FORMAT = '<II' # first record, record count
+RECORD_FORMAT = '<BBBIB' # stop, route, direction, departure time [seconds], destination
+
+DIRECTIONS = {'N': 'uptown', 'S': 'downtown'} # default direction name by GTFS stop ID suffix (as GTFS_DIRECTIONS in subway/app.py)
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'] # calendar.txt columns
+
+
+# GTFS
+def open_table(gtfs_path, name):
+    if os.path.isdir(gtfs_path):
+        return open(os.path.join(gtfs_path, name), 'r', encoding='utf-8-sig', newline='')
+
+    archive = zipfile.ZipFile(gtfs_path)
+    return io.TextIOWrapper(archive.open(name), encoding='utf-8-sig', newline='')
+
+
+def read_table(gtfs_path, name):
+    with open_table(gtfs_path, name) as file:
+        yield from csv.DictReader(file)
+
+
+def seconds(gtfs_time):
+    hours, minutes, secs = map(int, gtfs_time.split(':')) # may pass 24:00:00 for trips after midnight
+    return hours*3600 + minutes*60 + secs
+
+
+# BUILD
+def build(gtfs_path, stops, routes, directions, output_path):
+    stop_names = {row['stop_id']: row['stop_name'] for row in read_table(gtfs_path, 'stops.txt')}
+
+    service_days = {row['service_id']: [d for d, day in enumerate(WEEKDAYS) if row[day] == '1'] for row in read_table(gtfs_path, 'calendar.txt')}
+
+    trips = {} # route and service by trip ID
+    for row in read_table(gtfs_path, 'trips.txt'):
+        if not routes or row['route_id'] in routes:
+            trips[row['trip_id']] = (row['route_id'], row['service_id'])
+
+    # departures at board stops and last stop of every trip (destination)
+    departures = [] # (trip ID, stop ID, departure time)
+    last_stops = {} # (stop sequence, stop ID) by trip ID
+    for row in read_table(gtfs_path, 'stop_times.txt'):
+        trip_id = row['trip_id']
+        if trip_id not in trips:
+            continue
+
+        sequence = int(row['stop_sequence'])
+        if sequence > last_stops.get(trip_id, (-1, None))[0]:
+            last_stops[trip_id] = (sequence, row['stop_id'])
+
+        if row['stop_id'][:-1] in stops and row['stop_id'][-1:] in DIRECTIONS:
+            departures.append((trip_id, row['stop_id'], seconds(row['departure_time'] or row['arrival_time'])))
+
+    # name tables (records refer to names by index)
+    route_names = sorted({trips[trip_id][0] for trip_id, _, _ in departures})
+    direction_codes = sorted(DIRECTIONS)
+    direction_names = ['|'.join(directions[code]) for code in direction_codes] # names per direction, as the app matches pages
+    destination_names = []
+
+    records_by_day = [set() for _ in WEEKDAYS]
+    for trip_id, stop_id, departure_time in departures:
+        last_stop_id = last_stops[trip_id][1]
+        if last_stop_id == stop_id:
+            continue # trip ends here
+
+        route_id, service_id = trips[trip_id]
+        destination = stop_names.get(last_stop_id[:-1], stop_names.get(last_stop_id, last_stop_id[:-1]))
+        if destination not in destination_names:
+            destination_names.append(destination)
+
+        record = (
+            stops.index(stop_id[:-1]), route_names.index(route_id), direction_codes.index(stop_id[-1]),
+            departure_time, destination_names.index(destination),
+        )
+        for day in service_days.get(service_id, []):
+            records_by_day[day].add(record)
+
+    for names in (stops, route_names, direction_names, destination_names):
+        if len(names) > 255:
+            raise ValueError(f"too many names for index ({len(names)})")
+
+    # one section per distinct day (weekdays usually share theirs)
+    records = []
+    sections = []
+    section_by_records = {}
+    for day_records in records_by_day:
+        key = tuple(sorted(day_records))
+        if key not in section_by_records:
+            section_by_records[key] = (len(records), len(key))
+            records += key
+        sections.append(section_by_records[key])
+
+    data = bytearray(struct.pack(HEADER_FORMAT, MAGIC, VERSION, struct.calcsize(RECORD_FORMAT)))
+    for names in (stops, route_names, direction_names, destination_names):
+        data.append(len(names))
+        for name in names:
+            encoded = name.encode('utf-8')
+            if len(encoded) > 255:
+                raise ValueError(f"name too long for index ({name})")
+
+            data.append(len(encoded))
+            data += encoded
+
+    for section in sections:
+        data += struct.pack(SECTION_FORMAT, *section)
+
+    for record in records:
+        data += struct.pack(RECORD_FORMAT, *record)
+
+    index_path = os.path.join(output_path, INDEX_NAME)
+    with open(index_path, 'wb') as file:
+        file.write(data)
+
+    print(f"wrote {index_path} ({len(records)} records in {len(section_by_records)} day sections, {len(data)} bytes)")
+
+
+# RUN
+parser = argparse.ArgumentParser(description="build subway static schedule index from MTA static GTFS")
+parser.add_argument('--gtfs', required=True, help="static GTFS zip file or directory")
+parser.add_argument('--stop', action='append', required=True, help="MTA stop ID to include (as the board pages)")
+parser.add_argument('--route', action='append', default=[], help="route ID to include (all routes if not given)")
+parser.add_argument('--direction', action='append', default=[], metavar='CODE=NAME', help="page direction name shown for GTFS direction CODE (N or S), e.g. S=brooklyn (repeatable)")
+parser.add_argument('--output', default=OUTPUT_PATH, help="app directory on device filesystem")
+args = parser.parse_args()
+
+directions = {code: [name] for code, name in DIRECTIONS.items()}
+for mapping in args.direction:
+    code, _, name = mapping.partition('=')
+    if code not in DIRECTIONS or not name or '|' in name:
+        parser.error(f"--direction must be N=NAME or S=NAME, got {mapping}")
+    if name not in directions[code]:
+        directions[code].append(name)
+
+build(args.gtfs, args.stop, args.route, directions, os.path.abspath(args.output))
@@ -0,0 +1,94 @@
+import os
+import re
+import json
+import shutil
+import hashlib
+import argparse
+import subprocess
+
+
+# PARAMETERS
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src') # device filesystem
+BYTECODE_DIR = "bytecode" # bundle directory on device (must match BYTECODE_PATH in code.py)
+MANIFEST_NAME = "manifest.json" # bundle manifest file name
+
+MPY_CROSS = "mpy-cross" # CircuitPython mpy-cross matching the device firmware (10.x)
+
+
+# HASH SOURCE FILE
+def source_hash(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+
+# GET MPY VERSION EMITTED BY MPY-CROSS
+def mpy_version(mpy_cross):
+    output = subprocess.run([mpy_cross, '--version'], capture_output=True, text=True, check=True).stdout
+    match = re.search(r'mpy v(\d+)', output)
+
+    if not match:
+        raise RuntimeError(f"could not read mpy version from: {output.strip()}")
+
+    return int(match.group(1))
+
+
+# COMPILE SOURCE FILE TO BYTECODE
+def compile_file(mpy_cross, source, output, name):
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    subprocess.run([mpy_cross, '-o', output, '-s', name, source], check=True)
+
+
+# BUILD BUNDLE
+def build(src_path, mpy_cross):
+    bundle_path = os.path.join(src_path, BYTECODE_DIR)
+    if os.path.exists(bundle_path):
+        shutil.rmtree(bundle_path) # rebuild from scratch so removed sources leave no stale bytecode
+
+    manifest = {'mpy_version': mpy_version(mpy_cross), 'apps': {}, 'lib': {}}
+
+    # apps (app/<name>/app.py -> bytecode/app/<name>.mpy, imported as module <name>)
+    app_root = os.path.join(src_path, 'app')
+    for name in sorted(os.listdir(app_root)):
+        source = os.path.join(app_root, name, 'app.py')
+        if not os.path.isfile(source):
+            continue
+
+        source_name = f"app/{name}/app.py"
+        bytecode = f"app/{name}.mpy"
+        compile_file(mpy_cross, source, os.path.join(bundle_path, bytecode), source_name)
+
+        manifest['apps'][source_name] = {'hash': source_hash(source), 'module': name, 'bytecode': bytecode}
+        print(f"compiled {source_name}")
+
+    # libraries (lib/<path>.py -> bytecode/lib/<path>.mpy)
+    lib_root = os.path.join(src_path, 'lib')
+    for directory, _, files in sorted(os.walk(lib_root)):
+        for file in sorted(files):
+            if not file.endswith('.py'):
+                continue
+
+            source = os.path.join(directory, file)
+            relative = os.path.relpath(source, src_path).replace(os.sep, '/')
+            bytecode = relative[:-3] + '.mpy'
+            compile_file(mpy_cross, source, os.path.join(bundle_path, bytecode), relative)
+
+            # a stale package module invalidates the whole package, since a package is only searched in one place
+            parts = relative.split('/')
+            remove = '/'.join(parts[:2]) if len(parts) > 2 else bytecode
+
+            manifest['lib'][relative] = {'hash': source_hash(source), 'bytecode': bytecode, 'remove': remove}
+            print(f"compiled {relative}")
+
+    with open(os.path.join(bundle_path, MANIFEST_NAME), 'w') as file:
+        json.dump(manifest, file, separators=(',', ':'))
+
+    print(f"wrote {len(manifest['apps'])} apps and {len(manifest['lib'])} library modules to {bundle_path}")
+
+
+# RUN
+parser = argparse.ArgumentParser(description="compile apps and src/lib to a precompiled bytecode bundle")
+parser.add_argument('--mpy-cross', default=MPY_CROSS, help="path to CircuitPython mpy-cross")
+parser.add_argument('--src', default=SRC_PATH, help="device filesystem directory")
+args = parser.parse_args()
+
+build(os.path.abspath(args.src), args.mpy_cross)
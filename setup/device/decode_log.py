@@ -0,0 +1,31 @@
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'lib'))
+
+from led_matrix import log
+
+
+# PARAMETERS
+LOG_PATH = "code_log.bin" # path to log file copied from the device
+
+
+# DECODE LOG FILE TO TEXT
+parser = argparse.ArgumentParser(description="decode the device's binary ring-buffer log file to text")
+parser.add_argument('path', nargs='?', default=LOG_PATH, help="log file copied from the device")
+args = parser.parse_args()
+
+with open(args.path, 'rb') as file:
+    records, dropped = log.decode(file.read())
+
+for number, timestamp, app, site, code, message in records:
+    if timestamp:
+        formatted_time = datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        formatted_time = f"{'(unsynced)':<19}" # logged before the clock synced
+    print(f"{number:6d} {formatted_time} {log.app_name(app)}: {log.site_name(site)} error: {log.error_name(code)}: {message}")
+
+if dropped:
+    print(f"{dropped} records dropped before reaching flash")
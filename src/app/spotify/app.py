@@ -1,16 +1,10 @@
 # type: ignore
 
 from wifi import radio
-from ssl import create_default_context
-from socketpool import SocketPool
-from adafruit_requests import Session
-from adafruit_connection_manager import connection_manager_close_all
-
-import circuitpython_base64 as base64
 
 import os
 import time
-import json
+import asyncio
 
 import board
 from gc import mem_free
@@ -21,17 +15,27 @@ from jpegio import JpegDecoder
 from displayio import Group, OnDiskBitmap, Bitmap, TileGrid, ColorConverter, Colorspace, release_displays
 
 from adafruit_display_shapes.rect import Rect
-from adafruit_display_text.label import Label
+
+from led_matrix import log, net, render, timing
+from led_matrix.animation import FrameClock, Marquee, Timeline
+from led_matrix.artcache import ArtCache
+from led_matrix.resample import Resampler
+from led_matrix.retry import Breaker, backoff, is_server_error
+from led_matrix.runtime import Latest, read_fields, read_into, read_json, request, run
+from led_matrix.text import TextLine
+from led_matrix.tokens import Tokens
 
 
 # PARAMETERS
 VERBOSE = False # print data
 
-TEXT_LABEL_DELAY = 0.06 # scroll speed for top text label (and refresh speed at the end of each scroll) [seconds]
-RETRY_DELAY = 10  # delay before retrying between iterations after error [seconds]
+TEXT_LABEL_DELAY = 0.06 # frame period, scrolling text labels one pixel per frame (and refresh speed at the end of each scroll) [seconds]
+RETRY_DELAY = 10  # first delay before retrying between iterations after error, doubled per failure [seconds]
+MAX_RETRY_DELAY = 300 # longest delay before retrying between iterations after error [seconds]
+STALE_DELAY = 300 # keep showing the last song this long while Spotify is unavailable [seconds]
+FETCH_TIMEOUT = 10 # socket timeout for each request [seconds]
 
 APP_PATH = "/app/spotify/app.py" # app file path
-LOG_PATH = "/code_out.txt" # log file path
 
 WIFI_SSID = os.getenv("CIRCUITPY_WIFI_SSID") # wifi name
 WIFI_PASSWORD = os.getenv("CIRCUITPY_WIFI_PASSWORD") # wifi password
@@ -40,8 +44,8 @@ SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID") # Spotify client ID
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET") # Spotify client secret
 
 SPOTIFY_TOKENS_PATH = "/app/spotify/tokens.json" # tokens.json file path
-SPOTIFY_IMAGE_PATH = "/app/spotify/temp.jpeg" # temp.jpeg file path
 SPOTIFY_IMAGE_PATH_FILL = "/app/spotify/fill.bmp" # fill.bmp file path
+SPOTIFY_ART_CACHE_PATH = "/app/spotify/art.bin" # album art cache file path
 
 SPOTIFY_REFRESH_TOKEN_URL = "https://accounts.spotify.com/api/token" # Spotify refresh token URL
 SPOTIFY_CURRENTLY_PLAYING_URL = "https://api.spotify.com/v1/me/player/currently-playing" # Spotify currently playing URL
@@ -51,71 +55,100 @@ BIT_DEPTH = 2 # color depth
 
 TEXT_FONT = FONT # default font
 TEXT_COLOR = 0x919492 # text color (gray-white)
+TEXT_CAPACITY = 96 # characters held by each text label (longer text is cut off) [characters]
+
+ART_SIZE = 32 # album art size shown (the smallest Spotify image at least this size is decoded straight to it) [pixels]
+IMAGE_BUFFER_SIZE = 16384 # album art jpeg buffer (64x64 Spotify images are 2-5 KB) [bytes]
+ART_CACHE_RAM_ENTRIES = 4 # downsampled album art kept in RAM (2 KB each) [images]
+ART_CACHE_FLASH_ENTRIES = 32 # downsampled album art kept on flash (2 KB each) [images]
+
+# fields read from the currently playing response (the rest of the document is skipped while streaming)
+CURRENTLY_PLAYING_FIELDS = (
+    ('is_playing',),
+    ('item', 'name'),
+    ('item', 'artists', '*', 'name'),
+    ('item', 'album', 'name'),
+    ('item', 'album', 'images', '*', 'url'),
+    ('item', 'album', 'images', '*', 'width'),
+    ('item', 'album', 'images', '*', 'height'),
+)
 
+# circuit breakers per endpoint
+token_breaker = Breaker('spotify_token')
+player_breaker = Breaker('spotify_player')
+image_breaker = Breaker('spotify_image')
 
-# GET SPOTIFY TOKENS
-def get_tokens():
-    with open(SPOTIFY_TOKENS_PATH, 'r') as file:
-        data = json.load(file) # load tokens from json file
-    
-    access_token = data.get('access_token')
-    refresh_token = data.get('refresh_token')
 
-    return access_token, refresh_token
+# REFRESH SPOTIFY ACCESS TOKEN (exit code 0 on success, 1 on error status, 2 if endpoint unavailable)
+async def update_tokens(requests, tokens):
+    if not token_breaker.allow(): # skip request while token endpoint is failing
+        exit_code = 2
+        return exit_code
 
-
-# UPDATE SPOTIFY TOKENS
-def update_tokens(requests, refresh_token):
     try:
         headers = {
-            'Authorization': 'Basic ' + base64.b64encode(f"{SPOTIFY_CLIENT_ID}:{SPOTIFY_CLIENT_SECRET}".encode()).decode('utf-8')
+            'Authorization': tokens.authorization
         }
         data = {
             'grant_type': 'refresh_token',
-            'refresh_token': refresh_token
+            'refresh_token': tokens.refresh_token
         }
 
-        with requests.post(SPOTIFY_REFRESH_TOKEN_URL, headers=headers, data=data) as response:
+        with await request(requests.post, SPOTIFY_REFRESH_TOKEN_URL, headers=headers, data=data, timeout=FETCH_TIMEOUT) as response:
+            if is_server_error(response.status_code): # endpoint failing
+                token_breaker.failure()
+                exit_code = 2
+
+                return exit_code
+
+            token_breaker.success()
+
             if response.status_code != 200: # error status code
                 exit_code = 1
 
-                return exit_code, None, refresh_token
+                return exit_code
 
             else:
                 exit_code = 0
-                tokens = response.json()
-                
-                if 'refresh_token' in tokens: # refresh token may not be in response
-                    refresh_token = tokens['refresh_token']
-
-                access_token = tokens['access_token']
+                data = await read_json(response)
 
-                with open(SPOTIFY_TOKENS_PATH, 'w') as file:
-                    data = {'access_token': access_token, 'refresh_token': refresh_token}
-                    json.dump(data, file) # write tokens to json file
+                # refresh token may not be in response (written to flash only if rotated)
+                tokens.update(data['access_token'], data.get('expires_in'), data.get('refresh_token'))
 
-                return exit_code, access_token, refresh_token
+                return exit_code
     
     except Exception as e:
         if VERBOSE:
             print(f"update_tokens error: {e}")
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {APP_PATH}: update_tokens error: {e}\n")
+        token_breaker.failure()
+        log.error(log.APP_SPOTIFY, log.SITE_UPDATE_TOKENS, e)
         
-        exit_code = 1
-        return exit_code, None, None
+        exit_code = 2
+        return exit_code
+
 
+# GET SPOTIFY CURRENTLY PLAYING SONG (exit code 0 on success, 1 on error status, 2 if endpoint unavailable)
+async def get_currently_playing(requests, access_token):
+    if not player_breaker.allow(): # skip request while player endpoint is failing
+        exit_code = 2
+        return exit_code, None, None, None, None, None
 
-# GET SPOTIFY CURRENTLY PLAYING SONG
-def get_currently_playing(requests, access_token):
     try:
         headers = {
             'Authorization': f'Bearer {access_token}'
         }
         
-        with requests.get(SPOTIFY_CURRENTLY_PLAYING_URL, headers=headers) as response:        
-            if response.status_code not in [200, 204]: # error status code
+        with await request(requests.get, SPOTIFY_CURRENTLY_PLAYING_URL, headers=headers, timeout=FETCH_TIMEOUT) as response:
+            if is_server_error(response.status_code): # endpoint failing
+                player_breaker.failure()
+                exit_code = 2
+
+                return exit_code, None, None, None, None, None
+
+            player_breaker.success()
+
+            if response.status_code not in [200, 204]: # error status code (e.g. expired access token)
                 exit_code = 1
 
                 return exit_code, None, None, None, None, None
@@ -127,31 +160,19 @@ def get_currently_playing(requests, access_token):
                 active = False
 
             elif response.status_code == 200: # success status code
-                data = response.json()
+                active, song_name, artist_list, album_name, image_urls, image_widths, image_heights = await read_fields(response, CURRENTLY_PLAYING_FIELDS)
 
-                # active
-                active = data.get('is_playing')
-            
-            if active:
-                # song name
-                song_name = data.get('item', {}).get('name')
-                
-                # artist list
-                artists = data.get('item', {}).get('artists', [{}])
-                artist_list = []
-                for a in artists:
-                    artist_list.append(a.get('name'))
-                
-                # album name
-                album_name = data.get('item', {}).get('album', {}).get('name')
+                if song_name is None: # no track (e.g. "item": null for podcast episodes and ads), nothing to show
+                    active = False
 
-                # image url
-                images = data.get('item', {}).get('album', {}).get('images', [{}])
+            if active:
+                # image url (smallest image covering the album art, e.g. 64x64 decoded at half scale)
                 image_url = None
-                for i in images:
-                    if i.get('height') == 64 and i.get('width') == 64:
-                        image_url = i.get('url')
-                        break
+                image_width = None
+                for url, width, height in zip(image_urls, image_widths, image_heights):
+                    if width and height and min(width, height) >= ART_SIZE and (image_width is None or width < image_width):
+                        image_url = url
+                        image_width = width
                 
                 return exit_code, active, song_name, artist_list, album_name, image_url
             
@@ -162,10 +183,10 @@ def get_currently_playing(requests, access_token):
         if VERBOSE:
             print(f"get_currently_playing error: {e}")
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {APP_PATH}: get_currently_playing error: {e}\n")
+        player_breaker.failure()
+        log.error(log.APP_SPOTIFY, log.SITE_GET_CURRENTLY_PLAYING, e)
         
-        exit_code = 1
+        exit_code = 2
         return exit_code, None, None, None, None, None
 
     
@@ -204,20 +225,29 @@ def format_song_artist(song_name, artist_list, spacer=5):
 
 
 # GET ALBUM ART IMAGE
-def get_image(requests, image_url):
+async def get_image(requests, image_url):
+    if not image_breaker.allow(): # skip request while image endpoint is failing
+        exit_code = 1
+        return exit_code, None
+
     try:
-        with requests.get(image_url) as response:
+        with await request(requests.get, image_url, timeout=FETCH_TIMEOUT) as response:
+            if is_server_error(response.status_code):
+                image_breaker.failure()
+            else:
+                image_breaker.success()
+
             if response.status_code != 200: # error status code
                 exit_code = 1
                 return exit_code, None
             
             exit_code = 0
-            image_path = SPOTIFY_IMAGE_PATH
+            size = await read_into(response, image_buffer) # read jpeg into preallocated buffer (no flash write)
 
-            with open(image_path, 'wb') as file:
-                file.write(response.content) # write image to jpeg file
+            if VERBOSE:
+                print(f"image bytes: {size}")
 
-            return exit_code, image_path
+            return exit_code, memoryview(image_buffer)[:size]
 
     except Exception as e:
         if VERBOSE:
@@ -225,47 +255,50 @@ def get_image(requests, image_url):
 
         exit_code = 1
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {APP_PATH}: get_image error: {e}\n")
+        image_breaker.failure()
+        log.error(log.APP_SPOTIFY, log.SITE_GET_IMAGE, e)
         
         return exit_code, None
 
 
-# DOWNSAMPLE 64x64 TO 32x32 BITMAP
-def downsample_bitmap(bitmap, corner=[0, 0]):
-    downsampled_bitmap = Bitmap(32, 32, 65535) # 256-color 16-bit palette
-    
-    for y in range(0, 64, 2):
-        for x in range(0, 64, 2):
-            x_shift = corner[0] # corner of 2x2 window to use for downsampling
-            y_shift = corner[1]
+# DECODE OPENED JPEG OF width x height INTO ART_SIZE bitmap, scaled down by the decoder where it can (1/2, 1/4 or 1/8)
+# and area-averaged the rest of the way otherwise (returns False if the image is not square or too small)
+async def decode_image(width, height, bitmap):
+    if width != height or width < ART_SIZE:
+        return False
 
-            downsampled_bitmap[x // 2, y // 2] = bitmap[x + x_shift, y + y_shift]
+    scale = 0 # decoder scale, output is 1/2**scale of the image size
+    while scale < 3 and width >> (scale + 1) >= ART_SIZE:
+        scale += 1
 
-    return downsampled_bitmap
+    if width == ART_SIZE << scale:
+        decoder.decode(bitmap, scale=scale) # decode straight to display size
+        return True
 
+    size = (width + (1 << scale) - 1) >> scale
+    decoded = Bitmap(size, size, 65535) # only for images that are not a power-of-two multiple of the album art size
+    decoder.decode(decoded, scale=scale)
+    await asyncio.sleep(0) # let display tasks run after decoding
 
-# SCROLL TEXT HORIZONTALLY
-def scroll(label):
-    group = label[0]
-    group.x -= 1 # move label left
+    t = timing.start()
+    await Resampler(size, size, ART_SIZE, ART_SIZE).resample(decoded, bitmap)
+    timing.stop(timing.SPAN_DOWNSAMPLE, t)
 
-    if group.x < -1*6*len(label.text): # if label has moved full length, refresh to initial position and return True
-        group.x = 0
-        return True
-    
-    return False
+    return True
 
 
 # SET UP WIFI
-radio.connect(WIFI_SSID, WIFI_PASSWORD)
+if not radio.connected: # keep connection (and open sockets) when the launcher retries the app
+    radio.connect(WIFI_SSID, WIFI_PASSWORD)
 
 if VERBOSE:
     print(f"connected to {WIFI_SSID}\n")
 
-pool = SocketPool(radio)
-context = create_default_context()
-requests = Session(pool, context)
+requests = net.session(radio) # shared session, reusing keep-alive connections across requests and app retries
+
+
+# SET UP TOKENS
+tokens = Tokens(SPOTIFY_TOKENS_PATH, SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET) # read from flash once per run
 
 
 # SET UP IMAGE DECODER
@@ -302,7 +335,7 @@ matrix = RGBMatrix(
     doublebuffer=True
 )
 
-display = FramebufferDisplay(matrix, auto_refresh=True)
+display = FramebufferDisplay(matrix, auto_refresh=False) # refreshed by render when something changed
 
 # blank rectangle/group
 blank_group = Group()
@@ -314,12 +347,8 @@ blank_group.hidden = True # hide until needed
 
 # placeholder text labels/group
 text_label_group = Group()
-text_label_top = Label(
-    font=TEXT_FONT, color=TEXT_COLOR, text='', x=32, y=10, scale=1
-)
-text_label_bottom = Label(
-    font=TEXT_FONT, color=TEXT_COLOR, text='', x=32, y=22, scale=1
-)
+text_label_top = TextLine(TEXT_FONT, TEXT_CAPACITY, TEXT_COLOR, x=32, y=10)
+text_label_bottom = TextLine(TEXT_FONT, TEXT_CAPACITY, TEXT_COLOR, x=32, y=22)
 text_label_group.append(text_label_top)
 text_label_group.append(text_label_bottom)
 text_label_group.hidden = True # hide until first update
@@ -342,6 +371,16 @@ border_rectangle_bottom = Rect(
 image_bitmap_fill = OnDiskBitmap(SPOTIFY_IMAGE_PATH_FILL) # open fill image bitmap
 image_tilegrid_fill = TileGrid(image_bitmap_fill, pixel_shader=image_bitmap_fill.pixel_shader, x=0, y=0) # make tilegrid with fill image bitmap
 
+# preallocated album art buffers (allocated once so track changes do not fragment the heap)
+image_buffer = bytearray(IMAGE_BUFFER_SIZE) # jpeg as read from the socket
+image_converter = ColorConverter(input_colorspace=Colorspace.RGB565_SWAPPED)
+
+image_tilegrids = [] # two decoded album art images (RGB565), one shown while the other is filled
+for _ in range(2):
+    image_tilegrids.append(TileGrid(Bitmap(ART_SIZE, ART_SIZE, 65535), pixel_shader=image_converter, x=0, y=0))
+
+art_cache = ArtCache(SPOTIFY_ART_CACHE_PATH, ART_SIZE, ART_SIZE, ART_CACHE_RAM_ENTRIES, ART_CACHE_FLASH_ENTRIES) # decoded images by URL
+
 album_border_rectangle_left = Rect(
     width=2, height=32, x=0, y=0, fill=BACKGROUND_COLOR
 )
@@ -365,131 +404,207 @@ master_group.append(album_border_rectangle_right)
 
 # set display root group to master group
 display.root_group = master_group
+render.init(display)
 
 
-# RUN MAIN LOOP TO SHOW SONGS
-setup = False
-reset = True
-previous_image_url = None
+# FETCH SONG AND ALBUM ART IN BACKGROUND
+async def fetch_loop(latest):
+    previous_image_url = None
+    back = 0 # index of image tilegrid not currently shown
 
-while True:
-    if reset:
-        if VERBOSE:
-            print(f"setup: {setup}")
-            print(f"free memory: {mem_free()}")
+    while True:
+        await latest.wait_request() # fetch only when display asks for fresh data
 
-        # reset if low memory
-        if mem_free() < 1000:
-            display.root_group = blank_group
-            break
+        # refresh access token ahead of expiry (or once at start, as the saved token may be stale), so requests do not
+        # fail on an expired token (a failed refresh leaves the current token in use)
+        if tokens.due():
+            exit_code = await update_tokens(requests, tokens)
+
+            if VERBOSE:
+                print(f"exit_code [update_tokens]: {exit_code}")
 
-        # get saved tokens and currently playing song
-        access_token, refresh_token = get_tokens()
-        
         if VERBOSE:
-            print(f"access token: {access_token}")
-            print(f"refresh token: {refresh_token}")
-        
-        exit_code, active, song_name, artist_list, album_name, image_url = get_currently_playing(requests, access_token)
+            print(f"access token: {tokens.access_token}")
+            print(f"refresh token: {tokens.refresh_token}")
+
+        # get currently playing song
+        t = timing.start()
+        exit_code, active, song_name, artist_list, album_name, image_url = await get_currently_playing(requests, tokens.access_token)
+        timing.stop(timing.SPAN_GET_CURRENTLY_PLAYING, t)
 
         if VERBOSE:
             print(f"exit_code [get_currently_playing]: {exit_code}")
-            
-        # update tokens if expired and get currently playing song
+
+        # update tokens if rejected anyway (e.g. revoked) and get currently playing song
         if exit_code == 1:
-            exit_code, access_token, refresh_token = update_tokens(requests, refresh_token) # get new tokens
+            tokens.expire()
+            exit_code = await update_tokens(requests, tokens) # get new tokens
 
             if VERBOSE:
                 print(f"exit_code [update_tokens]: {exit_code}")
 
             if exit_code == 0:
-                exit_code, active, song_name, artist_list, album_name, image_url = get_currently_playing(requests, access_token)
-                
+                t = timing.start()
+                exit_code, active, song_name, artist_list, album_name, image_url = await get_currently_playing(requests, tokens.access_token)
+                timing.stop(timing.SPAN_GET_CURRENTLY_PLAYING, t)
+
                 if VERBOSE:
                     print(f"exit_code [get_currently_playing]: {exit_code}")
-        
-        if VERBOSE:
-            print(f"active: {active}")
 
-        # get song details if active and update on master group
-        if exit_code == 0 and active:
-            if VERBOSE:
-                print(f"song_name: {song_name}")
-                print(f"artist_list: {artist_list}")
-                print(f"album_name: {album_name}")
-                print(f"image_url: {image_url}")
-
-            setup = True # mark setup as complete
-            
-            # format song and artist text
-            formatted_song, formatted_artist = format_song_artist(song_name, artist_list)
-            
-            if VERBOSE:
-                print(f"formatted_song: {formatted_song}")
-                print(f"formatted_artist: {formatted_artist}")
-            
-            # update text labels on master group
-            text_label_top.text = formatted_song
-            text_label_bottom.text = formatted_artist
+        # get new image if changed (None if unchanged, or if Spotify is unavailable so the last image stays)
+        image_tilegrid = None
 
-        else:
-            setup = False # mark setup as incomplete
-            
-        # get new image and update on master group
-        if image_url != previous_image_url:
+        if exit_code == 0 and image_url != previous_image_url:
             previous_image_url = image_url
 
             if image_url == None:
                 image_tilegrid = image_tilegrid_fill # placeholder fill image
 
             else:
-                exit_code, image_file = get_image(requests, image_url)
+                t = timing.start()
+                cached = art_cache.get(image_url, image_tilegrids[back].bitmap) # downsampled image shown before
+                timing.stop(timing.SPAN_ART_CACHE, t)
+
+                if VERBOSE:
+                    print(f"art cache hit: {cached}")
+
+                if cached:
+                    image_tilegrid = image_tilegrids[back]
+                    back = 1 - back
+
+                else:
+                    t = timing.start()
+                    image_exit_code, image_data = await get_image(requests, image_url)
+                    timing.stop(timing.SPAN_GET_IMAGE, t)
+
+                    if VERBOSE:
+                        print(f"exit_code [get_image]: {image_exit_code}")
+
+                    if image_exit_code == 0:
+                        t = timing.start()
+                        width, height = decoder.open(image_data) # decode straight from memory
+
+                        if not await decode_image(width, height, image_tilegrids[back].bitmap): # into the image not shown
+                            image_exit_code = 1 # unexpected image size
+                        timing.stop(timing.SPAN_DECODE_JPEG, t)
+
+                    if image_exit_code == 0:
+                        image_tilegrid = image_tilegrids[back]
+                        back = 1 - back
+
+                        art_cache.put(image_url, image_tilegrid.bitmap) # shown from cache next time
+
+                    if image_exit_code == 1:
+                        image_tilegrid = image_tilegrid_fill # placeholder fill image
+
+        timing.count(timing.COUNT_FETCH if exit_code == 0 else timing.COUNT_FETCH_ERROR)
+        latest.put((exit_code, active, song_name, artist_list, album_name, image_url, image_tilegrid))
+
+
+# SHOW SONGS, SWAPPING IN FETCHED DATA AT THE END OF EACH SCROLL PASS
+async def display_loop(latest):
+    setup = False
+    failures = 0 # consecutive failed fetches
+    last_success = 0 # monotonic time of last song shown [seconds]
+
+    # scroll pass: scroll song text once, with artist text scrolling alongside
+    timeline = Timeline(FrameClock(TEXT_LABEL_DELAY))
+    timeline.add(Marquee(text_label_top))
+    timeline.add(Marquee(text_label_bottom, repeat=True), background=True)
+
+    latest.request() # request first fetch
+
+    while True:
+        ready, data = latest.take()
+
+        if ready:
+            exit_code, active, song_name, artist_list, album_name, image_url, image_tilegrid = data
+
+            if VERBOSE:
+                print(f"setup: {setup}")
+                print(f"free memory: {mem_free()}")
+                print(f"active: {active}")
+
+            # reset if low memory
+            if mem_free() < 1000:
+                render.show(blank_group)
+                render.refresh()
+                return
+
+            # get song details if active and update on master group
+            if exit_code == 0 and active:
+                if VERBOSE:
+                    print(f"song_name: {song_name}")
+                    print(f"artist_list: {artist_list}")
+                    print(f"album_name: {album_name}")
+                    print(f"image_url: {image_url}")
+
+                setup = True # mark setup as complete
+                failures = 0
+                last_success = time.monotonic()
+
+                # format song and artist text
+                formatted_song, formatted_artist = format_song_artist(song_name, artist_list)
 
                 if VERBOSE:
-                    print(f"exit_code [get_image]: {exit_code}")
+                    print(f"formatted_song: {formatted_song}")
+                    print(f"formatted_artist: {formatted_artist}")
+
+                # update text labels on master group
+                t = timing.start()
+                text_label_top.text = formatted_song
+                text_label_bottom.text = formatted_artist
+                timing.stop(timing.SPAN_LABEL_TEXT, t)
 
-                if exit_code == 0:
-                    width, height = decoder.open(image_file) # open jpeg file
-                    bitmap = Bitmap(width, height, 65535) # create a blank bitmap (256-color 16-bit palette)
-                    decoder.decode(bitmap) # decode the jpeg into the blank bitmap
+            elif exit_code != 0 and setup and time.monotonic() - last_success < STALE_DELAY:
+                failures += 1 # keep showing last song while Spotify is unavailable
 
-                    downsampled_bitmap = downsample_bitmap(bitmap, corner=[0, 0]) # downsample 64x64 to 32x32 bitmap
-                    
-                    pixel_shader = ColorConverter(input_colorspace=Colorspace.RGB565_SWAPPED)
-                    image_tilegrid = TileGrid(downsampled_bitmap, pixel_shader=pixel_shader, x=0, y=0) # make tilegrid with decoded bitmap
+            else:
+                setup = False # mark setup as incomplete
 
-                if exit_code == 1:
-                    image_tilegrid = image_tilegrid_fill # placeholder fill image
+                if exit_code != 0:
+                    failures += 1
 
             # update image on master group
-            master_group.pop(3)
-            master_group.insert(3, image_tilegrid)
-
-    # if setup completed
-    if setup:
-        # show text if reset
-        if reset:
-            text_label_group.hidden = False
-        
-        # scroll text and update reset condition
-        reset = scroll(text_label_top)
-        scroll(text_label_bottom)
-        
-        # hide text if reset or add delay before next iteration if not reset
-        if reset:
-            text_label_group.hidden = True
-        else:
-            time.sleep(TEXT_LABEL_DELAY)
+            if image_tilegrid is not None:
+                master_group.pop(3)
+                master_group.insert(3, image_tilegrid)
+                render.invalidate()
+
+            # add delay before retrying if setup failed, otherwise prefetch during the next scroll pass
+            if not setup:
+                render.refresh()
+                await asyncio.sleep(backoff(max(0, failures - 1), RETRY_DELAY, MAX_RETRY_DELAY))
+
+            latest.request()
+
+        # wait for data if setup not completed
+        if not setup:
+            render.refresh()
+            await asyncio.sleep(TEXT_LABEL_DELAY)
+            continue
 
-    # add delay before retrying if setup failed
-    else:
-        reset = True
-        time.sleep(RETRY_DELAY)
+        # show text
+        render.hide(text_label_group, False)
+
+        await timeline.play()
+
+        timing.count(timing.COUNT_SCROLL_PASS)
+        timing.alloc_period(timing.BUDGET_SCROLL_PASS)
+
+        # hide text at end of scroll pass
+        render.hide(text_label_group, True)
+
+
+# RUN MAIN LOOP TO SHOW SONGS
+latest = Latest()
+run(display_loop(latest), fetch_loop(latest))
 
 
 # CLEAN UP
 # set display root group to blank group and show
-display.root_group = blank_group
-blank_group.hidden = False
+render.show(blank_group)
+render.hide(blank_group, False)
+render.refresh()
 
-connection_manager_close_all(pool)
+net.close()
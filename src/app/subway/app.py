@@ -1,15 +1,11 @@
 # type: ignore
 
 from wifi import radio
-from ssl import create_default_context
-from socketpool import SocketPool
-from adafruit_requests import Session
-from adafruit_connection_manager import connection_manager_close_all
 
-from adafruit_datetime import datetime, timezone
 
 import os
 import time
+import asyncio
 
 import board
 from gc import mem_free
@@ -20,7 +16,17 @@ from displayio import Group, release_displays
 
 from adafruit_display_shapes.rect import Rect
 from adafruit_display_shapes.circle import Circle
-from adafruit_display_text.label import Label
+
+from led_matrix import clock, log, net, power, render, timing
+from led_matrix.animation import Blink, Delay, FrameClock, Marquee, Timeline
+from led_matrix.cache import Cache
+from led_matrix.retry import Breaker, backoff, is_network_error, is_server_error
+from led_matrix.gtfsrt import FeedAlerts, FeedItems
+from led_matrix.runtime import Latest, abandon, read_items, read_stream, request, run
+from led_matrix.schedule import Schedule
+from led_matrix.sprites import Atlas
+from led_matrix.text import TextLine
+from led_matrix.transit import ALERTS_PATH, DEPARTED_DELAY, MAX_STOP_TIMES, MTA_ROUTE_URL, MTA_STOP_URL, STOP_TIME_FIELDS, STOP_TIMES_PATH, STOP_TIMES_PER_PAGE, TRAINS, FeedStopTimes, StopTimes, format_times, page_trains, upcoming
 
 
 # PARAMETERS
@@ -32,14 +38,18 @@ SHOW_LIVE = True # flash live icon if data is live
 ON_HOUR = 12 # turn on hour (UTC) [hour]
 OFF_HOUR = 3 # turn off hour (UTC) [hour]
 RESTART_HOUR = 4 # restart hour (UTC) [hour]
+SLEEP_MODE = "light" # off hours sleep ("light" keeps the app in memory, "deep" draws least and restarts the board on wake)
 
-TEXT_LABEL_DELAY = 0.06 # scroll speed for top text label (and refresh speed at the end of each scroll) [seconds]
-LIVE_ICON_DELAY = 6 # flash speed for live icon [seconds]
-RETRY_DELAY = 10 # delay before retrying between iterations after error [seconds]
-SLEEP_DELAY = 10 # delay between iterations while sleeping [seconds]
+TEXT_LABEL_DELAY = 0.06 # frame period, scrolling top text label one pixel per frame (and refresh speed at the end of each scroll) [seconds]
+SCROLL_HOLD_DELAY = 1 # hold text still before scrolling [seconds]
+FETCH_DELAY = 60 # delay between fetches while data is live (minutes count down locally in between) [seconds]
+COUNTDOWN_DELAY = 1 # recompute minutes shown from last fetched departure times this often while scrolling [seconds]
+LIVE_ICON_DELAY = 6 # flash speed for live icon [frames]
+RETRY_DELAY = 10 # first delay before retrying between iterations after error, doubled per failure [seconds]
+MAX_RETRY_DELAY = 300 # longest delay before retrying between iterations after error [seconds]
+FETCH_TIMEOUT = 10 # socket timeout for each request [seconds]
 
 APP_PATH = "/app/subway/app.py" # app file path
-LOG_PATH = "/code_out.txt" # log file path
 
 WIFI_SSID = os.getenv("CIRCUITPY_WIFI_SSID") # wifi name
 WIFI_PASSWORD = os.getenv("CIRCUITPY_WIFI_PASSWORD") # wifi password
@@ -48,127 +58,349 @@ AIO_USERNAME = os.getenv("ADAFRUIT_AIO_USERNAME") # Adafruit IO username
 AIO_KEY = os.getenv("ADAFRUIT_AIO_KEY") # Adafruit IO key
 AIO_TIME_URL = f"https://io.adafruit.com/api/v2/{AIO_USERNAME}/integrations/time/strftime?x-aio-key={AIO_KEY}&fmt=%25Y%3A%25m%3A%25d%3A%25H%3A%25M%3A%25S&tz=Etc/UTC" # Adafruit IO URL for current time (UTC)
 
-MTA_STOP_ID = 'Q03' # MTA stop ID (72nd Street Q Station)
-MTA_ROUTE_ID = 'Q' # MTA route ID (Q Train)
-MTA_STOP_URL = f"https://demo.transiter.dev/systems/us-ny-subway/stops/{MTA_STOP_ID}?skip_service_maps=true&skip_alerts=true&skip_transfers=true" # MTA URL for stop
-MTA_STOP_URL_DIRECTIONS = ['downtown and brooklyn', 'downtown', 'brooklyn'] # directions to include from stop data
-MTA_ROUTE_URL = f"https://demo.transiter.dev/systems/us-ny-subway/routes/{MTA_ROUTE_ID}?skip_service_maps=true&skip_estimated_headways=true" # MTA URL for route
+STOP_SOURCE = "transiter" # stop times source ("transiter" JSON proxy, or "gtfs" for MTA GTFS-realtime feeds)
+
+# board pages, shown in turn one per scroll pass (MTA stop ID, route IDs to include or None for all, directions to include)
+# (with the gtfs source routes are required, and directions are "uptown" or "downtown")
+MTA_PAGES = [
+    {'stop': 'Q03', 'routes': ['Q'], 'directions': ['downtown and brooklyn', 'downtown', 'brooklyn']}, # 72nd Street Q Station, downtown
+]
+MTA_FEED_URL = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs{}" # MTA GTFS-realtime feed URL (by feed suffix)
+MTA_ALERTS_URL = "https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/camsys%2Fsubway-alerts" # MTA GTFS-realtime alerts feed URL
+
+# GTFS-realtime feed suffix by route ID (routes not listed are in the numbered lines feed)
+MTA_FEEDS = {
+    'A': '-ace', 'C': '-ace', 'E': '-ace', 'H': '-ace', 'FS': '-ace',
+    'B': '-bdfm', 'D': '-bdfm', 'F': '-bdfm', 'FX': '-bdfm', 'M': '-bdfm',
+    'G': '-g',
+    'J': '-jz', 'Z': '-jz',
+    'L': '-l',
+    'N': '-nqrw', 'Q': '-nqrw', 'R': '-nqrw', 'W': '-nqrw',
+    'SI': '-si',
+}
+GTFS_DIRECTIONS = {'N': 'uptown', 'S': 'downtown'} # direction by GTFS stop ID suffix
+
+# destination names by GTFS stop ID for the gtfs source (destinations not listed show their stop ID)
+STOP_NAMES = {
+    'D43': 'Coney Island-Stillwell Av',
+    'G08': 'Forest Hills-71 Av',
+    'Q05': '96 St',
+    'R01': 'Astoria-Ditmars Blvd',
+    'R27': 'Whitehall St',
+    'R45': 'Bay Ridge-95 St',
+}
+
+STOP_TTL = 20 # reuse stop data across pages and scroll passes for this long [seconds]
+ROUTE_TTL = 300 # reuse route alert state for this long [seconds]
+ROUTE_MAX_STALE = 3600 # keep last alert state this long while route endpoint is failing [seconds]
+
+SCHEDULE_PATH = "/app/subway/schedule.bin" # static schedule index shown while live data is unavailable (built by setup/app/subway/schedule.py, optional)
+SCHEDULE_UTC_OFFSET = -5 * 3600 # schedule time zone, standard time (US daylight saving time applied) [seconds]
+
+# Transiter URLs, trains per page, stop times kept and departed delay are in led_matrix.transit (shared with tools/bench)
 
 BACKGROUND_COLOR = 0x000000 # background color (black)
 BIT_DEPTH = 2 # color depth
 
 TEXT_FONT = FONT # default font
 
-ROUTE_ICON_COLOR = 0xFCB80A # route icon color (yellow)
+ROUTE_BULLETS_PATH = "/app/subway/bullets.bmp" # route bullet sprite atlas (built by setup/app/subway/bullets.py)
+ROUTE_BULLETS_INDEX_PATH = "/app/subway/bullets.json" # route bullet tile by route ID
 TEXT_LABEL_COLOR = 0x919492 # text label color (gray-white)
+TEXT_CAPACITY = 32 # characters held by each text label (longer text is cut off) [characters]
 ALERT_ICON_COLOR = 0xB22222 # alert icon color (red)
 LIVE_ICON_COLOR = 0x919492 # flashing live icon color (gray-white)
 
+SCROLL_HOLD_FRAMES = int(SCROLL_HOLD_DELAY / TEXT_LABEL_DELAY) # frames held before scrolling
+COUNTDOWN_FRAMES = max(1, int(COUNTDOWN_DELAY / TEXT_LABEL_DELAY)) # frames between countdown updates
+
 if RESTART_HOUR == 0: # handle logic for restarting device at RESTART_HOUR
     RESTART_HOUR_PREV = 23
 else:
     RESTART_HOUR_PREV = RESTART_HOUR - 1
 
+# request URLs per page (one stop URL for transiter, one per feed of the page routes for gtfs)
+for page in MTA_PAGES:
+    if STOP_SOURCE == "gtfs":
+        page['stop_urls'] = []
+        for route in page['routes']:
+            url = MTA_FEED_URL.format(MTA_FEEDS.get(route, ''))
+            if url not in page['stop_urls']:
+                page['stop_urls'].append(url)
+    else:
+        page['stop_urls'] = [MTA_STOP_URL.format(page['stop'])]
+
+    if STOP_SOURCE == "gtfs":
+        page['route_urls'] = [MTA_ALERTS_URL] # one alerts feed for all routes
+    else:
+        page['route_urls'] = [MTA_ROUTE_URL.format(route) for route in page['routes'] or []]
+
+# circuit breakers per endpoint
+time_breaker = Breaker('aio_time')
+
+breakers = {} # per stop and route URL
+for page in MTA_PAGES:
+    for url in page['stop_urls']:
+        breakers[url] = Breaker(page['stop'] if STOP_SOURCE != "gtfs" else url[url.rfind('gtfs'):])
+    for route, url in zip(page['routes'] or [], page['route_urls']):
+        breakers[url] = Breaker(route if STOP_SOURCE != "gtfs" else 'alerts')
+
+# fetch cache shared by all pages (keyed by URL)
+cache = Cache()
+
+# static schedule fallback (None if not built)
+try:
+    schedule = Schedule(SCHEDULE_PATH, SCHEDULE_UTC_OFFSET)
+except OSError:
+    schedule = None
+
+if VERBOSE and schedule is not None:
+    for page in MTA_PAGES:
+        if not any(name in names for names in schedule.directions for name in page['directions']):
+            print(f"no scheduled direction for {page['directions']} (map with setup/app/subway/schedule.py --direction)")
+
+
+# GET CURRENT TIME (from the clock, which every response syncs from its Date header, with Adafruit IO as fallback)
+async def get_time(requests):
+    if clock.synced():
+        return clock.now(), clock.hour()
+
+    if not time_breaker.allow(): # skip request while time endpoint is failing
+        return None, None
 
-# GET CURRENT TIME
-def get_time(requests):
     try:
-        with requests.get(AIO_TIME_URL) as response:
+        with await request(requests.get, AIO_TIME_URL, timeout=FETCH_TIMEOUT) as response:
             time_response = response.text
-                
+
         year, month, day, hour, minute, second = map(int, time_response.replace(':', ' ').split())
 
-        current_time = int(datetime(year, month, day, hour, minute, second, tzinfo=timezone.utc).timestamp())
-        current_hour = hour
+        clock.sync(clock.timestamp(year, month, day, hour, minute, second))
 
-        return current_time, current_hour
+        time_breaker.success()
+
+        return clock.now(), clock.hour()
     
     except Exception as e:
         if VERBOSE:
             print(f"get_time error: {e}")
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {APP_PATH}: get_time error: {e}\n")
+        time_breaker.failure()
+        log.error(log.APP_SUBWAY, log.SITE_GET_TIME, e)
         
         return None, None
 
 
-# GET TRAIN
-def get_train(requests, current_time):
-    if not current_time: # require current_time
-        return None, None, None, None
-    
+# CHECK RESPONSE STATUS BEFORE PARSING (an error status may come with a JSON body that would parse as no data), dropping
+# the body and updating the endpoint breaker if it is not 200 (the caller returns None, so nothing is cached)
+async def status_ok(response, breaker):
+    if response.status_code == 200:
+        return True
+
+    if VERBOSE:
+        print(f"status code: {response.status_code}")
+
+    if is_server_error(response.status_code): # endpoint failing
+        breaker.failure()
+    else:
+        breaker.success() # endpoint reachable, request rejected (e.g. unknown stop)
+
+    await abandon(response)
+    return False
+
+
+# GET STOP TIMES FOR STOP URL (through the cache, so pages on the same stop share one request)
+async def get_stop(url):
+    breaker = breakers[url]
+    if not breaker.allow(): # skip request while stop endpoint is failing (last good data stays on display)
+        return None
+
+    stop_times = StopTimes([page for page in MTA_PAGES if url in page['stop_urls']], STOP_TIMES_PER_PAGE, MAX_STOP_TIMES)
+
     try:
-        with requests.get(MTA_STOP_URL) as response:
-            mta_response = response.json()
-
-        all_trains = mta_response['stopTimes']
-
-        upcoming_trains = []
-        for t in all_trains:
-            direction_name = t['headsign']
-            
-            if direction_name.lower() in MTA_STOP_URL_DIRECTIONS:
-                train_symbol = t['trip']['route']['id']
-                destination_name = t['destination']['name']
-                
-                _departure_time = int(t['departure']['time'])
-                remaining_time = max(0, int((_departure_time - current_time)/60)) # convert to minutes
-
-                if len(upcoming_trains) > 1 and remaining_time == 0:
-                    continue # do not include more than one train in "0 minutes"
-
-                upcoming_trains.append({
-                    'train_symbol': train_symbol,
-                    'destination_name': destination_name,
-                    'remaining_time': remaining_time
-                    })
-
-            if len(upcoming_trains) >= 3: # get next 3 trains
-                break
-        
-        times = [t['remaining_time'] for t in upcoming_trains]
-        symbol = upcoming_trains[0]['train_symbol']
-        destination = upcoming_trains[0]['destination_name']
+        with await request(requests.get, url, timeout=FETCH_TIMEOUT) as response:
+            if not await status_ok(response, breaker):
+                return None
 
-        with requests.get(MTA_ROUTE_URL) as response:
-            mta_response = response.json()
+            await read_items(response, STOP_TIMES_PATH, STOP_TIME_FIELDS, stop_times.add)
+
+        breaker.success()
+
+        return stop_times.stop_times
 
-        alert = len(mta_response['alerts']) > 0
-        
-        return times, symbol, destination, alert
-    
     except Exception as e:
         if VERBOSE:
-            print(f"get_train error: {e}")
+            print(f"get_stop error: {e}")
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {APP_PATH}: get_train error: {e}\n")
-        
-        return None, None, None, None
+        if is_network_error(e):
+            breaker.failure() # parse errors do not count against the stop endpoint
 
+        log.error(log.APP_SUBWAY, log.SITE_GET_TRAIN, e)
 
-# SCROLL TEXT HORIZONTALLY
-def scroll(label):
-    group = label[0]
-    group.x -= 1 # move label left
+        return None
 
-    if group.x < -1*6*len(label.text): # if label has moved full length, refresh to initial position and return True
-        group.x = 0
-        return True
-    
-    return False
+
+# GET STOP TIMES FOR GTFS-REALTIME FEED URL (through the cache, so pages on routes in the same feed share one request)
+async def get_feed(url):
+    breaker = breakers[url]
+    if not breaker.allow(): # skip request while feed is failing (last good data stays on display)
+        return None
+
+    feed_pages = [page for page in MTA_PAGES if url in page['stop_urls']]
+    stop_ids = [page['stop'] + suffix for page in feed_pages for suffix in GTFS_DIRECTIONS]
+    routes = [route for page in feed_pages for route in page['routes']]
+
+    try:
+        with await request(requests.get, url, timeout=FETCH_TIMEOUT) as response:
+            if not await status_ok(response, breaker):
+                return None
+
+            stop_times = FeedStopTimes(feed_pages, GTFS_DIRECTIONS, STOP_NAMES, clock.now(), DEPARTED_DELAY) # clock synced from this response
+            await read_stream(response, FeedItems(stop_ids, routes, stop_times.add))
+
+        breaker.success()
+
+        return stop_times.soonest(MAX_STOP_TIMES)
+
+    except Exception as e:
+        if VERBOSE:
+            print(f"get_feed error: {e}")
+
+        if is_network_error(e):
+            breaker.failure() # parse errors do not count against the feed
+
+        log.error(log.APP_SUBWAY, log.SITE_GET_TRAIN, e)
+
+        return None
+
+
+# GET ROUTE ALERT FOR ROUTE URL (through the cache)
+async def get_alert(url):
+    breaker = breakers[url]
+    if not breaker.allow(): # skip request while route endpoint is failing (cache keeps last alert state)
+        return None
+
+    try:
+        with await request(requests.get, url, timeout=FETCH_TIMEOUT) as response:
+            if not await status_ok(response, breaker):
+                return None
+
+            alerts = await read_items(response, ALERTS_PATH, (), lambda alert: True) # stop at first alert
+
+        breaker.success()
+
+        return alerts > 0
+
+    except Exception as e:
+        if VERBOSE:
+            print(f"get_alert error: {e}")
+
+        breaker.failure()
+        log.error(log.APP_SUBWAY, log.SITE_GET_TRAIN, e)
+
+        return None
+
+
+# GET ROUTES WITH ACTIVE ALERTS FROM GTFS-REALTIME ALERTS FEED URL (through the cache)
+async def get_feed_alerts(url):
+    breaker = breakers[url]
+    if not breaker.allow(): # skip request while alerts feed is failing (cache keeps last alert state)
+        return None
+
+    routes = [route for page in MTA_PAGES for route in page['routes']]
+
+    try:
+        with await request(requests.get, url, timeout=FETCH_TIMEOUT) as response:
+            if not await status_ok(response, breaker):
+                return None
+
+            parser = FeedAlerts(routes, clock.now()) # clock synced from this response
+            await read_stream(response, parser) # stops once every route has an alert
+
+        breaker.success()
+
+        return parser.routes
+
+    except Exception as e:
+        if VERBOSE:
+            print(f"get_feed_alerts error: {e}")
+
+        breaker.failure()
+        log.error(log.APP_SUBWAY, log.SITE_GET_TRAIN, e)
+
+        return None
+
+
+# GET TRAINS FOR PAGE (absolute departure times, so minutes can be recomputed locally until the next fetch), from the
+# static schedule if no live stop times are available
+async def get_train(page):
+    gtfs = STOP_SOURCE == "gtfs"
+
+    stop_time_lists = []
+    for url in page['stop_urls']:
+        stop_time_lists.append(await cache.get(url, STOP_TTL, get_feed if gtfs else get_stop))
+
+    current_time = clock.now()
+    scheduled = schedule is not None and current_time is not None and all(stop_times is None for stop_times in stop_time_lists)
+    if scheduled:
+        stop_time_lists = [schedule.stop_times(page, current_time, STOP_TIMES_PER_PAGE)]
+
+    trains = page_trains(page, stop_time_lists, STOP_TIMES_PER_PAGE)
+    if not trains:
+        return None
+
+    # unknown alert state counts as no alert
+    alert = False
+    for url in page['route_urls']:
+        if gtfs:
+            alert_routes = await cache.get(url, ROUTE_TTL, get_feed_alerts, ROUTE_MAX_STALE)
+            if alert_routes and any(route in alert_routes for route in page['routes']):
+                alert = True
+        elif await cache.get(url, ROUTE_TTL, get_alert, ROUTE_MAX_STALE):
+            alert = True
+
+    return trains, alert, scheduled
+
+
+# GET TRAINS FOR ALL PAGES (None for pages without data), syncing the clock from the responses before any time request
+async def get_board():
+    board = []
+    for page in MTA_PAGES:
+        board.append(await get_train(page))
+        await asyncio.sleep(0) # let display tasks run between pages
+
+    return board
+
+
+# SHOW ROUTE BULLET (fallback bullet for routes not in atlas)
+def set_route(symbol):
+    tile = bullets.tile(symbol)
+
+    if route_bullet[0] != tile:
+        route_bullet[0] = tile
+        render.invalidate()
+
+
+# SLEEP UNTIL ON HOUR WITH DISPLAY AND RADIO OFF (no requests at night), RECONNECTING AND RESYNCING ON WAKE
+def sleep_until_on(current_time):
+    seconds = clock.until_hour(ON_HOUR, current_time)
+
+    if VERBOSE:
+        print(f"sleeping {seconds} seconds\n")
+
+    power.sleep(seconds, display, radio, deep=SLEEP_MODE == "deep")
+
+    radio.connect(WIFI_SSID, WIFI_PASSWORD)
+    clock.expire() # resync once on wake, since the local clock ran unchecked all night
 
 
 # SET UP WIFI
-radio.connect(WIFI_SSID, WIFI_PASSWORD)
+if not radio.connected: # keep connection (and open sockets) when the launcher retries the app
+    radio.connect(WIFI_SSID, WIFI_PASSWORD)
 
 if VERBOSE:
     print(f"connected to {WIFI_SSID}\n")
 
-pool = SocketPool(radio)
-context = create_default_context()
-requests = Session(pool, context)
+requests = net.session(radio) # shared session, reusing keep-alive connections across requests and app retries
 
 
 # SET UP DISPLAY
@@ -201,7 +433,7 @@ matrix = RGBMatrix(
     doublebuffer=True
 )
 
-display = FramebufferDisplay(matrix, auto_refresh=True)
+display = FramebufferDisplay(matrix, auto_refresh=False) # refreshed by render when something changed
 
 # blank rectangle/group
 blank_group = Group()
@@ -213,16 +445,12 @@ blank_group.hidden = True # hide until needed
 
 # placeholder text labels/groups
 text_label_top_group = Group()
-text_label_top = Label(
-    font=TEXT_FONT, color=TEXT_LABEL_COLOR, text="", x=25, y=10, scale=1
-)
+text_label_top = TextLine(TEXT_FONT, TEXT_CAPACITY, TEXT_LABEL_COLOR, x=25, y=10)
 text_label_top_group.append(text_label_top)
 text_label_top_group.hidden = True # hide until first update
 
 text_label_bottom_group = Group()
-text_label_bottom = Label(
-    font=TEXT_FONT, color=TEXT_LABEL_COLOR, text="", x=25, y=22, scale=1
-)
+text_label_bottom = TextLine(TEXT_FONT, TEXT_CAPACITY, TEXT_LABEL_COLOR, x=25, y=22)
 text_label_bottom_group.append(text_label_bottom)
 text_label_bottom_group.hidden = True # hide until first update
 
@@ -234,27 +462,11 @@ border_rectangle_right = Rect(
     width=3, height=32, x=61, y=0, fill=BACKGROUND_COLOR
 )
 
-# circles for route, offset 1 pixel to the right and down
-route_circle_1 = Circle(
-    x0=12, y0=15, r=9, fill=ROUTE_ICON_COLOR
-)
-route_circle_2 = Circle(
-    x0=12, y0=15+1, r=9, fill=ROUTE_ICON_COLOR
-)
-route_circle_3 = Circle(
-    x0=12+1, y0=15, r=9, fill=ROUTE_ICON_COLOR
-)
-route_circle_4 = Circle(
-    x0=12+1, y0=15+1, r=9, fill=ROUTE_ICON_COLOR
-)
+# route bullet (one tile of the atlas, in place of the circles and labels drawn at runtime)
+bullets = Atlas(ROUTE_BULLETS_PATH, ROUTE_BULLETS_INDEX_PATH)
+route_bullet = bullets.sprite(x=3, y=6)
 
-# symbol for route
-route_label_1 = Label(
-    font=TEXT_FONT, color=BACKGROUND_COLOR, text=MTA_ROUTE_ID, x=10, y=16, scale=1
-)
-route_label_2 = Label(
-    font=TEXT_FONT, color=BACKGROUND_COLOR, text=MTA_ROUTE_ID, x=10+1, y=16, scale=1
-)
+set_route((MTA_PAGES[0]['routes'] or [''])[0]) # show first page route until first update
 
 # alert icon/group
 alert_group = Group()
@@ -279,13 +491,7 @@ master_group.append(text_label_bottom_group)
 master_group.append(border_rectangle_left)
 master_group.append(border_rectangle_right)
 
-master_group.append(route_circle_1)
-master_group.append(route_circle_2)
-master_group.append(route_circle_3)
-master_group.append(route_circle_4)
-
-master_group.append(route_label_1)
-master_group.append(route_label_2)
+master_group.append(route_bullet)
 
 if SHOW_LIVE:
     master_group.append(live_group)
@@ -295,142 +501,219 @@ if SHOW_ALERT:
 
 # set display root group to master group
 display.root_group = master_group
+render.init(display)
 
 
-# RUN MAIN LOOP TO SHOW TRAINS
-setup = False
-reset = True
-previous_hour = RESTART_HOUR
+# FETCH TIME AND TRAINS IN BACKGROUND
+async def fetch_loop(latest):
+    while True:
+        await latest.wait_request() # fetch only when display asks for fresh data
 
-while True:
-    if reset:
-        i = 0
-        active = True
-        live = True
+        t = timing.start()
+        board = await get_board() # first, so its Date headers sync the clock without Adafruit IO
+        timing.stop(timing.SPAN_GET_TRAIN, t)
 
-        if VERBOSE:
-            print(f"setup: {setup}")
-            print(f"free memory: {mem_free()}")
+        await asyncio.sleep(0) # let display tasks run between requests
 
-        # get current time
-        current_time, current_hour = get_time(requests)
+        t = timing.start()
+        current_time, current_hour = await get_time(requests) # Adafruit IO only if no response synced the clock
+        timing.stop(timing.SPAN_GET_TIME, t)
 
-        if current_time and isinstance(current_hour, int):
-            # restart at restart hour or if low memory
-            if (previous_hour == RESTART_HOUR_PREV and current_hour == RESTART_HOUR) or mem_free() < 1000:
-                display.root_group = blank_group
-                break
-            
-            if ON_HOUR < OFF_HOUR:
-                if current_hour < ON_HOUR or OFF_HOUR <= current_hour: # turn off at night
-                    active = False
-            else:
-                if ON_HOUR > current_hour and current_hour >= OFF_HOUR: # turn off at night
-                    active = False
-            
-            if VERBOSE:
-                print(f"active: {active}\n")
+        timing.count(timing.COUNT_FETCH)
+        latest.put((current_time, current_hour, board))
 
-            if not active:
-                display.root_group = blank_group
-                time.sleep(SLEEP_DELAY)
-                continue
 
-            previous_hour = current_hour
+# SHOW TRAINS, SWAPPING IN FETCHED DATA AT THE END OF EACH SCROLL PASS AND COUNTING DOWN LOCALLY IN BETWEEN
+async def display_loop(latest):
+    setup = False
+    active = True
+    live = False
+    failures = 0 # consecutive fetches without live data
+    previous_hour = RESTART_HOUR
+    pages = [] # pages with trains from last fetch (live or scheduled)
+    page_index = 0 # next page to show
+    fetch_time = None # monotonic time to request next fetch (None while a fetch is requested)
+    trains = [] # trains of page shown
 
-            if VERBOSE:
-                print(f"current_time: {current_time}")
-                print(f"current_hour: {current_hour}")
-            
-        else:
-            live = False
-
-        # get train
-        times, symbol, destination, alert = get_train(requests, current_time)
-
-        if times and symbol and destination and alert in [True, False]:
-            
-            formatted_times = ','.join([str(t) for t in times[:3]]) # format next 3 times
-            if len(formatted_times) > 6:
-                formatted_times = ','.join([str(t) for t in times[:2]]) # format next 2 times if too long
-            
-            formatted_symbol = str(symbol)
-            formatted_destination = str(destination)
-            formatted_alert = bool(alert)
+    # count down minutes from departure times (label only rewritten when a minute changes)
+    def update_countdown():
+        t = timing.start()
+        formatted_times = format_times(upcoming(trains, clock.now(), TRAINS, DEPARTED_DELAY)[0])
+        if formatted_times != text_label_bottom.text:
+            text_label_bottom.text = formatted_times
+        timing.stop(timing.SPAN_LABEL_TEXT, t)
 
-            if VERBOSE:
-                print(f"times: {formatted_times}")
-                print(f"symbol: {formatted_symbol}")
-                print(f"destination: {formatted_destination}")
-                print(f"alert: {formatted_alert}")
-            
-        else:
-            live = False
-        
-        if VERBOSE:
-            print(f"live: {live}\n")
+    # scroll pass: hold, then scroll top text once, with live icon flashing and minutes counting down alongside
+    timeline = Timeline(FrameClock(TEXT_LABEL_DELAY))
+    timeline.add(Delay(SCROLL_HOLD_FRAMES), Marquee(text_label_top))
+    live_track = timeline.add(Blink(live_group, LIVE_ICON_DELAY), background=True)
+    timeline.every(COUNTDOWN_FRAMES, update_countdown)
 
-        if live:
-            setup = True # mark setup as complete
-            
-            # update text labels on master group
-            text_label_top.text = formatted_destination
-            text_label_bottom.text = formatted_times
+    latest.request() # request first fetch
 
-            # update live icon/group on master group
-            live_group.hidden = False
+    while True:
+        ready, data = latest.take()
 
-            # update alert icon/group on master group
-            if SHOW_ALERT:
-                if alert:
-                    alert_group.hidden = False
+        if ready:
+            current_time, current_hour, board = data
+            active = True
+            live = True
+
+            if VERBOSE:
+                print(f"setup: {setup}")
+                print(f"free memory: {mem_free()}")
+
+            if current_time and isinstance(current_hour, int):
+                # restart at restart hour or if low memory
+                if (previous_hour == RESTART_HOUR_PREV and current_hour == RESTART_HOUR) or mem_free() < 1000:
+                    render.show(blank_group)
+                    render.refresh()
+                    return
+
+                if ON_HOUR < OFF_HOUR:
+                    if current_hour < ON_HOUR or OFF_HOUR <= current_hour: # turn off at night
+                        active = False
                 else:
-                    alert_group.hidden = True
-            
-        else:
-            if SHOW_LIVE:
-                # update live icon/group on master group
-                live_group.hidden = True
-
-    # if setup completed
-    if setup:
-        # show text and add initial delay before starting scroll
-        if reset:
-            text_label_top_group.hidden = False
-            text_label_bottom_group.hidden = False
-            time.sleep(1)
-        
-        # scroll text and update reset condition
-        reset = scroll(text_label_top)
-        
-        # flash live icon if data is live
-        if SHOW_LIVE:
+                    if ON_HOUR > current_hour and current_hour >= OFF_HOUR: # turn off at night
+                        active = False
+
+                if VERBOSE:
+                    print(f"active: {active}\n")
+
+                if not active:
+                    render.show(blank_group)
+                    render.refresh() # blank display stays unrefreshed while sleeping
+                    sleep_until_on(current_time) # blocks every task, the fetch task is idle until requested
+                    latest.request()
+                    fetch_time = None
+                    continue
+
+                render.show(master_group)
+                previous_hour = current_hour
+
+                if VERBOSE:
+                    print(f"current_time: {current_time}")
+                    print(f"current_hour: {current_hour}")
+
+            else:
+                live = False
+
+            board_pages = [p for p in board if p] if board and current_time else [] # pages with trains (counted down from the clock)
+
+            if board_pages:
+                if VERBOSE:
+                    for trains, alert, scheduled in board_pages:
+                        print(f"{upcoming(trains, current_time, TRAINS, DEPARTED_DELAY)[0]} {trains[0][1]} {trains[0][2]} (alert: {alert}, scheduled: {scheduled})")
+
+                if any(scheduled for _, _, scheduled in board_pages):
+                    live = False # scheduled departures shown, not live
+
+                setup = True # mark setup as complete
+                pages = board_pages
+
+            else:
+                live = False
+
+            if VERBOSE:
+                print(f"live: {live}\n")
+
             if live:
-                if i % (LIVE_ICON_DELAY*2) == 0:
-                    live_group.hidden = True
-                elif i % LIVE_ICON_DELAY == 0:
-                    live_group.hidden = False
-        
-        if reset:
-            live_group.hidden = False
-        
-        i += 1 # increment counter
+                failures = 0
 
-        # hide top text if reset or add delay before next iteration if not reset
-        if reset:
-            text_label_top_group.hidden = True
-        else:
-            time.sleep(TEXT_LABEL_DELAY)
+                # update live icon/group on master group
+                render.hide(live_group, False)
+
+            else:
+                failures += 1
+                timing.count(timing.COUNT_FETCH_ERROR)
+
+                if SHOW_LIVE:
+                    # update live icon/group on master group
+                    render.hide(live_group, True)
+
+            # back off before retrying if setup failed, otherwise retry during the next scroll pass
+            if not setup:
+                render.refresh()
+                await asyncio.sleep(backoff(failures - 1, RETRY_DELAY, MAX_RETRY_DELAY))
+
+            # fetch again after fetch delay if live, otherwise right away
+            fetch_time = time.monotonic() + (FETCH_DELAY if live else 0)
+
+        # request fresh data once due (prefetched during the next scroll pass)
+        if fetch_time is not None and time.monotonic() >= fetch_time:
+            latest.request()
+            fetch_time = None
+
+        # wait for data if setup not completed or sleeping
+        if not setup or not active:
+            render.refresh()
+            await asyncio.sleep(TEXT_LABEL_DELAY)
+            continue
+
+        # show next page with trains left (last pages stay shown and count down while fetches fail)
+        current_time = clock.now()
+        times = None
+        for _ in range(len(pages)):
+            trains, alert, _ = pages[page_index % len(pages)]
+            page_index += 1
+
+            times, train = upcoming(trains, current_time, TRAINS, DEPARTED_DELAY)
+            if times:
+                break
+
+        # wait for next fetch if every train fetched has departed
+        if not times:
+            render.hide(text_label_top_group, True)
+            render.hide(text_label_bottom_group, True)
+            if fetch_time is not None:
+                fetch_time = 0 # fetch now
+
+            render.refresh()
+            await asyncio.sleep(TEXT_LABEL_DELAY)
+            continue
+
+        _, symbol, destination = train
+        formatted_times = format_times(times)
+
+        # update text labels and route icon on master group
+        t = timing.start()
+        text_label_top.text = str(destination)
+        text_label_bottom.text = formatted_times
+        set_route(str(symbol))
+        timing.stop(timing.SPAN_LABEL_TEXT, t)
+
+        # update alert icon/group on master group
+        if SHOW_ALERT:
+            if alert:
+                render.hide(alert_group, False)
+            else:
+                render.hide(alert_group, True)
+
+        # show text and play scroll pass (flash live icon if data is live)
+        render.hide(text_label_top_group, False)
+        render.hide(text_label_bottom_group, False)
+
+        render.hide(live_group, not live) # from the data shown, which may have gone stale since the last pass
+        live_track.enabled = SHOW_LIVE and live
+        await timeline.play()
+
+        timing.count(timing.COUNT_SCROLL_PASS)
+        timing.alloc_period(timing.BUDGET_SCROLL_PASS)
+
+        # hide top text at end of scroll pass (live icon left lit only if data is live)
+        render.hide(live_group, not live)
+        render.hide(text_label_top_group, True)
+
+
+# RUN MAIN LOOP TO SHOW TRAINS
+latest = Latest()
+run(display_loop(latest), fetch_loop(latest))
 
-    # add delay before retrying if setup failed
-    else:
-        reset = True
-        time.sleep(RETRY_DELAY)
-    
 
 # CLEAN UP
 # set display root group to blank group and show
-display.root_group = blank_group
-blank_group.hidden = False
+render.show(blank_group)
+render.hide(blank_group, False)
+render.refresh()
 
-connection_manager_close_all(pool)
+net.close()
@@ -1,58 +1,150 @@
 # type: ignore
 
 import os
+import sys
 import time
 import json
+from gc import collect
+from binascii import hexlify
+
+try:
+    import hashlib
+except ImportError:
+    hashlib = None # without hashlib bytecode cannot be verified, so sources are always used
 
 
 # PARAMETERS
 VERBOSE = False # print data
+TIMING = False # collect per-phase timings and dump them after each app run
+TIMING_TO_FILE = False # dump timings to /timing.txt instead of serial
 
-APP_PATH = "/app.json"
+APP_LIST = ["/app/spotify/app.py", "/app/subway/app.py"] # apps run in rotation (launcher state stores the index)
 
-LOG_PATH = "/code_out.txt" # log file path
-MAX_LOG_SIZE = 5000 # max log file size [bytes]
+ERROR_DELAY = 30 # first delay after error before retrying, doubled per consecutive error [seconds]
+MAX_ERROR_DELAY = 900 # longest delay after error before retrying [seconds]
 
-ERROR_DELAY = 30 # delay after error before retrying [seconds]
+BYTECODE_PATH = "/bytecode" # precompiled bytecode bundle (built with setup/device/build.py)
+BYTECODE_MANIFEST_PATH = "/bytecode/manifest.json" # source hashes and module names for the bundle
 
 
-# SET UP LOGGING
-try:
-    os.stat(LOG_PATH)
-except OSError:
-    open(LOG_PATH, "w").close() # create log file if it does not exist
+# LOAD BYTECODE BUNDLE
+def exists(path):
+    try:
+        os.stat(path)
+        return True
+    except OSError:
+        return False
 
-log_size = os.stat(LOG_PATH)[6] # get log file size
 
-if VERBOSE:
-    print(f"log_size: {log_size}")
+def remove(path):
+    try:
+        if os.stat(path)[0] & 0x4000: # directory
+            for name in os.listdir(path):
+                remove(f"{path}/{name}")
+            os.rmdir(path)
+        else:
+            os.remove(path)
+    except OSError:
+        pass
+
+
+def source_hash(path):
+    digest = hashlib.new('sha1')
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(1024)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    return hexlify(digest.digest()).decode()
+
+
+def is_fresh(source_path, bytecode_hash):
+    if not exists(source_path):
+        return True # bytecode shipped without source
+
+    return hashlib is not None and source_hash(source_path) == bytecode_hash
+
+
+def load_bundle():
+    try:
+        with open(BYTECODE_MANIFEST_PATH, 'r') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return {} # no bundle, run from source
+
+    mpy_version = getattr(sys.implementation, '_mpy', None)
+    if mpy_version is None or (mpy_version & 0xFF) != manifest['mpy_version']:
+        return {} # bundle built for a different firmware (or .mpy not supported)
+
+    # drop stale library bytecode so imports fall back to /lib sources
+    for source_path, entry in manifest['lib'].items():
+        if exists(f"{BYTECODE_PATH}/{entry['bytecode']}") and not is_fresh(f"/{source_path}", entry['hash']):
+            if VERBOSE:
+                print(f"stale bytecode: {source_path}")
+
+            remove(f"{BYTECODE_PATH}/{entry['remove']}")
+
+    lib_path = f"{BYTECODE_PATH}/lib"
+    if '/lib' in sys.path:
+        sys.path.insert(sys.path.index('/lib'), lib_path) # search bundle before /lib
+    else:
+        sys.path.append(lib_path)
+
+    return manifest['apps']
+
+
+def run_app(app, bundle):
+    entry = bundle.get(app.lstrip('/'))
 
-if log_size > MAX_LOG_SIZE:
-    os.rename(LOG_PATH, LOG_PATH + ".old")
-    open(LOG_PATH, "w").close() # clear log file if it exceeds max size
+    if entry and exists(f"{BYTECODE_PATH}/{entry['bytecode']}") and is_fresh(app, entry['hash']):
+        app_path = f"{BYTECODE_PATH}/app"
+        module = entry['module']
+
+        sys.path.insert(0, app_path)
+        try:
+            __import__(module) # import precompiled app (runs app)
+        finally:
+            sys.path.remove(app_path)
+            sys.modules.pop(module, None) # allow rerun on retry
+
+    else:
+        with open(app) as f:
+            exec(f.read(), globals()) # execute app file in launcher globals
+
+
+bundle = load_bundle()
+
+
+# SET UP LOGGING, RETRY, STATE AND TIMING (imported after loading the bundle so the bytecode copy is used)
+from led_matrix import log, state, timing
+from led_matrix.retry import backoff
+
+timing.ENABLED = TIMING
 
 
 # SELECT APP
-with open(APP_PATH, 'r') as file:
-    data = json.load(file) # read previous app from json file
+previous_app_index, reload, boots, incomplete = state.load() # read previous app from launcher state
 
-app_list = data['app_list']
-previous_app = data['previous_app']
-reload = data['reload']
+if previous_app_index >= len(APP_LIST):
+    previous_app_index = -1 # no previous app (or app list shortened)
+    reload = False
+elif not reload:
+    incomplete += 1 # previous app did not complete (error, reset or power loss)
 
 if reload:
-    app = previous_app
+    app_index = previous_app_index
 else:
-    if previous_app in app_list:
-        previous_app_index = app_list.index(previous_app)
-    else:
-        previous_app_index = -1
+    app_index = (previous_app_index + 1) % len(APP_LIST) # select next sequential app
+
+app = APP_LIST[app_index]
+boots += 1
 
-    app = app_list[(previous_app_index + 1) % len(app_list)] # select next sequential app
+state.save(app_index, False, boots, incomplete) # write current app to launcher state (reload = False since app not completed)
 
-with open(APP_PATH, 'w') as file:
-    data = {'previous_app': app, 'app_list': app_list, 'reload': False}
-    json.dump(data, file) # write current app to json file (reload = False since app not completed)
+if VERBOSE:
+    print(f"boots: {boots}, incomplete: {incomplete}")
 
 
 # START SELECTED APP
@@ -60,10 +152,11 @@ if VERBOSE:
     print(f"app execution: {app}")
 
 complete = False
+errors = 0 # consecutive app errors
 while not complete:
     try:
-        with open(app) as f:
-            exec(f.read()) # execute app file
+        collect() # free boot allocations before starting app
+        run_app(app, bundle)
 
         complete = True
         if VERBOSE:
@@ -73,17 +166,23 @@ while not complete:
         if VERBOSE:
             print(f"app error: {app}: {e}")
 
-        with open(LOG_PATH, 'a') as file:
-            file.write(f"app error: {app}: {e}\n")
-        
+        log.error(log.app_id(app), log.SITE_APP, e)
+        log.flush() # write crash records now since the app may fail again before the next batch
+
         complete = False
         
-        # wait before retrying
+        # wait before retrying (backing off so a persistent failure does not loop hot)
+        delay = backoff(errors, ERROR_DELAY, MAX_ERROR_DELAY)
+        errors += 1
+
         if VERBOSE:
-            print(f"app reload: {ERROR_DELAY} seconds")
+            print(f"app reload: {delay} seconds")
         
-        time.sleep(ERROR_DELAY)
+        time.sleep(delay)
+
+if TIMING:
+    timing.dump(TIMING_TO_FILE)
+
+log.flush()
 
-with open(APP_PATH, 'w') as file:
-    data = {'previous_app': app, 'app_list': app_list, 'reload': True}
-    json.dump(data, file) # write current app to json file (reload = True since app completed)
+state.save(app_index, True, boots, 0) # write current app to launcher state (reload = True since app completed)
@@ -0,0 +1,184 @@
+# type: ignore
+
+import asyncio
+
+from led_matrix import render, timing
+from led_matrix.timing import TICKS_MASK, TICKS_PERIOD, ticks_ms
+
+
+# SIGNED DIFFERENCE a - b BETWEEN WRAPPING TICKS [ms]
+def ticks_diff(a, b):
+    return ((a - b + TICKS_PERIOD // 2) & TICKS_MASK) - TICKS_PERIOD // 2
+
+
+# FRAME CLOCK (deadlines on a fixed grid from start, so frame rate does not drift with the work done per frame)
+class FrameClock:
+    def __init__(self, period):
+        self.period_ms = max(1, int(period * 1000)) # [ms]
+        self._deadline = ticks_ms()
+
+    # start grid at current time
+    def start(self):
+        self._deadline = ticks_ms()
+
+    # sleep until next deadline, returning frames elapsed (more than 1 if late, so skipped frames are caught up)
+    async def wait(self):
+        deadline = (self._deadline + self.period_ms) & TICKS_MASK
+
+        remaining = ticks_diff(deadline, ticks_ms())
+        if remaining > 0:
+            await asyncio.sleep(remaining / 1000)
+        else:
+            await asyncio.sleep(0) # let other tasks run even when behind
+
+        frames = 1
+        late = ticks_diff(ticks_ms(), deadline)
+        if late >= self.period_ms: # skip missed deadlines instead of running them back to back
+            skipped = late // self.period_ms
+            frames += skipped
+            deadline = (deadline + skipped * self.period_ms) & TICKS_MASK
+            timing.count(timing.COUNT_FRAME_SKIP, skipped)
+
+        self._deadline = deadline
+        return frames
+
+
+# ANIMATION STEPS (advance(frames) returns True when the step is finished)
+
+# SCROLL LABEL LEFT ONE PIXEL PER FRAME, finished when it has moved its full length (repeat to scroll forever)
+class Marquee:
+    def __init__(self, label, repeat=False, char_width=6):
+        self._label = label
+        self._repeat = repeat
+        self._char_width = char_width
+
+    def reset(self):
+        pass # label keeps its position between passes (it is back at 0 once a pass finishes)
+
+    def advance(self, frames):
+        group = self._label[0]
+        group.x -= frames # move label left
+        render.invalidate()
+
+        if group.x < -1*self._char_width*len(self._label.text): # if label has moved full length, refresh to initial position
+            group.x = 0
+            return not self._repeat
+
+        return False
+
+
+# TOGGLE GROUP VISIBILITY EVERY frames FRAMES (hidden first), never finished
+class Blink:
+    def __init__(self, group, frames):
+        self._group = group
+        self._frames = frames
+        self._phase = 0
+
+    def reset(self):
+        self._phase = 0
+        render.hide(self._group, True)
+
+    def advance(self, frames):
+        self._phase += frames
+
+        hidden = (self._phase // self._frames) % 2 == 0
+        render.hide(self._group, hidden)
+
+        return False
+
+
+# WAIT frames FRAMES (at the end of a track, holds the last frame)
+class Delay:
+    def __init__(self, frames):
+        self._frames = frames
+        self._left = frames
+
+    def reset(self):
+        self._left = self._frames
+
+    def advance(self, frames):
+        self._left -= frames
+        return self._left <= 0
+
+
+# STEPS RUN ONE AFTER ANOTHER
+class Track:
+    def __init__(self, steps, background):
+        self.steps = steps
+        self.background = background # runs alongside, without holding up the end of the timeline
+        self.enabled = True
+        self._index = 0
+
+    def reset(self):
+        self._index = 0
+        for step in self.steps:
+            step.reset()
+
+    @property
+    def done(self):
+        return self._index >= len(self.steps)
+
+    def advance(self, frames):
+        if self._index < len(self.steps) and self.steps[self._index].advance(frames):
+            self._index += 1
+
+
+# TRACKS PLAYED TOGETHER ON A FRAME CLOCK, REFRESHING THE DISPLAY AFTER EACH FRAME THAT CHANGED IT
+class Timeline:
+    def __init__(self, clock):
+        self._clock = clock
+        self._tracks = []
+        self._callbacks = [] # [frames, frames left, function]
+
+    # add track of steps (background tracks run until the foreground tracks finish), returning the track
+    def add(self, *steps, background=False):
+        track = Track(list(steps), background)
+        self._tracks.append(track)
+        return track
+
+    # call function every frames frames while playing (after the frame, outside the frame memory budget)
+    def every(self, frames, function):
+        self._callbacks.append([frames, frames, function])
+
+    # play enabled tracks from the start until every enabled foreground track is finished
+    async def play(self):
+        for track in self._tracks:
+            if track.enabled:
+                track.reset()
+
+        for callback in self._callbacks:
+            callback[1] = callback[0]
+
+        self._clock.start()
+
+        while True:
+            t = timing.start()
+            frames = await self._clock.wait()
+            timing.stop(timing.SPAN_SLEEP, t)
+
+            # advance tracks
+            t = timing.start()
+            m = timing.alloc_start()
+
+            finished = True
+            for track in self._tracks:
+                if track.enabled:
+                    track.advance(frames)
+                    if not track.background and not track.done:
+                        finished = False
+
+            timing.alloc_stop(timing.BUDGET_SCROLL_PASS, m)
+            timing.stop(timing.SPAN_SCROLL, t)
+
+            if finished:
+                render.refresh()
+                return
+
+            # call callbacks that are due
+            for callback in self._callbacks:
+                callback[1] -= frames
+                if callback[1] <= 0:
+                    callback[1] = callback[0]
+                    callback[2]()
+
+            render.refresh()
@@ -0,0 +1,177 @@
+# type: ignore
+
+# Album art cache: display-ready bitmaps (16-bit values, e.g. RGB565) keyed by a short hash of their image URL, least
+# recently used evicted first. A small RAM tier is copied into a display bitmap natively; a fixed-size flash file
+# keeps more entries across restarts. Only new entries are written to flash (hits reorder the tiers in RAM only), and
+# each flash slot carries a crc32 of its pixels, so a torn write reads back as a miss.
+#
+# file: slots of header (key, sequence number, crc32 of pixels) and pixels (little-endian 16-bit values, row-major)
+
+import struct
+from array import array
+from binascii import crc32
+
+from led_matrix import timing
+
+try:
+    from bitmaptools import arrayblit
+except ImportError: # host (e.g. emulator)
+    arrayblit = None
+
+
+# PARAMETERS
+HEADER_FORMAT = '<III' # key, sequence number (0 for an empty slot), crc32 of pixels
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+
+# KEY FOR URL (crc32, so 4 bytes per entry however long the URL)
+def key(url):
+    return crc32(url.encode())
+
+
+# ALBUM ART CACHE (get and put copy pixels between a display bitmap of width x height and the cache)
+class ArtCache:
+    def __init__(self, path, width, height, ram_entries, flash_entries):
+        self._path = path
+        self._pixels = width * height
+        self._slot_size = HEADER_SIZE + 2 * self._pixels
+
+        # RAM tier (preallocated, so caching does not fragment the heap)
+        self._ram = [array('H', [0] * self._pixels) for _ in range(ram_entries)]
+        self._ram_keys = [None] * ram_entries
+        self._ram_order = list(range(ram_entries)) # slots, least recently used first
+
+        # flash tier (keys and order read from slot headers, oldest write first until used)
+        self._flash_entries = flash_entries
+        self._flash_keys = [None] * flash_entries
+        self._flash_order = list(range(flash_entries))
+        self._sequence = 0 # newest flash write
+
+        try:
+            self._load()
+        except OSError:
+            self._flash_entries = 0 # filesystem not readable, RAM tier only
+
+    def _load(self):
+        try:
+            file = open(self._path, 'rb')
+        except OSError:
+            return # created on first write
+
+        sequences = [0] * self._flash_entries
+        header = bytearray(HEADER_SIZE)
+
+        with file:
+            for slot in range(self._flash_entries):
+                file.seek(slot * self._slot_size)
+                if file.readinto(header) < HEADER_SIZE:
+                    break
+
+                k, sequence, _ = struct.unpack(HEADER_FORMAT, header)
+                if sequence:
+                    self._flash_keys[slot] = k
+                    sequences[slot] = sequence
+
+        self._flash_order.sort(key=lambda slot: sequences[slot])
+        self._sequence = max(sequences) if sequences else 0
+
+    # COPY CACHED ART FOR URL INTO bitmap, returning True on a hit
+    def get(self, url, bitmap):
+        k = key(url)
+
+        if k in self._ram_keys:
+            slot = self._ram_keys.index(k)
+            self._use(self._ram_order, slot)
+            self._show(self._ram[slot], bitmap)
+
+            timing.count(timing.COUNT_ART_HIT_RAM)
+            return True
+
+        if k in self._flash_keys:
+            slot = self._flash_keys.index(k)
+            data = self._ram[self._ram_order[0]] # least recently used RAM entry (overwritten by the read)
+
+            if self._read(slot, data):
+                self._use(self._flash_order, slot)
+                self._put_ram(k, data)
+                self._show(data, bitmap)
+
+                timing.count(timing.COUNT_ART_HIT_FLASH)
+                return True
+
+            self._flash_keys[slot] = None # torn or overwritten slot
+            self._ram_keys[self._ram_order[0]] = None
+
+        timing.count(timing.COUNT_ART_MISS)
+        return False
+
+    # ADD ART FOR URL FROM bitmap (RAM, and flash replacing its least recently used entry)
+    def put(self, url, bitmap):
+        k = key(url)
+
+        data = self._ram[self._ram_order[0]]
+        for i in range(self._pixels):
+            data[i] = bitmap[i]
+        self._put_ram(k, data)
+
+        if self._flash_entries and k not in self._flash_keys:
+            try:
+                self._write(self._flash_order[0], k, data)
+            except OSError:
+                pass # filesystem not writable, entry stays in RAM only
+
+    # MOVE SLOT TO MOST RECENTLY USED
+    @staticmethod
+    def _use(order, slot):
+        order.remove(slot)
+        order.append(slot)
+
+    # STORE DATA (the least recently used RAM slot's buffer) UNDER KEY
+    def _put_ram(self, k, data):
+        slot = self._ram_order[0]
+        self._ram_keys[slot] = k
+        self._use(self._ram_order, slot)
+
+    def _show(self, data, bitmap):
+        if arrayblit is not None:
+            arrayblit(bitmap, data) # native copy on device
+        else:
+            for i in range(self._pixels):
+                bitmap[i] = data[i]
+
+    # READ FLASH SLOT PIXELS INTO data, returning True if intact
+    def _read(self, slot, data):
+        try:
+            with open(self._path, 'rb') as file:
+                file.seek(slot * self._slot_size)
+                header = file.read(HEADER_SIZE)
+                file.readinto(data)
+        except OSError:
+            return False
+
+        if len(header) < HEADER_SIZE:
+            return False
+
+        k, sequence, checksum = struct.unpack(HEADER_FORMAT, header)
+        return sequence != 0 and k == self._flash_keys[slot] and checksum == crc32(data)
+
+    # WRITE ENTRY TO FLASH SLOT (file created at fixed size on first write)
+    def _write(self, slot, k, data):
+        try:
+            file = open(self._path, 'r+b')
+        except OSError:
+            file = open(self._path, 'w+b')
+            empty = bytes(self._slot_size)
+            for _ in range(self._flash_entries):
+                file.write(empty)
+
+        self._sequence += 1
+        self._flash_keys[slot] = None # until written
+
+        with file:
+            file.seek(slot * self._slot_size)
+            file.write(struct.pack(HEADER_FORMAT, k, self._sequence, crc32(data)))
+            file.write(data)
+
+        self._flash_keys[slot] = k
+        self._use(self._flash_order, slot)
@@ -0,0 +1,29 @@
+# type: ignore
+
+import time
+
+
+# PER-KEY FETCH CACHE (e.g. per URL), so every consumer of the same resource shares one fetch per TTL
+class Cache:
+    def __init__(self):
+        self._entries = {} # key: [fetch time, ttl, value]
+
+    # GET VALUE, CALLING fetch(key) IF MISSING OR EXPIRED (fetch returns None on failure, in which case an expired
+    # value up to max_stale seconds past its ttl is returned instead)
+    async def get(self, key, ttl, fetch, max_stale=0):
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry is not None and now - entry[0] < entry[1]:
+            return entry[2] # fresh
+
+        value = await fetch(key)
+
+        if value is not None:
+            self._entries[key] = [time.monotonic(), ttl, value]
+            return value
+
+        if entry is not None and now - entry[0] < entry[1] + max_stale:
+            return entry[2] # stale, but better than nothing while the upstream is failing
+
+        return None
@@ -0,0 +1,150 @@
+# type: ignore
+
+import time
+
+
+# PARAMETERS
+MAX_SYNC_AGE = 6 * 3600 # time since last sync before the clock is treated as unsynced [seconds]
+MIN_DRIFT_BASELINE = 1800 # time between syncs before drift is estimated (Date headers have 1 s resolution) [seconds]
+MAX_DRIFT = 0.001 # largest drift accepted from an estimate (1000 ppm) [fraction]
+DRIFT_WEIGHT = 0.25 # weight of a new drift estimate in the running estimate
+
+MONTHS = (b'Jan', b'Feb', b'Mar', b'Apr', b'May', b'Jun', b'Jul', b'Aug', b'Sep', b'Oct', b'Nov', b'Dec')
+
+
+# STATE (times kept as integers, since device floats cannot hold a unix timestamp to the second)
+_sync_utc = None # utc time at last sync [seconds]
+_sync_ns = 0 # monotonic time at which utc was _sync_utc [nanoseconds]
+_drift = 0.0 # local clock rate error (positive if monotonic runs fast) [fraction]
+_baseline_utc = None # utc time at start of drift baseline [seconds]
+_baseline_ns = 0 # monotonic time at start of drift baseline [nanoseconds]
+_expired = False # treated as unsynced until next sync
+
+
+# CONVERT UTC DATE AND TIME TO UNIX TIMESTAMP (days from civil, proleptic gregorian)
+def timestamp(year, month, day, hour=0, minute=0, second=0):
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+
+# PARSE HTTP DATE HEADER (IMF-fixdate, e.g. "Sun, 06 Nov 1994 08:49:37 GMT") TO UNIX TIMESTAMP
+def parse_http_date(value):
+    if isinstance(value, str):
+        value = value.encode()
+
+    parts = value.split()
+    if len(parts) != 6 or parts[5] != b'GMT':
+        return None
+
+    try:
+        month = MONTHS.index(parts[2]) + 1
+        hour, minute, second = parts[4].split(b':')
+        return timestamp(int(parts[3]), month, int(parts[1]), int(hour), int(minute), int(second))
+    except (ValueError, IndexError):
+        return None
+
+
+# SYNC CLOCK TO UTC TIME OBSERVED NOW (utc truncated to whole seconds)
+def sync(utc):
+    global _sync_utc, _sync_ns, _drift, _baseline_utc, _baseline_ns, _expired
+
+    now_ns = time.monotonic_ns() - 500000000 # truncated time is on average half a second behind
+
+    if _baseline_utc is None:
+        _baseline_utc = utc
+        _baseline_ns = now_ns
+
+    # estimate drift once the baseline is long enough for the resolution, then start a new baseline
+    elapsed = (now_ns - _baseline_ns) // 1000000 / 1000
+    if elapsed >= MIN_DRIFT_BASELINE and utc > _baseline_utc:
+        estimate = elapsed / (utc - _baseline_utc) - 1
+        if -MAX_DRIFT <= estimate <= MAX_DRIFT:
+            _drift += DRIFT_WEIGHT * (estimate - _drift)
+
+        _baseline_utc = utc
+        _baseline_ns = now_ns
+
+    _sync_utc = utc
+    _sync_ns = now_ns
+    _expired = False
+
+
+# SYNC CLOCK FROM RESPONSE DATE HEADER, returning True if synced
+def sync_response(response):
+    value = response.headers.get('date')
+    if not value:
+        return False
+
+    utc = parse_http_date(value)
+    if utc is None:
+        return False
+
+    sync(utc)
+    return True
+
+
+# TREAT CLOCK AS UNSYNCED UNTIL NEXT SYNC (time still kept, e.g. after sleeping with the radio off)
+def expire():
+    global _expired
+    _expired = True
+
+
+# CHECK CLOCK HAS A RECENT SYNC
+def synced():
+    return _sync_utc is not None and not _expired and (time.monotonic_ns() - _sync_ns) // 1000000000 < MAX_SYNC_AGE
+
+
+# CURRENT UTC TIME (None before first sync) [seconds]
+def now():
+    if _sync_utc is None:
+        return None
+
+    elapsed = (time.monotonic_ns() - _sync_ns) // 1000000 / 1000 # small enough for a float [seconds]
+    return _sync_utc + int(elapsed / (1 + _drift))
+
+
+# CURRENT UTC HOUR (None before first sync) [hour]
+def hour():
+    current_time = now()
+    if current_time is None:
+        return None
+
+    return current_time // 3600 % 24
+
+
+# SECONDS FROM current_time UNTIL NEXT hour:00 UTC (a full day if current_time is on the hour) [seconds]
+def until_hour(hour, current_time):
+    return (hour * 3600 - current_time) % 86400 or 86400
+
+
+# UTC OFFSET AT utc FOR A ZONE WITH standard_offset, with US daylight saving time (second Sunday in March to first
+# Sunday in November, at 2:00 local time) if dst [seconds]
+def utc_offset(utc, standard_offset, dst=True):
+    if not dst:
+        return standard_offset
+
+    local = utc + standard_offset
+    year = 1970 + local // 31556952 # mean gregorian year, corrected below
+    if local < timestamp(year, 1, 1):
+        year -= 1
+    elif local >= timestamp(year + 1, 1, 1):
+        year += 1
+
+    start = _sunday(year, 3, 2) + 2 * 3600 # in local standard time
+    end = _sunday(year, 11, 1) + 1 * 3600 # 2:00 daylight time is 1:00 standard time
+
+    return standard_offset + 3600 if start <= local < end else standard_offset
+
+
+# nth SUNDAY OF MONTH [unix seconds at midnight]
+def _sunday(year, month, n):
+    first = timestamp(year, month, 1) // 86400
+    weekday = (first + 3) % 7 # 1970-01-01 was a Thursday (Monday is 0)
+    return (first + (6 - weekday) % 7 + 7 * (n - 1)) * 86400
@@ -0,0 +1,289 @@
+# type: ignore
+
+# Streaming GTFS-realtime decoder: feed a FeedMessage in chunks and get back the stop times at the requested stops,
+# or the routes with active alerts. Each FeedEntity is buffered and decoded on its own, so memory per feed is bounded
+# by the largest entity, and trips on other routes are skipped without decoding their stop time updates. Only the
+# protobuf wire format is used (no generated classes), for the TripUpdate and Alert subsets in gtfs-realtime.proto.
+
+# WIRE TYPES
+VARINT = 0
+FIXED64 = 1
+LENGTH = 2
+FIXED32 = 5
+
+# FIELD NUMBERS
+FEED_ENTITY = 2 # FeedMessage.entity
+ENTITY_TRIP_UPDATE = 3 # FeedEntity.trip_update
+ENTITY_ALERT = 5 # FeedEntity.alert
+TRIP_UPDATE_TRIP = 1 # TripUpdate.trip
+TRIP_UPDATE_STOP_TIME_UPDATE = 2 # TripUpdate.stop_time_update
+TRIP_ROUTE_ID = 5 # TripDescriptor.route_id
+STOP_TIME_ARRIVAL = 2 # StopTimeUpdate.arrival
+STOP_TIME_DEPARTURE = 3 # StopTimeUpdate.departure
+STOP_TIME_STOP_ID = 4 # StopTimeUpdate.stop_id
+EVENT_TIME = 2 # StopTimeEvent.time
+ALERT_ACTIVE_PERIOD = 1 # Alert.active_period
+ALERT_INFORMED_ENTITY = 5 # Alert.informed_entity
+PERIOD_START = 1 # TimeRange.start
+PERIOD_END = 2 # TimeRange.end
+SELECTOR_ROUTE_ID = 2 # EntitySelector.route_id
+
+
+# READ VARINT AT i, returning value and next index (IndexError if data ends first)
+def varint(data, i):
+    value = 0
+    shift = 0
+
+    while True:
+        b = data[i]
+        i += 1
+        value |= (b & 0x7F) << shift
+        if b < 0x80:
+            return value, i
+        shift += 7
+
+
+# READ FIELD AT i, returning field number, wire type, value (start index for LENGTH) and index after the field
+def field(data, i):
+    key, i = varint(data, i)
+    wire_type = key & 0x07
+
+    if wire_type == VARINT:
+        value, i = varint(data, i)
+        return key >> 3, wire_type, value, i
+
+    if wire_type == LENGTH:
+        length, i = varint(data, i)
+        return key >> 3, wire_type, i, i + length
+
+    if wire_type == FIXED64:
+        return key >> 3, wire_type, i, i + 8
+
+    if wire_type == FIXED32:
+        return key >> 3, wire_type, i, i + 4
+
+    raise ValueError("unsupported protobuf wire type")
+
+
+# ENCODE IDS FOR COMPARISON WITH DECODED FIELDS
+def _encode(ids):
+    return [i.encode() if isinstance(i, str) else i for i in ids]
+
+
+# SPLIT FEED MESSAGE INTO ENTITIES (subclasses decode each complete entity in _entity)
+class _Feed:
+    def __init__(self):
+        self._chunks = [] # unparsed data carried to the next chunk
+        self._size = 0 # bytes in chunks
+        self._needed = 0 # bytes needed before the buffered field is complete
+
+        self.count = 0 # items found
+        self.done = False # set when no more items are wanted
+
+    def _entity(self, data, i, end):
+        pass
+
+    # PARSE CHUNK
+    def feed(self, chunk):
+        if self.done:
+            return True
+
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+
+        if self._size < self._needed:
+            return False # buffered field continues in next chunk
+
+        data = self._chunks[0] if len(self._chunks) == 1 else b''.join(self._chunks)
+        self._chunks = []
+        self._size = 0
+        self._needed = 0
+
+        i = 0
+        end = len(data)
+
+        while i < end and not self.done:
+            try:
+                number, wire_type, value, j = field(data, i)
+            except IndexError:
+                break # field header continues in next chunk
+
+            if j > end:
+                self._needed = j - i # field continues in next chunks (joined once complete)
+                break
+
+            if number == FEED_ENTITY and wire_type == LENGTH:
+                self._entity(data, value, j)
+
+            i = j
+
+        if i < end and not self.done:
+            rest = data[i:] # keep incomplete field
+            self._chunks.append(rest)
+            self._size = len(rest)
+
+        return self.done
+
+
+# EXTRACT STOP TIMES AT STOPS FROM TRIP UPDATES
+class FeedItems(_Feed):
+    # stops: stop IDs to report, routes: route IDs to include (empty for all), on_item: called with
+    # (route ID, stop ID, time, last stop ID of trip) for each stop time at stops, returns True to stop
+    def __init__(self, stops, routes, on_item):
+        super().__init__()
+
+        self._stops = _encode(stops)
+        self._routes = _encode(routes)
+        self._on_item = on_item
+
+    # route ID of trip descriptor, or None
+    def _route(self, data, i, end):
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if number == TRIP_ROUTE_ID and wire_type == LENGTH:
+                return data[value:i]
+
+        return None
+
+    # time of stop time event, or None
+    def _time(self, data, i, end):
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if number == EVENT_TIME and wire_type == VARINT:
+                return value
+
+        return None
+
+    # stop ID and time (departure, or arrival at the last stop) of stop time update
+    def _stop_time_update(self, data, i, end):
+        stop = None
+        arrival_time = None
+        departure_time = None
+
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if wire_type != LENGTH:
+                continue
+
+            if number == STOP_TIME_STOP_ID:
+                stop = data[value:i]
+            elif number == STOP_TIME_DEPARTURE:
+                departure_time = self._time(data, value, i)
+            elif number == STOP_TIME_ARRIVAL:
+                arrival_time = self._time(data, value, i)
+
+        return stop, departure_time if departure_time is not None else arrival_time
+
+    def _trip_update(self, data, i, end):
+        # find route first, so trips on other routes are skipped before their stop time updates
+        route = None
+        j = i
+        while j < end:
+            number, wire_type, value, j = field(data, j)
+            if number == TRIP_UPDATE_TRIP and wire_type == LENGTH:
+                route = self._route(data, value, j)
+                break
+
+        if route is None or (self._routes and route not in self._routes):
+            return
+
+        matches = []
+        last_stop = None
+
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if number != TRIP_UPDATE_STOP_TIME_UPDATE or wire_type != LENGTH:
+                continue
+
+            stop, time = self._stop_time_update(data, value, i)
+            if stop is None:
+                continue
+
+            last_stop = stop
+            if time is not None and stop in self._stops:
+                matches.append((stop, time))
+
+        if not matches:
+            return
+
+        route = route.decode('utf-8')
+        last_stop = last_stop.decode('utf-8')
+
+        for stop, time in matches:
+            self.count += 1
+            if self._on_item((route, stop.decode('utf-8'), time, last_stop)):
+                self.done = True
+                return
+
+    def _entity(self, data, i, end):
+        while i < end and not self.done:
+            number, wire_type, value, i = field(data, i)
+            if number == ENTITY_TRIP_UPDATE and wire_type == LENGTH:
+                self._trip_update(data, value, i)
+
+
+# FIND ROUTES WITH ALERTS ACTIVE AT A TIME
+class FeedAlerts(_Feed):
+    # routes: route IDs to check, current_time: time alerts must be active at (None for any) [unix seconds]
+    def __init__(self, routes, current_time=None):
+        super().__init__()
+
+        self._routes = []
+        for route in _encode(routes):
+            if route not in self._routes:
+                self._routes.append(route)
+
+        self._current_time = current_time
+
+        self.routes = [] # route IDs with active alerts
+
+    # check time range contains current time (open ends are unbounded)
+    def _active(self, data, i, end):
+        start_time = 0
+        end_time = 0
+
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if number == PERIOD_START and wire_type == VARINT:
+                start_time = value
+            elif number == PERIOD_END and wire_type == VARINT:
+                end_time = value
+
+        return start_time <= self._current_time and (not end_time or self._current_time < end_time)
+
+    def _alert(self, data, i, end):
+        active = None # no active periods means always active
+        routes = []
+
+        while i < end:
+            number, wire_type, value, i = field(data, i)
+            if wire_type != LENGTH:
+                continue
+
+            if number == ALERT_ACTIVE_PERIOD and self._current_time is not None and not active:
+                active = self._active(data, value, i)
+            elif number == ALERT_INFORMED_ENTITY:
+                j = value
+                while j < i:
+                    selector_number, selector_wire_type, selector_value, j = field(data, j)
+                    if selector_number == SELECTOR_ROUTE_ID and selector_wire_type == LENGTH:
+                        routes.append(data[selector_value:j])
+
+        if active is False:
+            return
+
+        for route in routes:
+            if route in self._routes:
+                route = route.decode('utf-8')
+                if route not in self.routes:
+                    self.routes.append(route)
+                    self.count += 1
+
+        if len(self.routes) == len(self._routes):
+            self.done = True # every route has an alert
+
+    def _entity(self, data, i, end):
+        while i < end and not self.done:
+            number, wire_type, value, i = field(data, i)
+            if number == ENTITY_ALERT and wire_type == LENGTH:
+                self._alert(data, value, i)
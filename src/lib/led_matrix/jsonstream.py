@@ -0,0 +1,245 @@
+# type: ignore
+
+# Streaming JSON field extraction: feed a document in chunks and get back only the requested fields of each item,
+# where an item is each element of the array at a path (or the value at the path if it is not an array). Nothing
+# outside the requested fields is decoded, so memory per document is bounded by the longest single token.
+
+# PARAMETERS
+ANY = '*' # path key matching any array element
+
+_WHITESPACE = bytearray(256) # lookup tables indexed by byte (faster than membership tests on device)
+_DELIMITER = bytearray(256) # characters ending a number or literal
+for _c in b' \t\r\n':
+    _WHITESPACE[_c] = 1
+for _c in b' \t\r\n,]}':
+    _DELIMITER[_c] = 1
+
+_ESCAPES = {ord('"'): '"', ord('\\'): '\\', ord('/'): '/', ord('b'): '\b', ord('f'): '\f', ord('n'): '\n', ord('r'): '\r', ord('t'): '\t'}
+
+
+# DECODE JSON STRING CONTENTS
+def unescape(raw):
+    if b'\\' not in raw:
+        return raw.decode('utf-8')
+
+    parts = []
+    i = 0
+    while True:
+        j = raw.find(b'\\', i)
+        if j < 0:
+            parts.append(raw[i:].decode('utf-8'))
+            break
+
+        parts.append(raw[i:j].decode('utf-8'))
+        c = raw[j + 1]
+
+        if c == ord('u'):
+            code = int(raw[j + 2:j + 6], 16)
+            i = j + 6
+
+            if 0xD800 <= code < 0xDC00 and raw[i:i + 2] == b'\\u': # surrogate pair
+                low = int(raw[i + 2:i + 6], 16)
+                code = 0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)
+                i += 6
+
+            parts.append(chr(code))
+        else:
+            parts.append(_ESCAPES.get(c, chr(c)))
+            i = j + 2
+
+    return ''.join(parts)
+
+
+# DECODE JSON NUMBER OR LITERAL
+def literal(raw):
+    if raw == b'true':
+        return True
+    if raw == b'false':
+        return False
+    if raw == b'null':
+        return None
+
+    if b'.' in raw or b'e' in raw or b'E' in raw:
+        return float(raw)
+
+    return int(raw)
+
+
+# EXTRACT FIELDS OF EACH ITEM AT A PATH
+class JsonItems:
+    # path: keys to the item array (or object), fields: key paths within each item (ANY collects a list),
+    # on_item: called with the field values of each item, returns True to stop
+    def __init__(self, path, fields, on_item):
+        self._path = [key.encode() for key in path]
+        self._fields = [[key if key == ANY else key.encode() for key in field] for field in fields]
+        self._lists = [ANY in field for field in fields]
+        self._on_item = on_item
+
+        self._base = len(self._path)
+        self._keys = [] # key of the current value in each open container (ANY in arrays)
+        self._arrays = [] # whether each open container is an array
+        self._matched = 0 # leading open containers whose keys match path
+        self._expect_key = False
+
+        self._item_level = -1 # depth of items once the value at path is found
+        self._item = None # field values of the current item
+        self._pending = b'' # incomplete token carried to the next chunk
+
+        self.count = 0 # items passed to on_item
+        self.done = False # set when on_item asks to stop or the items end
+
+    # depth of the next value, and whether it sits at path
+    def _value_start(self, container):
+        level = len(self._keys)
+
+        if self._matched == self._base and self._item_level < 0 and level == self._base:
+            self._item_level = level + 1 if container == ord('[') else level # items are elements, or the value itself
+
+        if level == self._item_level and self._matched == self._base and self._item is None:
+            self._item = [[] if is_list else None for is_list in self._lists]
+
+        return level
+
+    def _value_end(self, level):
+        if self._item is not None and level == self._item_level:
+            item = self._item
+            self._item = None
+            self.count += 1
+
+            if self._on_item(item):
+                self.done = True
+
+        elif level == self._base and self._matched == self._base and self._item_level == level + 1:
+            self.done = True # item array closed
+
+    def _set_key(self, key):
+        level = len(self._keys) - 1
+        self._keys[level] = key
+
+        if self._matched > level:
+            self._matched = level
+        if self._matched == level and level < self._base and key == self._path[level]:
+            self._matched = level + 1
+
+    def _push(self, is_array):
+        self._keys.append(ANY if is_array else None)
+        self._arrays.append(is_array)
+        self._expect_key = not is_array
+
+    def _pop(self):
+        self._keys.pop()
+        self._arrays.pop()
+
+        level = len(self._keys)
+        if self._matched > level:
+            self._matched = level
+
+        self._expect_key = False
+        return level
+
+    # index of field matching the current scalar value, or -1
+    def _field(self):
+        if self._item is None:
+            return -1
+
+        keys = self._keys
+        start = self._item_level
+        length = len(keys) - start
+
+        for index, field in enumerate(self._fields):
+            if len(field) != length:
+                continue
+
+            for i in range(length):
+                if field[i] != keys[start + i]:
+                    break
+            else:
+                return index
+
+        return -1
+
+    def _scalar(self, index, value, level):
+        if self._lists[index]:
+            self._item[index].append(value)
+        else:
+            self._item[index] = value
+
+        self._value_end(level)
+
+    # PARSE CHUNK
+    def feed(self, chunk):
+        data = self._pending + chunk if self._pending else chunk
+        self._pending = b''
+
+        i = 0
+        end = len(data)
+
+        while i < end and not self.done:
+            c = data[i]
+
+            if _WHITESPACE[c]:
+                i += 1
+
+            elif c == ord('"'):
+                j = data.find(b'"', i + 1)
+                while j > 0 and data[j - 1] == ord('\\'): # skip escaped quotes (count backslashes to allow "\\")
+                    k = j - 1
+                    while data[k - 1] == ord('\\'):
+                        k -= 1
+                    if (j - k) % 2 == 0:
+                        break
+                    j = data.find(b'"', j + 1)
+
+                if j < 0:
+                    break # string continues in next chunk
+
+                if self._expect_key:
+                    self._set_key(data[i + 1:j])
+                else:
+                    level = self._value_start(c)
+                    index = self._field()
+                    if index >= 0:
+                        self._scalar(index, unescape(data[i + 1:j]), level)
+                    else:
+                        self._value_end(level) # skipped without decoding
+
+                i = j + 1
+
+            elif c == ord(':'):
+                self._expect_key = False
+                i += 1
+
+            elif c == ord(','):
+                self._expect_key = bool(self._arrays) and not self._arrays[-1]
+                i += 1
+
+            elif c == ord('{') or c == ord('['):
+                self._value_start(c)
+                self._push(c == ord('['))
+                i += 1
+
+            elif c == ord('}') or c == ord(']'):
+                self._value_end(self._pop())
+                i += 1
+
+            else: # number or literal
+                j = i + 1
+                while j < end and not _DELIMITER[data[j]]:
+                    j += 1
+
+                if j == end:
+                    break # token may continue in next chunk
+
+                level = self._value_start(c)
+                index = self._field()
+                if index >= 0:
+                    self._scalar(index, literal(data[i:j]), level)
+                else:
+                    self._value_end(level)
+
+                i = j
+
+        if i < end and not self.done:
+            self._pending = data[i:] # keep incomplete token
+
+        return self.done
@@ -0,0 +1,205 @@
+# type: ignore
+
+import time
+import struct
+
+from led_matrix import clock
+
+
+# PARAMETERS
+LOG_PATH = "/code_log.bin" # circular log file path
+
+RING_SIZE = 16 # records held in RAM before the oldest unflushed record is dropped [records]
+FILE_SIZE = 128 # records held in the circular log file [records]
+FLUSH_COUNT = 8 # flush to file once this many records are pending [records]
+FLUSH_INTERVAL = 300 # flush pending records older than this on the next error [seconds]
+
+MAGIC = b'LEDL' # log file magic
+VERSION = 1 # log file format version
+
+HEADER_FORMAT = '<4sBBHII' # magic, version, record size, capacity, next sequence number, dropped records
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+RECORD_FORMAT = '<IIBBh28s' # sequence number (0 = empty), utc timestamp (0 before the clock synced), app id, site id, error code, message
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+MESSAGE_SIZE = 28 # bytes of message kept per record [bytes]
+
+# app ids
+APP_LAUNCHER = 0
+APP_SUBWAY = 1
+APP_SPOTIFY = 2
+
+APP_IDS = {
+    'code.py': APP_LAUNCHER,
+    'app/subway/app.py': APP_SUBWAY,
+    'app/spotify/app.py': APP_SPOTIFY,
+}
+
+# site ids
+SITE_APP = 0 # uncaught app error (code.py)
+SITE_GET_TIME = 1
+SITE_GET_TRAIN = 2
+SITE_UPDATE_TOKENS = 3
+SITE_GET_CURRENTLY_PLAYING = 4
+SITE_GET_IMAGE = 5
+
+SITE_NAMES = ['app', 'get_time', 'get_train', 'update_tokens', 'get_currently_playing', 'get_image']
+
+# error codes for non-OSError exceptions (OSError uses its errno)
+ERROR_TYPES = (MemoryError, KeyError, IndexError, ValueError, TypeError, AttributeError, NameError, RuntimeError, StopIteration)
+ERROR_TYPE_BASE = 1000 # code of first entry in ERROR_TYPES
+ERROR_UNKNOWN = 999 # code for any other exception
+
+
+# RING BUFFER STATE
+_ring = bytearray(RING_SIZE * RECORD_SIZE) # preallocated so logging does not allocate per record
+_head = 0 # index of oldest pending record
+_count = 0 # pending records
+_dropped = 0 # records overwritten before flush
+_oldest = None # monotonic time of oldest pending record [seconds]
+
+
+# GET APP ID FROM APP PATH
+def app_id(path):
+    return APP_IDS.get(path.lstrip('/'), 255)
+
+
+# GET ERROR CODE FROM EXCEPTION
+def error_code(e):
+    if isinstance(e, OSError) and e.args and isinstance(e.args[0], int):
+        return max(-32768, min(32767, e.args[0])) # errno (negative for getaddrinfo errors)
+
+    for i, error_type in enumerate(ERROR_TYPES):
+        if isinstance(e, error_type):
+            return ERROR_TYPE_BASE + i
+
+    return ERROR_UNKNOWN
+
+
+# RECORD ERROR IN RING BUFFER
+def error(app, site, e, code=None):
+    global _head, _count, _dropped, _oldest
+
+    if code is None:
+        code = error_code(e)
+
+    if isinstance(e, OSError) and len(e.args) > 1:
+        message = str(e.args[1]) # errno is already stored as the error code
+    else:
+        message = str(e)
+    message = message.encode('utf-8')[:MESSAGE_SIZE]
+
+    if _count == RING_SIZE: # ring full, drop oldest pending record
+        _head = (_head + 1) % RING_SIZE
+        _count -= 1
+        _dropped += 1
+
+    index = (_head + _count) % RING_SIZE
+    struct.pack_into(RECORD_FORMAT, _ring, index * RECORD_SIZE, 0, clock.now() or 0, app, site, code, message)
+    _count += 1
+
+    now = time.monotonic()
+    if _oldest is None:
+        _oldest = now
+
+    if _count >= FLUSH_COUNT or now - _oldest >= FLUSH_INTERVAL:
+        flush()
+
+
+# WRITE PENDING RECORDS TO CIRCULAR LOG FILE
+def _open_file():
+    try:
+        file = open(LOG_PATH, 'r+b')
+        header = file.read(HEADER_SIZE)
+
+        if len(header) == HEADER_SIZE:
+            magic, version, record_size, capacity, sequence, dropped = struct.unpack(HEADER_FORMAT, header)
+            if magic == MAGIC and version == VERSION and record_size == RECORD_SIZE and capacity == FILE_SIZE:
+                return file, sequence, dropped
+
+        file.close()
+    except OSError:
+        pass
+
+    # create (or recreate) log file at fixed size
+    file = open(LOG_PATH, 'w+b')
+    file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_SIZE, FILE_SIZE, 1, 0))
+    empty = bytes(RECORD_SIZE)
+    for _ in range(FILE_SIZE):
+        file.write(empty)
+
+    return file, 1, 0
+
+
+def flush():
+    global _head, _count, _dropped, _oldest
+
+    if _count == 0:
+        return
+
+    try:
+        file, sequence, dropped = _open_file()
+
+        try:
+            view = memoryview(_ring)
+            while _count:
+                offset = _head * RECORD_SIZE
+                struct.pack_into('<I', _ring, offset, sequence) # assign sequence number on flush
+
+                file.seek(HEADER_SIZE + ((sequence - 1) % FILE_SIZE) * RECORD_SIZE)
+                file.write(view[offset:offset + RECORD_SIZE])
+
+                sequence += 1
+                _head = (_head + 1) % RING_SIZE
+                _count -= 1
+
+            file.seek(0)
+            file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, RECORD_SIZE, FILE_SIZE, sequence, dropped + _dropped)) # commit header last
+        finally:
+            file.close()
+
+        _oldest = None
+        _dropped = 0
+
+    except OSError:
+        pass # keep pending records in RAM if the filesystem is not writable
+
+
+# DECODE LOG FILE CONTENTS (host side), returning records in order and the dropped record count
+def decode(data):
+    magic, version, record_size, capacity, sequence, dropped = struct.unpack_from(HEADER_FORMAT, data, 0)
+
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        raise ValueError("not a log file or unsupported version")
+
+    records = []
+    for i in range(capacity):
+        offset = HEADER_SIZE + i * RECORD_SIZE
+        if offset + RECORD_SIZE > len(data):
+            break
+
+        number, timestamp, app, site, code, message = struct.unpack_from(RECORD_FORMAT, data, offset)
+        if number:
+            records.append((number, timestamp, app, site, code, message.rstrip(b'\x00').decode('utf-8', 'replace')))
+
+    records.sort()
+    return records, dropped
+
+
+def app_name(app):
+    for path, i in APP_IDS.items():
+        if i == app:
+            return path
+    return f"app {app}"
+
+
+def site_name(site):
+    return SITE_NAMES[site] if site < len(SITE_NAMES) else f"site {site}"
+
+
+def error_name(code):
+    if ERROR_TYPE_BASE <= code < ERROR_TYPE_BASE + len(ERROR_TYPES):
+        return ERROR_TYPES[code - ERROR_TYPE_BASE].__name__
+    if code == ERROR_UNKNOWN:
+        return "Exception"
+    return f"OSError {code}"
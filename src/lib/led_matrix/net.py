@@ -0,0 +1,76 @@
+# type: ignore
+
+# Shared HTTP session: one socket pool, SSL context and session for the life of the interpreter, so keep-alive
+# connections outlive an app run that the launcher retries. Idle connections are kept up to MAX_IDLE_CONNECTIONS
+# (least recently used closed first), since each TLS connection holds its buffers while open. CircuitPython's ssl
+# module does not expose TLS session resumption, so reusing a connection is the only way to skip a handshake.
+
+from adafruit_connection_manager import connection_manager_close_all, get_radio_socketpool, get_radio_ssl_context
+from adafruit_requests import Session
+
+from led_matrix import timing
+
+
+# PARAMETERS
+MAX_IDLE_CONNECTIONS = 2 # connections kept open between requests (about 20 KB of TLS buffers each) [connections]
+
+
+# STATE
+_pool = None
+_session = None
+_recent = [] # connections used by the session, least recently used first
+
+
+# GET SHARED SESSION (created on first use, connections left mid-response by a failed app run are closed)
+def session(radio):
+    global _pool, _session
+
+    if _session is None:
+        _pool = get_radio_socketpool(radio)
+        _session = Session(_pool, get_radio_ssl_context(radio))
+    else:
+        _close_busy()
+
+    return _session
+
+
+# CLOSE CONNECTIONS NOT RETURNED TO THE POOL (a response was never closed, so the connection cannot be reused)
+def _close_busy():
+    manager = _session._connection_manager
+    _session._last_response = None # would free the socket again when the next request is made
+
+    for socket in list(manager._managed_socket_by_key.values()):
+        if socket not in manager._available_sockets:
+            manager.close_socket(socket)
+
+
+# RECORD CONNECTION USED BY RESPONSE AND CLOSE IDLE CONNECTIONS OVER THE LIMIT, returning True if it was reused
+def track(response):
+    socket = response.socket
+    session = response._session
+    if socket is None or session is None:
+        return False
+
+    manager = session._connection_manager
+    reused = socket in _recent
+
+    # drop connections closed since last used (abandoned responses, or stale connections replaced by the session)
+    _recent[:] = [s for s in _recent if s is not socket and s in manager._key_by_managed_socket]
+
+    while len(_recent) >= MAX_IDLE_CONNECTIONS:
+        oldest = _recent.pop(0)
+        if oldest in manager._available_sockets: # idle (requests are made one at a time, so all others are)
+            manager.close_socket(oldest)
+
+    _recent.append(socket)
+
+    timing.count(timing.COUNT_CONNECTION_REUSE if reused else timing.COUNT_CONNECTION_OPEN)
+    return reused
+
+
+# CLOSE ALL CONNECTIONS (session kept, so the next request connects again)
+def close():
+    if _pool is not None:
+        connection_manager_close_all(_pool)
+
+    _recent[:] = []
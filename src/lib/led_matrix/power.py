@@ -0,0 +1,37 @@
+# type: ignore
+
+# Low-power sleep: display and radio off, then a timed alarm sleep. Light sleep keeps RAM and returns to the app;
+# deep sleep resets the board on wake, so the launcher state is marked to rerun the current app.
+
+import time
+
+from led_matrix import log, net, state
+
+try:
+    import alarm
+except ImportError: # host (e.g. emulator)
+    alarm = None
+
+
+# SLEEP FOR seconds WITH DISPLAY AND RADIO OFF (deep sleep does not return, the board restarts into the current app)
+def sleep(seconds, display, radio, deep=False):
+    net.close() # open connections do not survive the radio going down
+    display.brightness = 0 # stops matrix refresh
+    radio.enabled = False
+
+    if alarm is None:
+        time.sleep(seconds)
+    else:
+        wake_alarm = alarm.time.TimeAlarm(monotonic_time=time.monotonic() + seconds)
+
+        if deep:
+            app, _, boots, _ = state.load()
+            state.save(app, True, boots, 0) # rerun this app on wake, as if it completed
+            log.flush()
+
+            alarm.exit_and_deep_sleep_until_alarms(wake_alarm)
+
+        alarm.light_sleep_until_alarms(wake_alarm)
+
+    radio.enabled = True
+    display.brightness = 1
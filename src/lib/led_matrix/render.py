@@ -0,0 +1,63 @@
+# type: ignore
+
+# Manual display refresh: apps turn auto_refresh off and mark the display dirty when they change what is shown,
+# and refresh() composites only then (displayio itself redraws only the areas of the groups that changed). Frames
+# are paced by the caller, normally once per animation frame (led_matrix.animation).
+
+from led_matrix import timing
+
+
+# STATE
+_display = None
+_dirty = False
+
+
+# USE DISPLAY (auto refresh off, first refresh draws everything)
+def init(display):
+    global _display, _dirty
+
+    display.auto_refresh = False
+    _display = display
+    _dirty = True
+
+
+# MARK DISPLAY CHANGED
+def invalidate():
+    global _dirty
+    _dirty = True
+
+
+# SET GROUP VISIBILITY, marking display changed only if it changes
+def hide(group, hidden):
+    global _dirty
+
+    if group.hidden != hidden:
+        group.hidden = hidden
+        _dirty = True
+
+
+# SET ROOT GROUP, marking display changed only if it changes
+def show(group):
+    global _dirty
+
+    if _display.root_group is not group:
+        _display.root_group = group
+        _dirty = True
+
+
+# REFRESH DISPLAY IF ANYTHING CHANGED SINCE LAST REFRESH, returning True if refreshed
+def refresh():
+    global _dirty
+
+    if _display is None or not _dirty:
+        timing.count(timing.COUNT_REFRESH_SKIP)
+        return False
+
+    _dirty = False
+
+    t = timing.start()
+    _display.refresh(minimum_frames_per_second=0)
+    timing.stop(timing.SPAN_REFRESH, t)
+
+    timing.count(timing.COUNT_REFRESH)
+    return True
@@ -0,0 +1,170 @@
+# type: ignore
+
+# Image downscaling for 16-bit RGB565 bitmaps (e.g. decoded JPEG) by area averaging: each output pixel is the mean of
+# the source area it covers, weighted by overlap, so any integer or fractional ratio works without the aliasing of
+# picking one source pixel per block. Power-of-two box downscales use ulab bulk operations where available; otherwise
+# source rows are unpacked into preallocated row buffers and accumulated into the output rows they cover.
+
+import asyncio
+from array import array
+
+try:
+    from ulab import numpy as np
+    from bitmaptools import arrayblit
+except ImportError: # host (e.g. emulator), or a build without ulab
+    np = None
+
+
+def _gcd(a, b):
+    while b:
+        a, b = b, a % b
+    return a
+
+
+# OVERLAPS OF SOURCE AND OUTPUT PIXELS ALONG ONE AXIS as (output, source, weight) in order, with the weight sum per
+# output pixel (source pixel i spans [i*size, (i+1)*size), output pixel o spans [o*source_size, (o+1)*source_size),
+# both divided by their gcd)
+def _taps(source_size, size):
+    g = _gcd(source_size, size)
+    source_length = size // g
+    length = source_size // g
+
+    taps = []
+    for output in range(size):
+        start = output * length
+        end = start + length
+        for source in range(start // source_length, (end + source_length - 1) // source_length):
+            weight = min(end, (source + 1) * source_length) - max(start, source * source_length)
+            taps.append((output, source, weight))
+
+    return taps, length
+
+
+# AREA-AVERAGING DOWNSCALER FROM source_width x source_height TO width x height (swapped for RGB565_SWAPPED values)
+class Resampler:
+    def __init__(self, source_width, source_height, width, height, swapped=True):
+        if width > source_width or height > source_height:
+            raise ValueError("only downscaling is supported")
+
+        self.source_width = source_width
+        self.source_height = source_height
+        self.width = width
+        self.height = height
+        self._swapped = swapped
+
+        # columns: overlaps in parallel arrays, for the inner loop
+        x_taps, x_total = _taps(source_width, width)
+        self._tap_output = array('H', [t[0] for t in x_taps])
+        self._tap_source = array('H', [t[1] for t in x_taps])
+        self._tap_weight = array('H', [t[2] for t in x_taps])
+
+        # rows: output rows (and weights) per source row, and last source row of each output row
+        y_taps, y_total = _taps(source_height, height)
+        self._row_taps = [[] for _ in range(source_height)]
+        self._row_last = [0] * height
+        for output, source, weight in y_taps:
+            self._row_taps[source].append((output, weight))
+            self._row_last[output] = source
+
+        self._total = x_total * y_total # weight sum per output pixel
+
+        # channels are summed in one integer, spread into fields wide enough for the weighted sum of the largest channel
+        # (10 bits for totals up to 16, e.g. 2x2 to 4x4 boxes, so sums stay small ints on device)
+        self._field = 1
+        while (1 << self._field) <= 63 * self._total:
+            self._field += 1
+        self._field_mask = (1 << self._field) - 1
+
+        # row buffers (preallocated, so resampling does not allocate per image)
+        self._row = array('L' if 3 * self._field <= 32 else 'Q', [0] * source_width) # spread source pixels
+        self._sums = [array(self._row.typecode, [0] * width) for _ in range(2)] # output rows in flight (by row parity)
+
+        # box factor for the bulk path (0 if not a power-of-two box downscale of word-aligned rows)
+        factor = source_width // width
+        self._factor = 0
+        if (
+            np is not None and factor > 1 and factor & (factor - 1) == 0 and source_width % 2 == 0 and
+            source_width == width * factor and source_height == height * factor
+        ):
+            self._factor = factor
+
+    # RESAMPLE source INTO bitmap (yields between output rows unless done in bulk)
+    async def resample(self, source, bitmap):
+        if self._factor:
+            self._resample_bulk(source, bitmap)
+            return
+
+        source_width = self.source_width
+        swapped = self._swapped
+        field = self._field
+        row = self._row
+        tap_output, tap_source, tap_weight = self._tap_output, self._tap_source, self._tap_weight
+        taps = len(tap_output)
+
+        for y in range(self.source_height):
+            # unpack source row, spreading channels into fields
+            base = y * source_width
+            for x in range(source_width):
+                value = source[base + x]
+                if swapped:
+                    value = ((value & 0xFF) << 8) | (value >> 8)
+                row[x] = (value >> 11) << (2 * field) | ((value >> 5) & 0x3F) << field | (value & 0x1F)
+
+            # add row to the output rows it covers (all channels at once)
+            for output_row, row_weight in self._row_taps[y]:
+                sums = self._sums[output_row & 1]
+
+                for t in range(taps):
+                    sums[tap_output[t]] += row[tap_source[t]] * (tap_weight[t] * row_weight)
+
+                if y == self._row_last[output_row]:
+                    self._write_row(bitmap, output_row, sums)
+                    await asyncio.sleep(0) # let display tasks run between rows
+
+    # WRITE AVERAGED OUTPUT ROW AND CLEAR ITS SUMS
+    def _write_row(self, bitmap, row, sums):
+        total = self._total
+        half = total // 2
+        field = self._field
+        mask = self._field_mask
+
+        for o in range(self.width):
+            value = sums[o]
+            value = (
+                (((value >> (2 * field)) + half) // total) << 11 |
+                ((((value >> field) & mask) + half) // total) << 5 |
+                ((value & mask) + half) // total
+            )
+            if self._swapped:
+                value = ((value & 0xFF) << 8) | (value >> 8)
+
+            bitmap[o, row] = value
+            sums[o] = 0
+
+    # BOX DOWNSCALE BY A POWER OF TWO WITH ULAB (channel sums of strided views, divided by shifting)
+    def _resample_bulk(self, source, bitmap):
+        factor = self._factor
+        shift = 0
+        while (1 << shift) < factor * factor:
+            shift += 1
+        half = 1 << (shift - 1)
+
+        pixels = np.frombuffer(source, dtype=np.uint16).reshape((self.source_height, self.source_width))
+        if self._swapped:
+            pixels = ((pixels & 0xFF) << 8) | (pixels >> 8)
+
+        channels = []
+        for channel in (pixels >> 11, (pixels >> 5) & 0x3F, pixels & 0x1F):
+            total = None
+            for dy in range(factor):
+                for dx in range(factor):
+                    block = channel[dy::factor, dx::factor]
+                    total = block if total is None else total + block
+            channels.append((total + half) >> shift)
+
+        red, green, blue = channels
+        output = (red << 11) | (green << 5) | blue
+        if self._swapped:
+            output = ((output & 0xFF) << 8) | (output >> 8)
+
+        arrayblit(bitmap, np.array(output, dtype=np.uint16))
@@ -0,0 +1,90 @@
+# type: ignore
+
+import time
+import errno
+import random
+
+
+# PARAMETERS
+FAILURE_THRESHOLD = 3 # consecutive failures before a breaker opens
+OPEN_DELAY = 30 # first open period of a breaker [seconds]
+MAX_OPEN_DELAY = 1800 # longest open period of a breaker [seconds]
+
+TRANSIENT_ERRNOS = (
+    errno.ETIMEDOUT,
+    errno.ECONNRESET,
+    errno.ECONNABORTED,
+    errno.EAGAIN,
+    errno.EHOSTUNREACH,
+    errno.ENOTCONN,
+    errno.ENOBUFS,
+) # socket errors worth one fast retry
+
+PARSE_ERRORS = (ValueError, KeyError, IndexError, TypeError) # malformed response body, not the endpoint failing
+
+CLOSED = 0 # requests allowed
+OPEN = 1 # requests skipped until retry time
+HALF_OPEN = 2 # one trial request allowed
+
+
+# JITTERED EXPONENTIAL BACKOFF
+def backoff(attempt, base, maximum):
+    delay = min(maximum, base * (2 ** min(attempt, 16)))
+    return delay / 2 + random.random() * delay / 2 # keep half the delay, jitter the rest to spread the fleet
+
+
+# CHECK FOR TRANSIENT SOCKET ERROR
+def is_transient(e):
+    if not isinstance(e, OSError) or not e.args or not isinstance(e.args[0], int):
+        return False
+
+    code = e.args[0]
+    return code < 0 or code in TRANSIENT_ERRNOS # negative codes are getaddrinfo (DNS) errors
+
+
+# CHECK FOR REQUEST ERROR THAT MEANS THE ENDPOINT IS UNREACHABLE (anything but a parse error, e.g. OSError, or
+# adafruit_requests OutOfRetries and RuntimeError when the connection is accepted but sending or receiving keeps failing)
+def is_network_error(e):
+    return not isinstance(e, PARSE_ERRORS)
+
+
+# CHECK FOR HTTP STATUS THAT MEANS THE ENDPOINT ITSELF IS FAILING (server error or rate limit)
+def is_server_error(status_code):
+    return status_code >= 500 or status_code == 429
+
+
+# PER-ENDPOINT CIRCUIT BREAKER
+class Breaker:
+    def __init__(self, name, threshold=FAILURE_THRESHOLD, delay=OPEN_DELAY, max_delay=MAX_OPEN_DELAY):
+        self.name = name
+        self.threshold = threshold
+        self.delay = delay
+        self.max_delay = max_delay
+
+        self.state = CLOSED
+        self.failures = 0 # consecutive failures
+        self.opens = 0 # consecutive opens (grows the open period)
+        self._retry_at = 0
+
+    # check whether a request may be made now
+    def allow(self):
+        if self.state == OPEN:
+            if time.monotonic() < self._retry_at:
+                return False
+
+            self.state = HALF_OPEN # let one trial request through
+
+        return True
+
+    def success(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opens = 0
+
+    def failure(self):
+        self.failures += 1
+
+        if self.state == HALF_OPEN or self.failures >= self.threshold:
+            self.state = OPEN
+            self._retry_at = time.monotonic() + backoff(self.opens, self.delay, self.max_delay)
+            self.opens += 1
@@ -0,0 +1,223 @@
+# type: ignore
+
+import json
+import asyncio
+
+from led_matrix import clock, net, timing
+from led_matrix.jsonstream import JsonItems
+from led_matrix.retry import is_transient
+
+
+# PARAMETERS
+CHUNK_SIZE = 256 # bytes read from a response before yielding to other tasks [bytes]
+FAST_RETRY_DELAY = 0.5 # delay before retrying a request once after a transient socket error [seconds]
+DRAIN_LIMIT = 163840 # unread body read off an abandoned response to keep its connection, rather than closing it (covers Transiter stop documents, whose rest reads off faster than a new TLS handshake) [bytes]
+DRAIN_CHUNK_SIZE = 1024 # bytes read off per step while draining, yielding between steps [bytes]
+
+
+# HAND OFF FETCHED DATA BETWEEN TASKS
+class Latest:
+    def __init__(self):
+        self._value = None
+        self._ready = False
+        self._requested = asyncio.Event()
+
+    # ask the fetch task for fresh data
+    def request(self):
+        self._requested.set()
+
+    # wait until fresh data is requested (used by the fetch task)
+    async def wait_request(self):
+        await self._requested.wait()
+        self._requested.clear()
+
+    # store fetched data, replacing any data not yet taken
+    def put(self, value):
+        self._value = value
+        self._ready = True
+
+    # take fetched data if available (swap is atomic since tasks only switch at await)
+    def take(self):
+        if not self._ready:
+            return False, None
+
+        value = self._value
+        self._value = None
+        self._ready = False
+
+        return True, value
+
+
+# MAKE REQUEST, RETRYING ONCE ON TRANSIENT SOCKET ERRORS (e.g. DNS blips or resets), SYNC CLOCK FROM DATE HEADER AND
+# RECORD WHETHER THE CONNECTION WAS REUSED
+async def request(method, url, **kwargs):
+    t = timing.start()
+
+    try:
+        response = method(url, **kwargs)
+    except OSError as e:
+        if not is_transient(e):
+            raise
+
+        await asyncio.sleep(FAST_RETRY_DELAY)
+        response = method(url, **kwargs)
+
+    timing.stop(timing.SPAN_REQUEST, t)
+
+    reused = net.track(response)
+    timing.stop(timing.SPAN_REQUEST_REUSE if reused else timing.SPAN_REQUEST_OPEN, t)
+
+    clock.sync_response(response)
+    return response
+
+
+# READ RESPONSE BODY IN CHUNKS, YIELDING BETWEEN CHUNKS
+async def read_content(response, chunk_size=CHUNK_SIZE):
+    t = timing.start()
+
+    chunks = []
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        chunks.append(chunk)
+        await asyncio.sleep(0) # let display tasks run between chunks
+
+    content = b''.join(chunks)
+    timing.stop(timing.SPAN_READ_CONTENT, t)
+
+    return content
+
+
+# READ RESPONSE BODY STRAIGHT INTO PREALLOCATED buffer IN CHUNKS, YIELDING BETWEEN CHUNKS (returns bytes read, raises
+# ValueError if the body fills the buffer, so size buffer above the largest body expected)
+async def read_into(response, buffer, chunk_size=CHUNK_SIZE):
+    t = timing.start()
+
+    view = memoryview(buffer)
+    size = 0
+    while True:
+        if size == len(buffer):
+            await abandon(response)
+            raise ValueError("response body larger than buffer")
+
+        read = response._readinto(view[size:size + chunk_size])
+        if read == 0:
+            break
+
+        size += read
+        await asyncio.sleep(0) # let display tasks run between chunks
+
+    timing.stop(timing.SPAN_READ_INTO, t)
+    timing.count(timing.COUNT_READ_INTO_BYTES, size)
+
+    return size
+
+
+# READ AND PARSE JSON RESPONSE BODY
+async def read_json(response, chunk_size=CHUNK_SIZE):
+    content = await read_content(response, chunk_size)
+    await asyncio.sleep(0) # let display tasks run before parsing
+
+    t = timing.start()
+    data = json.loads(content)
+    timing.stop(timing.SPAN_PARSE_JSON, t)
+
+    return data
+
+
+_drain_buffer = bytearray(DRAIN_CHUNK_SIZE) # preallocated, so draining does not allocate per response
+
+
+# READ OFF REST OF RESPONSE BODY UP TO limit BYTES, YIELDING BETWEEN STEPS, returning True if the body ended (connection
+# can be reused)
+async def _drain(response, limit):
+    if response._remaining is None and not response._chunked:
+        return False # body runs until the connection closes
+
+    if not response._chunked and response._remaining > limit:
+        return False # rest of body known (Content-Length) to be too long, close right away
+
+    t = timing.start()
+
+    while limit > 0:
+        read = response._readinto(_drain_buffer)
+        if read == 0:
+            timing.stop(timing.SPAN_DRAIN, t)
+            return True
+
+        limit -= read
+        await asyncio.sleep(0) # let display tasks run between steps
+
+    return False
+
+
+# DROP PARTIALLY READ RESPONSE (unread body would be read as the next response on its socket, so a rest up to
+# DRAIN_LIMIT is read off and the connection kept for reuse, otherwise the connection is closed)
+async def abandon(response):
+    socket = response.socket
+    if socket is None:
+        return
+
+    try:
+        if await _drain(response, DRAIN_LIMIT):
+            return # connection freed for reuse when the response is closed
+    except OSError:
+        pass # close below
+
+    response.socket = None
+    session = response._session
+
+    if session:
+        session._connection_manager.close_socket(socket)
+    else:
+        socket.close()
+
+
+# STREAM RESPONSE INTO PARSER (feed(chunk) returns True when done, count is items read) UNTIL DONE (returns items read)
+async def read_stream(response, parser, chunk_size=CHUNK_SIZE):
+    t = timing.start()
+
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if parser.feed(chunk):
+            await abandon(response) # stop parsing once enough items are found
+            break
+
+        await asyncio.sleep(0) # let display tasks run between chunks
+
+    timing.stop(timing.SPAN_READ_CONTENT, t)
+
+    return parser.count
+
+
+# STREAM JSON RESPONSE, CALLING on_item WITH THE FIELDS OF EACH ITEM AT PATH UNTIL IT RETURNS TRUE (returns items read)
+async def read_items(response, path, fields, on_item, chunk_size=CHUNK_SIZE):
+    return await read_stream(response, JsonItems(path, fields, on_item), chunk_size)
+
+
+# STREAM JSON RESPONSE, RETURNING THE REQUESTED FIELDS OF THE ROOT OBJECT
+async def read_fields(response, fields, chunk_size=CHUNK_SIZE):
+    values = [None]
+
+    def on_item(item):
+        values[0] = item
+        return True
+
+    await read_items(response, (), fields, on_item, chunk_size)
+
+    if values[0] is None:
+        raise ValueError("incomplete json document")
+
+    return values[0]
+
+
+# RUN FOREGROUND TASK UNTIL IT RETURNS, WITH BACKGROUND TASKS ALONGSIDE
+async def _supervise(foreground, background):
+    tasks = [asyncio.create_task(b) for b in background]
+
+    try:
+        return await foreground
+    finally:
+        for t in tasks:
+            t.cancel() # stop background tasks when foreground task completes
+
+
+def run(foreground, *background):
+    return asyncio.run(_supervise(foreground, background))
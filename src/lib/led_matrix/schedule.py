@@ -0,0 +1,117 @@
+# type: ignore
+
+# Static schedule index (built from MTA static GTFS by setup/app/subway/schedule.py): scheduled departures at a few
+# stops, in fixed-width records sorted by stop, route, direction and departure time, one section per day of the week
+# (days with the same service share a section). The index is small enough to hold in memory, so a lookup is a binary
+# search with no flash or network access.
+#
+# file: header (magic, version, record size), stop, route, direction and destination name tables (count, then length
+# and UTF-8 bytes per name; a direction's names, e.g. Transiter headsigns, joined by '|'), section per weekday (first
+# record, record count; Monday first), records
+
+import struct
+
+from led_matrix import clock
+
+
+# PARAMETERS
+MAGIC = b'SI' # schedule index magic
+VERSION = 1 # schedule index format version
+
+HEADER_FORMAT = '<2sBB' # magic, version, record size
+SECTION_FORMAT = '<II' # first record, record count
+RECORD_FORMAT = '<BBBIB' # stop, route, direction, departure time (from midnight of the service day, may pass 24:00) [seconds], destination
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+
+# SCHEDULE INDEX
+class Schedule:
+    def __init__(self, path, standard_offset, dst=True):
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        magic, version, record_size = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError("unsupported schedule index")
+
+        offset = struct.calcsize(HEADER_FORMAT)
+        self.stops, offset = self._names(data, offset)
+        self.routes, offset = self._names(data, offset)
+        self.directions, offset = self._names(data, offset)
+        self.directions = [names.split('|') for names in self.directions] # names per GTFS direction
+        self.destinations, offset = self._names(data, offset)
+
+        self._sections = [struct.unpack_from(SECTION_FORMAT, data, offset + 8*day) for day in range(7)]
+        self._records = offset + 8*7 # first record
+
+        self._data = data
+        self._standard_offset = standard_offset # schedule time zone [seconds]
+        self._dst = dst
+
+    @staticmethod
+    def _names(data, offset):
+        names = []
+        for _ in range(data[offset]):
+            length = data[offset + 1]
+            names.append(data[offset + 2:offset + 2 + length].decode())
+            offset += 1 + length
+        return names, offset + 1
+
+    # SCHEDULED STOP TIMES FOR PAGE FROM current_time, the soonest count per route and direction shown (same tuples as
+    # live stop times, with departure times in UTC)
+    def stop_times(self, page, current_time, count):
+        if page['stop'] not in self.stops:
+            return []
+
+        stop = self.stops.index(page['stop'])
+        routes = [self.routes.index(r) for r in page['routes'] if r in self.routes] if page['routes'] else range(len(self.routes))
+        directions = [] # (direction, name shown as), by the first of its names the page includes
+        for d, names in enumerate(self.directions):
+            for name in names:
+                if name in page['directions']:
+                    directions.append((d, name))
+                    break
+
+        # service day starts at local midnight, trips after midnight belong to the previous service day
+        local = current_time + clock.utc_offset(current_time, self._standard_offset, self._dst)
+        day = local // 86400
+        midnight = current_time - local % 86400 # today's local midnight [UTC seconds]
+        seconds = local % 86400
+
+        stop_times = []
+        for route in routes:
+            for direction, name in directions:
+                times = self._departures((day + 3) % 7, stop, route, direction, name, seconds, count, midnight)
+                times += self._departures((day + 2) % 7, stop, route, direction, name, seconds + 86400, count, midnight - 86400)
+                times.sort(key=lambda t: t[4])
+                stop_times += times[:count]
+
+        return stop_times
+
+    # first count departures from seconds in weekday section (Monday is 0, 1970-01-01 was a Thursday)
+    def _departures(self, weekday, stop, route, direction, name, seconds, count, midnight):
+        first, records = self._sections[weekday]
+        low = first
+        high = first + records
+        key = (stop, route, direction, seconds)
+
+        # binary search for first record at or after key
+        while low < high:
+            middle = (low + high) // 2
+            if struct.unpack_from(RECORD_FORMAT, self._data, self._records + middle*RECORD_SIZE)[:4] < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        times = []
+        while low < first + records and len(times) < count:
+            s, r, d, departure, destination = struct.unpack_from(RECORD_FORMAT, self._data, self._records + low*RECORD_SIZE)
+            if (s, r, d) != (stop, route, direction):
+                break
+
+            times.append((
+                self.stops[s], name, self.routes[r], self.destinations[destination], midnight + departure
+            ))
+            low += 1
+
+        return times
@@ -0,0 +1,80 @@
+# type: ignore
+
+import json
+import struct
+
+from displayio import Bitmap, Palette, TileGrid
+
+try:
+    from bitmaptools import readinto
+except ImportError: # host (e.g. emulator)
+    readinto = None
+
+
+# LOAD UNCOMPRESSED 8-BIT PALETTE BMP INTO MEMORY (index 0 transparent), returning bitmap and palette
+def load_bmp(path):
+    with open(path, 'rb') as file:
+        header = file.read(54)
+        if header[:2] != b'BM':
+            raise ValueError("invalid BMP file")
+
+        data_offset = struct.unpack_from('<I', header, 10)[0]
+        header_size = struct.unpack_from('<I', header, 14)[0]
+        width, height = struct.unpack_from('<ii', header, 18)
+        bits_per_pixel = struct.unpack_from('<H', header, 28)[0]
+        compression = struct.unpack_from('<I', header, 30)[0]
+        colors = struct.unpack_from('<I', header, 46)[0] or 256
+
+        if bits_per_pixel != 8 or compression != 0:
+            raise ValueError("only uncompressed 8-bit BMP files are supported")
+
+        # palette (blue, green, red, reserved)
+        file.seek(14 + header_size)
+        table = file.read(4 * colors)
+        palette = Palette(colors)
+        for i in range(colors):
+            palette[i] = (table[4*i + 2] << 16) | (table[4*i + 1] << 8) | table[4*i]
+        palette.make_transparent(0)
+
+        # pixels (rows bottom-up unless height is negative, each padded to 4 bytes)
+        bottom_up = height > 0
+        height = abs(height)
+        stride = (width + 3) & ~3
+        bitmap = Bitmap(width, height, colors)
+
+        file.seek(data_offset)
+        if readinto is not None and stride == width:
+            readinto(bitmap, file, 8, reverse_rows=bottom_up) # native copy on device
+        else:
+            row = bytearray(stride)
+            for r in range(height):
+                file.readinto(row)
+                y = height - 1 - r if bottom_up else r
+                for x in range(width):
+                    bitmap[x, y] = row[x]
+
+    return bitmap, palette
+
+
+# SPRITE ATLAS (tiles of one palette bitmap, with an index of tile by name, as built by setup/app/<app>/ scripts)
+class Atlas:
+    def __init__(self, bitmap_path, index_path):
+        self.bitmap, self.palette = load_bmp(bitmap_path)
+
+        with open(index_path, 'r') as file:
+            index = json.load(file)
+
+        self.tile_width = index['tile_width']
+        self.tile_height = index['tile_height']
+        self._tiles = index['tiles']
+
+    # tile index for name (default for names not in atlas)
+    def tile(self, name, default=0):
+        return self._tiles.get(name, default)
+
+    # single tile grid showing one tile at a time (set grid[0] to switch tiles)
+    def sprite(self, name=None, x=0, y=0):
+        return TileGrid(
+            self.bitmap, pixel_shader=self.palette, width=1, height=1,
+            tile_width=self.tile_width, tile_height=self.tile_height, default_tile=self.tile(name), x=x, y=y
+        )
@@ -0,0 +1,109 @@
+# type: ignore
+
+import struct
+from binascii import crc32
+
+try:
+    from microcontroller import nvm
+except ImportError:
+    nvm = None # no nvm (e.g. host emulator), fall back to record file
+
+
+# PARAMETERS
+STATE_PATH = "/state.bin" # fixed-size record file used when nvm is not available
+
+NVM_OFFSET = 0 # first byte of state slots in nvm
+SLOTS = 8 # records written in rotation so no single location takes every write [records]
+
+MAGIC = b'LS' # state record magic
+VERSION = 1 # state record format version
+
+RECORD_FORMAT = '<2sBIBBIH' # magic, version, sequence number, app index, flags, boot count, incomplete boot count
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT) + 4 # record followed by crc32 of record
+REGION_SIZE = SLOTS * RECORD_SIZE
+
+NO_APP = 255 # app index before any app has run
+
+FLAG_RELOAD = 0x01 # previous app completed, run it again
+
+
+# STATE
+_slot = SLOTS - 1 # slot of newest valid record
+_sequence = 0 # sequence number of newest valid record
+
+
+# READ STATE REGION
+def _read():
+    if nvm is not None:
+        return bytes(nvm[NVM_OFFSET:NVM_OFFSET + REGION_SIZE])
+
+    try:
+        with open(STATE_PATH, 'rb') as file:
+            return file.read(REGION_SIZE)
+    except OSError:
+        return b''
+
+
+# WRITE ONE SLOT (a torn write only damages this slot, whose crc then fails, leaving the previous record current)
+def _write(slot, record):
+    offset = slot * RECORD_SIZE
+
+    if nvm is not None:
+        nvm[NVM_OFFSET + offset:NVM_OFFSET + offset + RECORD_SIZE] = record
+        return
+
+    try:
+        file = open(STATE_PATH, 'r+b')
+    except OSError:
+        file = open(STATE_PATH, 'w+b')
+        file.write(bytes(REGION_SIZE)) # create file at fixed size
+
+    try:
+        file.seek(offset)
+        file.write(record)
+    finally:
+        file.close()
+
+
+# LOAD NEWEST VALID STATE, returning app index, reload flag, boot count and incomplete boot count (may be called again,
+# e.g. after save, to read the current record)
+def load():
+    global _slot, _sequence
+
+    data = _read()
+    state = (NO_APP, False, 0, 0)
+    newest = 0 # sequence number of newest valid record found so far
+
+    for slot in range(SLOTS):
+        offset = slot * RECORD_SIZE
+        if offset + RECORD_SIZE > len(data):
+            break
+
+        magic, version, sequence, app, flags, boots, incomplete = struct.unpack_from(RECORD_FORMAT, data, offset)
+        if magic != MAGIC or version != VERSION or sequence <= newest:
+            continue
+
+        (crc,) = struct.unpack_from('<I', data, offset + RECORD_SIZE - 4)
+        if crc != crc32(data[offset:offset + RECORD_SIZE - 4]):
+            continue # torn or corrupted record
+
+        newest = sequence
+        _slot = slot
+        _sequence = sequence
+        state = (app, bool(flags & FLAG_RELOAD), boots, incomplete)
+
+    return state
+
+
+# COMMIT STATE TO NEXT SLOT
+def save(app, reload, boots, incomplete):
+    global _slot, _sequence
+
+    slot = (_slot + 1) % SLOTS
+    sequence = _sequence + 1
+
+    record = struct.pack(RECORD_FORMAT, MAGIC, VERSION, sequence, app, FLAG_RELOAD if reload else 0, boots, min(incomplete, 0xFFFF))
+    _write(slot, record + struct.pack('<I', crc32(record)))
+
+    _slot = slot
+    _sequence = sequence
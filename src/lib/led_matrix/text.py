@@ -0,0 +1,89 @@
+# type: ignore
+
+from array import array
+
+from displayio import Group, Palette, TileGrid
+
+from led_matrix import render
+
+
+# PARAMETERS
+FIRST_CHARACTER = 0x20 # first character in glyph lookup table (space)
+LAST_CHARACTER = 0x7E # last character in glyph lookup table (tilde)
+
+
+# FIXED-CAPACITY SINGLE-LINE TEXT (one tile per character of a built-in font, so text updates only rewrite tile indices)
+class TextLine(Group):
+    def __init__(self, font, capacity, color, text='', x=0, y=0):
+        super().__init__(x=x, y=y)
+
+        self._font = font
+        self._capacity = capacity
+        self._text = ''
+
+        width, height = font.get_bounding_box()[:2]
+
+        # glyph tile index for each printable ASCII character (looked up once instead of per update)
+        self._tiles = array('H', [self._tile(c) for c in range(FIRST_CHARACTER, LAST_CHARACTER + 1)])
+        self._space = self._tiles[0]
+
+        self._palette = Palette(2)
+        self._palette.make_transparent(0)
+        self._palette[1] = color
+
+        # centered on y like adafruit_display_text.label.Label
+        self._grid = TileGrid(
+            font.bitmap, pixel_shader=self._palette, width=capacity, height=1,
+            tile_width=width, tile_height=height, default_tile=self._space, x=0, y=-(height // 2)
+        )
+        self.append(self._grid) # self[0] is the grid, which scroll() moves
+
+        self.text = text
+
+    def _tile(self, codepoint):
+        glyph = self._font.get_glyph(codepoint)
+        if glyph is None:
+            return self._tile(FIRST_CHARACTER) if codepoint != FIRST_CHARACTER else 0
+
+        return glyph.tile_index
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    @property
+    def color(self):
+        return self._palette[1]
+
+    @color.setter
+    def color(self, color):
+        self._palette[1] = color
+        render.invalidate()
+
+    @property
+    def text(self):
+        return self._text
+
+    @text.setter
+    def text(self, text):
+        if len(text) > self._capacity:
+            text = text[:self._capacity] # drop characters beyond capacity
+
+        if text == self._text:
+            return # unchanged (nothing to redraw)
+
+        grid = self._grid
+        tiles = self._tiles
+
+        for i in range(len(text)):
+            codepoint = ord(text[i])
+            if FIRST_CHARACTER <= codepoint <= LAST_CHARACTER:
+                grid[i] = tiles[codepoint - FIRST_CHARACTER]
+            else:
+                grid[i] = self._tile(codepoint) # non-ASCII glyph (rare, looked up on update)
+
+        for i in range(len(text), len(self._text)):
+            grid[i] = self._space # clear leftover characters
+
+        self._text = text
+        render.invalidate()
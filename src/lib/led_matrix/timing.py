@@ -0,0 +1,211 @@
+# type: ignore
+
+from array import array
+from gc import mem_alloc
+
+try:
+    from supervisor import ticks_ms
+except ImportError: # host (e.g. emulator)
+    from time import monotonic_ns
+
+    def ticks_ms():
+        return (monotonic_ns() // 1000000) & TICKS_MASK
+
+
+# PARAMETERS
+ENABLED = False # collect timings (off in normal use, so spans cost one call and one check)
+TIMING_PATH = "/timing.txt" # file written by dump(to_file=True)
+
+TICKS_PERIOD = 1 << 29 # supervisor.ticks_ms wraps at this value [ms]
+TICKS_MASK = TICKS_PERIOD - 1
+
+BUCKETS = 16 # histogram buckets per span, bucket b holds durations below 2**b ms (last bucket unbounded)
+
+# span ids (spans around awaits include time other tasks ran while waiting)
+SPAN_REQUEST = 0 # network wait until response headers
+SPAN_READ_CONTENT = 1 # response body read
+SPAN_PARSE_JSON = 2 # json decode
+SPAN_GET_TIME = 3
+SPAN_GET_TRAIN = 4
+SPAN_GET_CURRENTLY_PLAYING = 5
+SPAN_GET_IMAGE = 6
+SPAN_DECODE_JPEG = 7
+SPAN_DOWNSAMPLE = 8
+SPAN_LABEL_TEXT = 9 # label text update (re-layout)
+SPAN_SCROLL = 10 # one animation frame of all tracks
+SPAN_SLEEP = 11 # wait for next frame deadline (time handed to other tasks)
+SPAN_REFRESH = 12 # display refresh (composite of changed areas)
+SPAN_REQUEST_OPEN = 13 # network wait until response headers, on a new connection (DNS, TCP and TLS handshake)
+SPAN_REQUEST_REUSE = 14 # network wait until response headers, on a reused keep-alive connection
+SPAN_READ_INTO = 15 # response body read straight into a preallocated buffer
+SPAN_ART_CACHE = 16 # album art cache lookup (and copy into the display bitmap on a hit)
+SPAN_DRAIN = 17 # unread body read off an abandoned response to keep its connection
+
+SPAN_NAMES = [
+    'request', 'read_content', 'parse_json', 'get_time', 'get_train', 'get_currently_playing', 'get_image',
+    'decode_jpeg', 'downsample', 'label_text', 'scroll', 'sleep', 'refresh', 'request_open', 'request_reuse',
+    'read_into', 'art_cache', 'drain',
+]
+SPANS = len(SPAN_NAMES)
+
+# counter ids
+COUNT_FETCH = 0 # fetches completed
+COUNT_FETCH_ERROR = 1 # fetches without usable data
+COUNT_SCROLL_PASS = 2 # scroll passes completed
+COUNT_FRAME_SKIP = 3 # animation frames skipped after a missed deadline
+COUNT_REFRESH = 4 # display refreshes (something changed)
+COUNT_REFRESH_SKIP = 5 # display refreshes skipped (nothing changed)
+COUNT_CONNECTION_OPEN = 6 # requests made on a new connection
+COUNT_CONNECTION_REUSE = 7 # requests made on a kept-alive connection
+COUNT_READ_INTO_BYTES = 8 # response body bytes read straight into preallocated buffers (no intermediate copies) [bytes]
+COUNT_ART_HIT_RAM = 9 # album art found in the RAM cache tier
+COUNT_ART_HIT_FLASH = 10 # album art found in the flash cache tier
+COUNT_ART_MISS = 11 # album art downloaded and decoded
+
+COUNT_NAMES = [
+    'fetch', 'fetch_error', 'scroll_pass', 'frame_skip', 'refresh', 'refresh_skip', 'connection_open', 'connection_reuse',
+    'read_into_bytes', 'art_hit_ram', 'art_hit_flash', 'art_miss',
+]
+COUNTS = len(COUNT_NAMES)
+
+# memory budget ids (bytes allocated by the display task itself, summed over steps between awaits)
+BUDGET_SCROLL_PASS = 0
+
+BUDGET_NAMES = ['scroll_pass']
+BUDGETS = len(BUDGET_NAMES)
+
+
+# STATISTICS (preallocated so recording does not allocate per sample)
+_count = array('L', [0] * SPANS)
+_total = array('L', [0] * SPANS) # [ms]
+_min = array('L', [0] * SPANS) # [ms]
+_max = array('L', [0] * SPANS) # [ms]
+_histogram = array('L', [0] * (SPANS * BUCKETS))
+_counters = array('L', [0] * COUNTS)
+
+_budget_pending = array('L', [0] * BUDGETS) # [bytes]
+_budget_count = array('L', [0] * BUDGETS)
+_budget_grew = array('L', [0] * BUDGETS) # periods that allocated at all
+_budget_max = array('L', [0] * BUDGETS) # [bytes]
+
+
+# START SPAN, returning start tick (0 when disabled)
+def start():
+    if not ENABLED:
+        return 0
+
+    return ticks_ms()
+
+
+# STOP SPAN AND RECORD DURATION
+def stop(span, start_ms):
+    if not ENABLED:
+        return
+
+    duration = (ticks_ms() - start_ms) & TICKS_MASK
+
+    if _count[span] == 0 or duration < _min[span]:
+        _min[span] = duration
+    if duration > _max[span]:
+        _max[span] = duration
+
+    _count[span] += 1
+    _total[span] += duration
+
+    bucket = 0
+    while bucket < BUCKETS - 1 and duration >> bucket:
+        bucket += 1
+    _histogram[span * BUCKETS + bucket] += 1
+
+
+# INCREMENT COUNTER
+def count(counter, n=1):
+    if ENABLED:
+        _counters[counter] += n
+
+
+# START ALLOCATION MEASUREMENT, returning allocated heap (0 when disabled)
+def alloc_start():
+    if not ENABLED:
+        return 0
+
+    return mem_alloc()
+
+
+# ADD BYTES ALLOCATED SINCE START TO BUDGET (measure only synchronous steps, since other tasks allocate during awaits)
+def alloc_stop(budget, start_bytes):
+    if not ENABLED:
+        return
+
+    allocated = mem_alloc() - start_bytes
+    if allocated > 0: # negative if a collection ran during the step
+        _budget_pending[budget] += allocated
+
+
+# CLOSE BUDGET PERIOD (e.g. end of scroll pass)
+def alloc_period(budget):
+    if not ENABLED:
+        return
+
+    allocated = _budget_pending[budget]
+    _budget_pending[budget] = 0
+
+    _budget_count[budget] += 1
+    if allocated:
+        _budget_grew[budget] += 1
+    if allocated > _budget_max[budget]:
+        _budget_max[budget] = allocated
+
+
+# CLEAR STATISTICS
+def reset():
+    for i in range(SPANS):
+        _count[i] = _total[i] = _min[i] = _max[i] = 0
+    for i in range(SPANS * BUCKETS):
+        _histogram[i] = 0
+    for i in range(COUNTS):
+        _counters[i] = 0
+    for i in range(BUDGETS):
+        _budget_pending[i] = _budget_count[i] = _budget_grew[i] = _budget_max[i] = 0
+
+
+# ESTIMATE PERCENTILE FROM HISTOGRAM (upper bound of bucket holding the percentile) [ms]
+def percentile(span, fraction):
+    target = _count[span] * fraction
+    seen = 0
+
+    for bucket in range(BUCKETS):
+        seen += _histogram[span * BUCKETS + bucket]
+        if seen >= target:
+            return min(_max[span], (1 << bucket) - 1)
+
+    return _max[span]
+
+
+# DUMP STATISTICS TO SERIAL, OR TO TIMING_PATH
+def dump(to_file=False):
+    lines = [f"{'span':<22}{'n':>7}{'min':>7}{'avg':>7}{'p95':>7}{'max':>7}"]
+
+    for span in range(SPANS):
+        n = _count[span]
+        if n:
+            lines.append(f"{SPAN_NAMES[span]:<22}{n:>7}{_min[span]:>7}{_total[span] // n:>7}{percentile(span, 0.95):>7}{_max[span]:>7}")
+
+    for counter in range(COUNTS):
+        lines.append(f"{COUNT_NAMES[counter]:<22}{_counters[counter]:>7}")
+
+    lines.append(f"{'budget':<22}{'n':>7}{'alloc':>7}{'max':>7}") # periods, periods that allocated, most bytes in one period
+    for budget in range(BUDGETS):
+        lines.append(f"{BUDGET_NAMES[budget]:<22}{_budget_count[budget]:>7}{_budget_grew[budget]:>7}{_budget_max[budget]:>7}")
+
+    if not to_file:
+        for line in lines:
+            print(line)
+        return
+
+    try:
+        with open(TIMING_PATH, 'w') as file:
+            for line in lines:
+                file.write(line + '\n')
+    except OSError:
+        pass # filesystem not writable
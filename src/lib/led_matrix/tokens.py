@@ -0,0 +1,52 @@
+# type: ignore
+
+# OAuth tokens kept in RAM: the access token with its expiry (from expires_in in refresh responses), so it can be
+# refreshed ahead of time rather than after a request fails, and the refresh token, written back to flash only when the
+# authorization server rotates it. The Basic authorization header for refresh requests is computed once.
+
+import json
+import time
+from binascii import b2a_base64
+
+
+# PARAMETERS
+REFRESH_MARGIN = 300 # refresh this long before the access token expires [seconds]
+DEFAULT_EXPIRES_IN = 3600 # access token lifetime if a refresh response does not give one [seconds]
+
+
+# TOKENS LOADED FROM path (JSON with access_token and refresh_token)
+class Tokens:
+    def __init__(self, path, client_id, client_secret):
+        with open(path, 'r') as file:
+            data = json.load(file)
+
+        self.access_token = data.get('access_token')
+        self.refresh_token = data.get('refresh_token')
+        self.authorization = 'Basic ' + b2a_base64(f"{client_id}:{client_secret}".encode()).strip().decode()
+
+        self._path = path
+        self._expires = None # monotonic time access token expires (None until refreshed, as a stored token may be stale)
+
+    # TRUE IF ACCESS TOKEN SHOULD BE REFRESHED (expiry unknown, or within margin of it)
+    def due(self, margin=REFRESH_MARGIN):
+        return self._expires is None or time.monotonic() >= self._expires - margin
+
+    # MARK ACCESS TOKEN EXPIRED (e.g. rejected before its expiry)
+    def expire(self):
+        self._expires = None
+
+    # STORE TOKENS FROM REFRESH RESPONSE (refresh token may not be in it, and is saved only if it changed)
+    def update(self, access_token, expires_in=None, refresh_token=None):
+        self.access_token = access_token
+        self._expires = time.monotonic() + (expires_in or DEFAULT_EXPIRES_IN)
+
+        if refresh_token and refresh_token != self.refresh_token:
+            self.refresh_token = refresh_token
+            self._save()
+
+    def _save(self):
+        try:
+            with open(self._path, 'w') as file:
+                json.dump({'access_token': self.access_token, 'refresh_token': self.refresh_token}, file)
+        except OSError:
+            pass # filesystem not writable, new refresh token kept for this run only
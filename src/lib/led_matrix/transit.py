@@ -0,0 +1,148 @@
+# type: ignore
+
+# Subway board logic: which stop times each page shows, trains per page and minutes counted down from departure
+# times. No network or display access, so host tools (tools/bench/subway_corpus.py) run the same code as the app.
+
+
+# PARAMETERS
+STOP_TIMES_PATH = ('stopTimes',) # stop times in a Transiter stop document
+ALERTS_PATH = ('alerts',) # alerts in a Transiter route document (any item is an active alert)
+
+MTA_STOP_URL = "https://demo.transiter.dev/systems/us-ny-subway/stops/{}?skip_service_maps=true&skip_alerts=true&skip_transfers=true" # MTA URL for stop (by stop ID)
+MTA_ROUTE_URL = "https://demo.transiter.dev/systems/us-ny-subway/routes/{}?skip_service_maps=true&skip_estimated_headways=true" # MTA URL for route (by route ID)
+
+TRAINS = 3 # trains listed per page
+STOP_TIMES_PER_PAGE = 5 # stop times kept per page (more than TRAINS, so later trains move up as trains depart between fetches)
+DEPARTED_DELAY = 30 # keep showing train in "0 minutes" this long past its departure time [seconds]
+MAX_STOP_TIMES = 30 # stop times kept per stop document [stop times]
+
+# fields read from each stop time (the rest of the stop document is skipped while streaming)
+STOP_TIME_FIELDS = (
+    ('headsign',),
+    ('trip', 'route', 'id'),
+    ('destination', 'name'),
+    ('departure', 'time'),
+)
+
+
+# CHECK STOP TIME BELONGS ON PAGE
+def on_page(page, stop, direction_name, train_symbol):
+    return (
+        stop == page['stop'] and direction_name in page['directions'] and
+        (not page['routes'] or train_symbol in page['routes'])
+    )
+
+
+# STOP TIMES FROM A TRANSITER STOP DOCUMENT FOR THE PAGES ON ITS STOP (add is the stream parser item callback)
+class StopTimes:
+    def __init__(self, pages, per_page, limit):
+        self.stop_times = [] # (stop, direction, route, destination, departure time)
+        self._pages = pages
+        self._stop = pages[0]['stop']
+        self._counts = [0] * len(pages)
+        self._per_page = per_page
+        self._limit = limit
+
+    # keep stop time if any page shows it, returning True once every page has enough (the rest is not read)
+    def add(self, t):
+        direction_name, train_symbol, destination_name, departure_time = t
+
+        if not direction_name or departure_time is None:
+            return False
+
+        direction_name = direction_name.lower()
+        shown = False
+
+        for i, page in enumerate(self._pages):
+            if on_page(page, self._stop, direction_name, train_symbol):
+                self._counts[i] += 1
+                shown = True
+
+        if shown:
+            self.stop_times.append((self._stop, direction_name, train_symbol, destination_name, int(departure_time)))
+
+        return min(self._counts) >= self._per_page or len(self.stop_times) >= self._limit
+
+
+# STOP TIMES FROM GTFS-REALTIME FEED ITEMS FOR THE PAGES ON ROUTES IN THE FEED (add is the feed parser item callback)
+class FeedStopTimes:
+    def __init__(self, pages, directions, stop_names, current_time, departed_delay):
+        self.stop_times = [] # (stop, direction, route, destination, departure time)
+        self._pages = pages
+        self._directions = directions
+        self._stop_names = stop_names
+        self._current_time = current_time
+        self._departed_delay = departed_delay
+
+    # keep stop time if any page shows it (the feed is ordered by trip, not time, so all of it is read)
+    def add(self, t):
+        train_symbol, stop_id, departure_time, last_stop_id = t
+
+        if self._current_time is not None and departure_time < self._current_time - self._departed_delay:
+            return False
+
+        stop = stop_id[:-1]
+        direction_name = self._directions.get(stop_id[-1:])
+
+        for page in self._pages:
+            if on_page(page, stop, direction_name, train_symbol):
+                destination_name = self._stop_names.get(last_stop_id[:-1], last_stop_id[:-1])
+                self.stop_times.append((stop, direction_name, train_symbol, destination_name, departure_time))
+                break
+
+        return False
+
+    # soonest limit stop times
+    def soonest(self, limit):
+        self.stop_times.sort(key=lambda t: t[4])
+        return self.stop_times[:limit]
+
+
+# TRAINS FOR PAGE FROM STOP TIMES OF EACH OF ITS URLS (None where unavailable), soonest per_page first
+def page_trains(page, stop_time_lists, per_page):
+    trains = []
+    for stop_times in stop_time_lists:
+        if stop_times is None:
+            continue # show trains from other feeds of page
+
+        for stop, direction_name, train_symbol, destination_name, departure_time in stop_times:
+            if on_page(page, stop, direction_name, train_symbol):
+                trains.append((departure_time, train_symbol, destination_name))
+
+    trains.sort() # soonest first across feeds
+    return trains[:per_page]
+
+
+# GET MINUTES UNTIL NEXT count TRAINS AT CURRENT TIME, dropping departed trains (returns times and first train shown)
+def upcoming(trains, current_time, count, departed_delay):
+    times = []
+    first_train = None
+
+    for train in trains:
+        remaining_time = train[0] - current_time
+        if remaining_time < -departed_delay: # departed
+            continue
+
+        remaining_time = max(0, remaining_time // 60) # convert to minutes
+
+        if len(times) > 1 and remaining_time == 0:
+            continue # do not include more than one train in "0 minutes"
+
+        if first_train is None:
+            first_train = train
+
+        times.append(remaining_time)
+
+        if len(times) >= count: # get next trains
+            break
+
+    return times, first_train
+
+
+# FORMAT MINUTES FOR BOTTOM TEXT LABEL
+def format_times(times):
+    formatted_times = ','.join([str(t) for t in times[:3]]) # format next 3 times
+    if len(formatted_times) > 6:
+        formatted_times = ','.join([str(t) for t in times[:2]]) # format next 2 times if too long
+
+    return formatted_times
@@ -0,0 +1,263 @@
+# Benchmark streaming GTFS-realtime decoding (led_matrix.gtfsrt) against decoding the whole feed message
+#
+# usage: python tools/bench/gtfs_realtime.py [--feed FILE] [--alerts FILE] [--stops IDS] [--routes IDS] [--chunk BYTES]
+#
+# Without files, feeds are generated in the shape of an MTA subway trip update feed (trip updates and vehicle
+# positions for several routes) and the MTA subway alerts feed. Pass recorded feeds with --feed/--alerts to measure
+# real documents (e.g. saved from https://api-endpoint.mta.info/Dataservice/mtagtfsfeeds/nyct%2Fgtfs-nqrw). The
+# baseline decodes every entity into dicts before filtering, as a generated protobuf class would. Reports time per
+# feed, throughput and peak allocation (tracemalloc) for both, and checks that both find the same stop times.
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+
+
+# PARAMETERS
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'lib') # device libraries
+
+STOPS = ['Q03N', 'Q03S'] # as the default MTA_PAGES stop in subway/app.py
+ROUTES = ['Q'] # as the default MTA_PAGES routes in subway/app.py
+FEED_ROUTES = ['N', 'Q', 'R', 'W'] # routes in generated feed
+
+sys.path.insert(0, LIB_PATH)
+
+from led_matrix.gtfsrt import FeedAlerts, FeedItems, field, LENGTH, VARINT
+
+
+# ENCODE PROTOBUF
+def varint(value):
+    out = bytearray()
+    while True:
+        b = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def message(number, payload):
+    if isinstance(payload, str):
+        payload = payload.encode()
+    return varint(number << 3 | LENGTH) + varint(len(payload)) + payload
+
+
+def number(number, value):
+    return varint(number << 3 | VARINT) + varint(value)
+
+
+# GENERATE FEEDS
+def trip_feed(trips, seed=0):
+    rng = random.Random(seed)
+    now = 1700000000
+    stops = [f"Q{i:02d}" for i in range(1, 6)] + [f"R{i:02d}" for i in range(10, 45)]
+
+    header = message(1, message(1, "2.0") + number(2, 0) + number(3, now))
+    entities = []
+
+    for t in range(trips):
+        route = rng.choice(FEED_ROUTES)
+        uptown = rng.random() < 0.5
+        suffix = 'N' if uptown else 'S'
+        trip_id = f"{rng.randrange(100000, 999999)}_{route}..{suffix}{rng.randrange(10, 99)}R"
+        start = now - 1800 + 60 * t
+
+        trip = message(1, trip_id) + message(2, "12:00:00") + message(3, "20231114") + message(5, route)
+        updates = b''
+        for i, stop in enumerate(stops[rng.randrange(10):]):
+            arrival = start + 90 * i
+            updates += message(2, message(4, stop + suffix) + message(2, number(2, arrival)) + message(3, number(2, arrival + 30)))
+
+        entities.append(message(2, message(1, f"{t:06d}") + message(3, message(1, trip) + updates)))
+        entities.append(message(2, message(1, f"{t:06d}v") + message(4, message(1, trip) + number(3, 1) + number(5, now))))
+
+    return header + b''.join(entities), now
+
+
+def alerts_feed(alerts, seed=0):
+    rng = random.Random(seed)
+    now = 1700000000
+
+    header = message(1, message(1, "2.0") + number(3, now))
+    entities = []
+
+    for a in range(alerts):
+        route = rng.choice(FEED_ROUTES + ['A', 'C', 'E', '1', '2', '3'])
+        start = now + rng.randrange(-86400, 86400)
+        period = message(1, number(1, start) + number(2, start + 3600 * rng.randrange(1, 48)))
+        text = message(1, message(1, f"[{route}] trains are running with delays " + "x" * rng.randrange(200)) + message(2, "en"))
+        entities.append(message(2, message(1, f"a{a}") + message(5, period + message(5, message(1, "MTASBWY") + message(2, route)) + message(10, text))))
+
+    return header + b''.join(entities), now
+
+
+# FULL DECODE (every entity into dicts, then filter)
+def decode_message(data, i, end, schema):
+    out = {}
+    while i < end:
+        number_, wire_type, value, i = field(data, i)
+        name = schema.get(number_)
+        if name is None:
+            continue
+
+        if wire_type == LENGTH:
+            sub = SCHEMAS.get(name)
+            value = decode_message(data, value, i, sub) if sub is not None else data[value:i].decode()
+
+        if name in REPEATED:
+            out.setdefault(name, []).append(value)
+        else:
+            out[name] = value
+
+    return out
+
+
+SCHEMAS = {
+    'feed': {1: 'header', 2: 'entity'},
+    'header': {1: 'version', 2: 'incrementality', 3: 'timestamp'},
+    'entity': {1: 'id', 3: 'trip_update', 4: 'vehicle', 5: 'alert'},
+    'trip_update': {1: 'trip', 2: 'stop_time_update'},
+    'vehicle': {1: 'trip', 3: 'current_stop_sequence', 5: 'timestamp'},
+    'trip': {1: 'trip_id', 2: 'start_time', 3: 'start_date', 5: 'route_id'},
+    'stop_time_update': {2: 'arrival', 3: 'departure', 4: 'stop_id'},
+    'arrival': {2: 'time'},
+    'departure': {2: 'time'},
+    'alert': {1: 'active_period', 5: 'informed_entity', 10: 'header_text'},
+    'active_period': {1: 'start', 2: 'end'},
+    'informed_entity': {1: 'agency_id', 2: 'route_id'},
+    'header_text': {1: 'translation'},
+    'translation': {1: 'text', 2: 'language'},
+}
+REPEATED = {'entity', 'stop_time_update', 'active_period', 'informed_entity', 'translation'}
+
+
+def items_full(payload, current_time, chunk_size):
+    feed = decode_message(payload, 0, len(payload), SCHEMAS['feed'])
+    items = []
+
+    for entity in feed.get('entity', []):
+        trip_update = entity.get('trip_update')
+        if not trip_update or trip_update['trip'].get('route_id') not in ROUTES:
+            continue
+
+        updates = trip_update.get('stop_time_update', [])
+        last_stop = updates[-1]['stop_id']
+        for update in updates:
+            event = update.get('departure') or update.get('arrival')
+            if update['stop_id'] in STOPS and event:
+                items.append((trip_update['trip']['route_id'], update['stop_id'], event['time'], last_stop))
+
+    return items
+
+
+def items_stream(payload, current_time, chunk_size):
+    items = []
+    parser = FeedItems(STOPS, ROUTES, lambda item: items.append(item) and False)
+    for offset in range(0, len(payload), chunk_size):
+        if parser.feed(payload[offset:offset + chunk_size]):
+            break
+
+    return items
+
+
+def alerts_full(payload, current_time, chunk_size):
+    feed = decode_message(payload, 0, len(payload), SCHEMAS['feed'])
+    routes = []
+
+    for entity in feed.get('entity', []):
+        alert = entity.get('alert')
+        if not alert:
+            continue
+
+        periods = alert.get('active_period', [])
+        if periods and not any(p.get('start', 0) <= current_time and (not p.get('end') or current_time < p['end']) for p in periods):
+            continue
+
+        for selector in alert.get('informed_entity', []):
+            if selector.get('route_id') in ROUTES and selector['route_id'] not in routes:
+                routes.append(selector['route_id'])
+
+    return routes
+
+
+def alerts_stream(payload, current_time, chunk_size):
+    parser = FeedAlerts(ROUTES, current_time)
+    for offset in range(0, len(payload), chunk_size):
+        if parser.feed(payload[offset:offset + chunk_size]):
+            break
+
+    return parser.routes
+
+
+# MEASURE
+def measure(parse, payload, current_time, chunk_size, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parse(payload, current_time, chunk_size)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    parse(payload, current_time, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def report(name, payload, full, stream, current_time, chunk_size, repeat):
+    full_result, full_time, full_peak = measure(full, payload, current_time, chunk_size, repeat)
+    stream_result, stream_time, stream_peak = measure(stream, payload, current_time, chunk_size, repeat)
+
+    print(f"{name}: {len(payload)} bytes, {len(stream_result)} items")
+    print(f"  full decode {full_time * 1000:8.2f} ms  {len(payload) / full_time / 1e6:6.2f} MB/s  peak {full_peak:9d} bytes")
+    print(f"  gtfsrt      {stream_time * 1000:8.2f} ms  {len(payload) / stream_time / 1e6:6.2f} MB/s  peak {stream_peak:9d} bytes")
+    print(f"  match: {sorted(full_result) == sorted(stream_result)}")
+
+    return sorted(full_result) == sorted(stream_result)
+
+
+# RUN
+def main():
+    global STOPS, ROUTES
+
+    parser = argparse.ArgumentParser(description="benchmark streaming gtfs-realtime decoding against a full decode")
+    parser.add_argument('--feed', help="recorded GTFS-realtime trip update feed")
+    parser.add_argument('--alerts', help="recorded GTFS-realtime alerts feed")
+    parser.add_argument('--current-time', type=int, help="current time for recorded feeds [unix seconds]")
+    parser.add_argument('--stops', help="comma-separated GTFS stop IDs to find (default: %(default)s)", default=','.join(STOPS))
+    parser.add_argument('--routes', help="comma-separated route IDs to include (default: %(default)s)", default=','.join(ROUTES))
+    parser.add_argument('--trips', type=int, default=300, help="trips in generated trip update feed")
+    parser.add_argument('--alert-count', type=int, default=100, help="alerts in generated alerts feed")
+    parser.add_argument('--chunk', type=int, default=256, help="chunk size fed to the streaming decoder [bytes]")
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per decoder")
+    args = parser.parse_args()
+
+    STOPS = args.stops.split(',')
+    ROUTES = args.routes.split(',')
+
+    if args.feed:
+        with open(args.feed, 'rb') as file:
+            feed = file.read()
+        current_time = args.current_time or int(time.time())
+    else:
+        feed, current_time = trip_feed(args.trips)
+
+    if args.alerts:
+        with open(args.alerts, 'rb') as file:
+            alerts = file.read()
+    else:
+        alerts = alerts_feed(args.alert_count)[0] # generated around the same time as the generated trip feed
+
+    ok = report("trip updates", feed, items_full, items_stream, current_time, args.chunk, args.repeat)
+    ok = report("alerts", alerts, alerts_full, alerts_stream, current_time, args.chunk, args.repeat) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
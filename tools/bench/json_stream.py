@@ -0,0 +1,247 @@
+# Benchmark streaming JSON field extraction (led_matrix.jsonstream) against json.loads on the full document
+#
+# usage: python tools/bench/json_stream.py [--stop FILE] [--player FILE] [--stop-times N] [--chunk BYTES] [--repeat N]
+#
+# Without files, payloads are generated in the shape of a Transiter stop response (skip_service_maps, skip_alerts,
+# skip_transfers) and a Spotify currently-playing response. Pass recorded responses with --stop/--player to measure
+# real documents. Reports time per document and peak allocation (tracemalloc) for both parsers, and checks that the
+# streaming parser returns the same fields as the full parse.
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tracemalloc
+
+
+# PARAMETERS
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'lib') # device libraries
+
+STOP_TIME_FIELDS = (('headsign',), ('trip', 'route', 'id'), ('destination', 'name'), ('departure', 'time')) # as in subway/app.py
+STOP_DIRECTIONS = ['downtown and brooklyn', 'downtown', 'brooklyn'] # as default MTA_PAGES directions in subway/app.py
+TRAINS = 3 # trains read before the subway app stops
+
+CURRENTLY_PLAYING_FIELDS = (
+    ('is_playing',),
+    ('item', 'name'),
+    ('item', 'artists', '*', 'name'),
+    ('item', 'album', 'name'),
+    ('item', 'album', 'images', '*', 'url'),
+    ('item', 'album', 'images', '*', 'width'),
+    ('item', 'album', 'images', '*', 'height'),
+) # as in spotify/app.py
+
+sys.path.insert(0, LIB_PATH)
+
+from led_matrix.jsonstream import JsonItems
+
+
+# GENERATE PAYLOADS
+def stop_payload(stop_times, seed=0):
+    rng = random.Random(seed)
+    now = 1700000000
+
+    def stop_time(i):
+        uptown = rng.random() < 0.5
+        route = rng.choice(['Q', 'N', 'R', 'W'])
+        departure = now + 30 * i + rng.randrange(30)
+        trip_id = f"{rng.randrange(100000, 999999)}_{route}..{'N' if uptown else 'S'}{rng.randrange(10, 99)}R"
+
+        return {
+            'stop': {'id': 'Q03N' if uptown else 'Q03S', 'name': '72 St', 'resource': None},
+            'trip': {
+                'id': trip_id,
+                'resource': {'path': f"systems/us-ny-subway/routes/{route}/trips/{trip_id}"},
+                'route': {'id': route, 'color': 'FCCC0A', 'resource': {'path': f"systems/us-ny-subway/routes/{route}"}},
+                'destination': {'id': 'R01' if uptown else 'D43', 'name': 'Astoria-Ditmars Blvd' if uptown else 'Coney Island-Stillwell Av'},
+                'vehicle': None,
+                'directionId': not uptown,
+            },
+            'arrival': {'time': str(departure - 30), 'delay': 0, 'uncertainty': 0},
+            'departure': {'time': str(departure), 'delay': 0, 'uncertainty': 0},
+            'future': True,
+            'stopSequence': rng.randrange(1, 40),
+            'headsign': 'Uptown and Queens' if uptown else 'Downtown and Brooklyn',
+            'track': '',
+            'destination': {'id': 'R01' if uptown else 'D43', 'name': 'Astoria-Ditmars Blvd' if uptown else 'Coney Island-Stillwell Av'},
+        }
+
+    document = {
+        'id': 'Q03', 'code': '', 'name': '72 St', 'description': '', 'zoneId': '',
+        'latitude': 40.768799, 'longitude': -73.958424, 'url': '', 'type': 'STATION',
+        'parentStop': None,
+        'childStops': [{'id': 'Q03N', 'name': '72 St'}, {'id': 'Q03S', 'name': '72 St'}],
+        'timezone': '', 'wheelchairBoarding': None, 'platformCode': '',
+        'serviceMaps': [], 'alerts': [], 'transfers': [], 'headsignRules': [],
+        'stopTimes': [stop_time(i) for i in range(stop_times)],
+    }
+
+    return json.dumps(document).encode(), now
+
+
+def player_payload(seed=0):
+    rng = random.Random(seed)
+    markets = [f"{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}" for _ in range(185)]
+
+    def artist(i):
+        return {
+            'external_urls': {'spotify': f"https://open.spotify.com/artist/{i:022d}"},
+            'href': f"https://api.spotify.com/v1/artists/{i:022d}",
+            'id': f"{i:022d}", 'name': f"Artist {i}", 'type': 'artist', 'uri': f"spotify:artist:{i:022d}",
+        }
+
+    album = {
+        'album_type': 'album', 'artists': [artist(1)], 'available_markets': markets,
+        'external_urls': {'spotify': 'https://open.spotify.com/album/0000000000000000000001'},
+        'href': 'https://api.spotify.com/v1/albums/0000000000000000000001', 'id': '0000000000000000000001',
+        'images': [
+            {'height': size, 'url': f"https://i.scdn.co/image/ab67616d0000{size:04d}0000000000000000000000000001", 'width': size}
+            for size in (640, 300, 64)
+        ],
+        'name': 'Album é', 'release_date': '2020-01-01', 'release_date_precision': 'day', 'total_tracks': 12,
+        'type': 'album', 'uri': 'spotify:album:0000000000000000000001',
+    }
+
+    document = {
+        'device': {'id': '0' * 40, 'is_active': True, 'is_private_session': False, 'is_restricted': False,
+                   'name': 'Speaker', 'type': 'Speaker', 'volume_percent': 50, 'supports_volume': True},
+        'repeat_state': 'off', 'shuffle_state': False,
+        'context': {'type': 'playlist', 'href': 'https://api.spotify.com/v1/playlists/1', 'uri': 'spotify:playlist:1'},
+        'timestamp': 1700000000000, 'progress_ms': 12345, 'currently_playing_type': 'track',
+        'actions': {'disallows': {'resuming': True}},
+        'item': {
+            'album': album, 'artists': [artist(i) for i in range(1, 4)], 'available_markets': markets,
+            'disc_number': 1, 'duration_ms': 200000, 'explicit': False, 'external_ids': {'isrc': 'USXXX0000001'},
+            'external_urls': {'spotify': 'https://open.spotify.com/track/0000000000000000000001'},
+            'href': 'https://api.spotify.com/v1/tracks/0000000000000000000001', 'id': '0000000000000000000001',
+            'is_local': False, 'name': 'Song \\"Title\\"', 'popularity': 50, 'preview_url': None, 'track_number': 1,
+            'type': 'track', 'uri': 'spotify:track:0000000000000000000001',
+        },
+        'is_playing': True,
+    }
+
+    return json.dumps(document).encode()
+
+
+# SELECT TRAINS (same filtering as get_train in subway/app.py), returning trains and a function adding one stop time
+def train_filter(current_time):
+    trains = []
+
+    def add_train(t):
+        direction_name, symbol, destination, departure_time = t
+
+        if direction_name and direction_name.lower() in STOP_DIRECTIONS:
+            remaining_time = max(0, int((int(departure_time) - current_time) / 60))
+            if len(trains) > 1 and remaining_time == 0:
+                return False
+            trains.append((symbol, destination, remaining_time))
+
+        return len(trains) >= TRAINS
+
+    return trains, add_train
+
+
+# PARSERS
+def stop_full(payload, current_time, chunk_size):
+    document = json.loads(payload)
+    trains, add_train = train_filter(current_time)
+
+    for t in document['stopTimes']:
+        if add_train((t.get('headsign'), t['trip']['route']['id'], t['destination']['name'], t['departure']['time'])):
+            break
+
+    return trains
+
+
+def stop_stream(payload, current_time, chunk_size):
+    trains, add_train = train_filter(current_time)
+
+    parser = JsonItems(('stopTimes',), STOP_TIME_FIELDS, add_train)
+    for offset in range(0, len(payload), chunk_size):
+        if parser.feed(payload[offset:offset + chunk_size]):
+            break
+
+    return trains
+
+
+def player_full(payload, current_time, chunk_size):
+    data = json.loads(payload)
+    item = data['item']
+    album = item['album']
+    return [
+        data['is_playing'], item['name'], [a['name'] for a in item['artists']], album['name'],
+        [i['url'] for i in album['images']], [i['width'] for i in album['images']], [i['height'] for i in album['images']],
+    ]
+
+
+def player_stream(payload, current_time, chunk_size):
+    values = []
+    parser = JsonItems((), CURRENTLY_PLAYING_FIELDS, lambda item: values.append(item) or True)
+    for offset in range(0, len(payload), chunk_size):
+        if parser.feed(payload[offset:offset + chunk_size]):
+            break
+
+    return values[0] if values else None
+
+
+# MEASURE
+def measure(parse, payload, current_time, chunk_size, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = parse(payload, current_time, chunk_size)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    parse(payload, current_time, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def report(name, payload, full, stream, current_time, chunk_size, repeat):
+    full_result, full_time, full_peak = measure(full, payload, current_time, chunk_size, repeat)
+    stream_result, stream_time, stream_peak = measure(stream, payload, current_time, chunk_size, repeat)
+
+    print(f"{name}: {len(payload)} bytes")
+    print(f"  json.loads  {full_time * 1000:8.2f} ms  peak {full_peak:9d} bytes")
+    print(f"  jsonstream  {stream_time * 1000:8.2f} ms  peak {stream_peak:9d} bytes")
+    print(f"  match: {full_result == stream_result}")
+
+    return full_result == stream_result
+
+
+# RUN
+def main():
+    parser = argparse.ArgumentParser(description="benchmark streaming json extraction against json.loads")
+    parser.add_argument('--stop', help="recorded Transiter stop response")
+    parser.add_argument('--player', help="recorded Spotify currently-playing response")
+    parser.add_argument('--current-time', type=int, help="current time for a recorded stop response [unix seconds]")
+    parser.add_argument('--stop-times', type=int, default=200, help="stop times in generated stop response")
+    parser.add_argument('--chunk', type=int, default=256, help="chunk size fed to the streaming parser [bytes]")
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per parser")
+    args = parser.parse_args()
+
+    if args.stop:
+        with open(args.stop, 'rb') as file:
+            stop = file.read()
+        current_time = args.current_time or int(time.time())
+    else:
+        stop, current_time = stop_payload(args.stop_times)
+
+    if args.player:
+        with open(args.player, 'rb') as file:
+            player = file.read()
+    else:
+        player = player_payload()
+
+    ok = report("stop", stop, stop_full, stop_stream, current_time, args.chunk, args.repeat)
+    ok = report("currently playing", player, player_full, player_stream, current_time, args.chunk, args.repeat) and ok
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+# Benchmark album art downscaling: the single-pixel pick the Spotify app used before (one corner of each 2x2 block)
+# against led_matrix.resample area averaging, at the app's 64x64 to 32x32 and at fractional ratios
+#
+# usage: python tools/bench/resample.py [--repeat N]
+#        (on device: copy to CIRCUITPY as code.py, with src/lib installed, and read the serial console)
+#
+# Runs on CPython with the displayio stand-ins in tools/emulator (row-buffer path), and on the device itself, where the
+# ulab bulk path is used for power-of-two ratios if the build has ulab. The source is a synthetic RGB565_SWAPPED image
+# with fine detail (stripes and a checkerboard), as album art downsampling is where aliasing shows. Reports time per
+# image and mean error per channel against the exact area average (RGB565 levels).
+
+import sys
+import time
+import asyncio
+
+try:
+    from displayio import Bitmap
+except ImportError: # host, with the emulator stand-ins
+    import os
+
+    HERE = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [os.path.join(HERE, '..', 'emulator'), os.path.join(HERE, '..', '..', 'src', 'lib')]
+
+    from displayio import Bitmap
+
+from led_matrix import resample
+from led_matrix.resample import Resampler
+
+
+# PARAMETERS
+SOURCE_SIZE = 64 # decoded album art size, as IMAGE_SIZE in spotify/app.py [pixels]
+SIZES = [32, 24, 16] # output sizes measured (32 as in spotify/app.py) [pixels]
+REPEAT = 5 # timed runs per case
+
+
+# SOURCE IMAGE
+def swap(value):
+    return ((value & 0xFF) << 8) | (value >> 8)
+
+
+def make_source():
+    bitmap = Bitmap(SOURCE_SIZE, SOURCE_SIZE, 65535)
+    for y in range(SOURCE_SIZE):
+        for x in range(SOURCE_SIZE):
+            if y < SOURCE_SIZE // 2:
+                red, green, blue = (31, 63, 31) if x % 2 else (0, 0, 0) # one pixel stripes
+            else:
+                red, green, blue = (31, 0, 0) if (x + y) % 2 else (0, 0, 31) # checkerboard
+            bitmap[x, y] = swap(red << 11 | (green + x % 3) << 5 | blue) # slight gradient in green
+
+    return bitmap
+
+
+def channels(value):
+    value = swap(value)
+    return value >> 11, (value >> 5) & 0x3F, value & 0x1F
+
+
+# EXACT AREA AVERAGE OF OUTPUT PIXEL (reference, floating point)
+def reference(source, size, x, y):
+    scale = SOURCE_SIZE / size
+    sums = [0.0, 0.0, 0.0]
+
+    for sy in range(int(y * scale), min(SOURCE_SIZE, int((y + 1) * scale + 0.999999))):
+        height = min(sy + 1, (y + 1) * scale) - max(sy, y * scale)
+        for sx in range(int(x * scale), min(SOURCE_SIZE, int((x + 1) * scale + 0.999999))):
+            width = min(sx + 1, (x + 1) * scale) - max(sx, x * scale)
+            for c, value in enumerate(channels(source[sx, sy])):
+                sums[c] += value * width * height
+
+    return [s / (scale * scale) for s in sums]
+
+
+def error(source, output, size):
+    total = [0.0, 0.0, 0.0]
+    for y in range(size):
+        for x in range(size):
+            exact = reference(source, size, x, y)
+            for c, value in enumerate(channels(output[x, y])):
+                total[c] += abs(value - exact[c])
+
+    return [t / (size * size) for t in total]
+
+
+# METHODS
+async def pick(source, output):
+    step = SOURCE_SIZE // output.width
+    for y in range(0, SOURCE_SIZE, step):
+        for x in range(0, SOURCE_SIZE, step):
+            output[x // step, y // step] = source[x, y] # as downsample_bitmap in spotify/app.py (corner [0, 0])
+
+        await asyncio.sleep(0)
+
+
+def measure(method, source, output, repeat):
+    start = time.monotonic_ns()
+    for _ in range(repeat):
+        asyncio.run(method(source, output))
+
+    return (time.monotonic_ns() - start) / repeat / 1e6
+
+
+# RUN
+def main(repeat):
+    source = make_source()
+    print(f"ulab bulk path available: {resample.np is not None}")
+    print(f"{'method':<10}{'size':>6}{'ms':>9}{'red':>7}{'green':>7}{'blue':>7}")
+
+    for size in SIZES:
+        output = Bitmap(size, size, 65535)
+        resampler = Resampler(SOURCE_SIZE, SOURCE_SIZE, size, size)
+
+        cases = [('area', resampler.resample)]
+        if SOURCE_SIZE % size == 0:
+            cases.insert(0, ('pick', pick))
+
+        for name, method in cases:
+            ms = measure(method, source, output, repeat)
+            red, green, blue = error(source, output, size)
+            print(f"{name:<10}{size:>6}{ms:>9.2f}{red:>7.2f}{green:>7.2f}{blue:>7.2f}")
+
+
+if __name__ == '__main__':
+    try:
+        import argparse
+    except ImportError: # device
+        main(REPEAT)
+    else:
+        parser = argparse.ArgumentParser(description="benchmark album art downscaling")
+        parser.add_argument('--repeat', type=int, default=REPEAT, help="timed runs per case")
+        main(parser.parse_args().repeat)
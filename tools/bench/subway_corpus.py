@@ -0,0 +1,214 @@
+# Run the subway parsing and filtering pipeline over a corpus of Transiter responses and check its output
+#
+# usage: python tools/bench/subway_corpus.py [--corpus DIR] [--chunk BYTES] [--repeat N] [--update]
+#        python tools/bench/subway_corpus.py --record-stop Q03 --record-route Q
+#
+# Each fixture in the corpus manifest names a response body (several fixtures may share one), its kind (Transiter stop
+# or route document), the time it was recorded at and the board pages to select trains for. Stop documents go through
+# the same code as get_stop and get_train in subway/app.py (led_matrix.jsonstream feeding led_matrix.transit), route
+# documents through get_alert. Records are stop times or alerts parsed before the app would stop reading.
+# Reports records/s, throughput and peak allocation (tracemalloc) per fixture, checks the streamed stop times against
+# a json.loads parse of the same document, and checks the selected trains against the expected output stored in the
+# manifest (--update rewrites it after an intended change). --record-stop/--record-route save live responses into the
+# corpus, with all directions selected (edit the manifest pages to narrow them).
+
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+import urllib.request
+from email.utils import parsedate_to_datetime
+
+
+# PARAMETERS
+LIB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'src', 'lib') # device libraries
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus', 'subway') # fixtures and manifest
+MANIFEST_NAME = "manifest.json"
+
+RECORD_DIRECTIONS = [
+    'uptown', 'downtown', 'manhattan', 'brooklyn', 'queens', 'the bronx',
+    'uptown and queens', 'uptown and the bronx', 'downtown and brooklyn',
+] # directions selected for recorded stops
+
+sys.path.insert(0, LIB_PATH)
+
+from led_matrix.jsonstream import JsonItems
+from led_matrix.transit import ALERTS_PATH, DEPARTED_DELAY, MAX_STOP_TIMES, MTA_ROUTE_URL, MTA_STOP_URL, STOP_TIME_FIELDS, STOP_TIMES_PATH, STOP_TIMES_PER_PAGE, TRAINS, StopTimes, format_times, page_trains, upcoming # same parameters as subway/app.py
+
+
+# PIPELINE (as subway/app.py, fed in chunks as read from the socket)
+def feed(parser, payload, chunk_size):
+    for offset in range(0, len(payload), chunk_size):
+        if parser.feed(payload[offset:offset + chunk_size]):
+            return min(offset + chunk_size, len(payload)) # bytes read before the parser stopped
+
+    return len(payload)
+
+
+def run_stop(payload, fixture, chunk_size):
+    stop_times = StopTimes(fixture['pages'], STOP_TIMES_PER_PAGE, MAX_STOP_TIMES)
+    parser = JsonItems(STOP_TIMES_PATH, STOP_TIME_FIELDS, stop_times.add)
+    read = feed(parser, payload, chunk_size)
+
+    board = []
+    for page in fixture['pages']:
+        trains = page_trains(page, [stop_times.stop_times], STOP_TIMES_PER_PAGE)
+        times, first_train = upcoming(trains, fixture['current_time'], TRAINS, DEPARTED_DELAY)
+        board.append({
+            'trains': trains,
+            'destination': first_train[2] if first_train else None,
+            'times': format_times(times),
+        })
+
+    return parser.count, read, stop_times.stop_times, board
+
+
+def run_route(payload, fixture, chunk_size):
+    parser = JsonItems(ALERTS_PATH, (), lambda alert: True) # stop at first alert
+    read = feed(parser, payload, chunk_size)
+
+    return parser.count, read, None, {'alert': parser.count > 0}
+
+
+PIPELINES = {'stop': run_stop, 'route': run_route}
+
+
+# REFERENCE (json.loads of the whole document, fields looked up on the parsed objects)
+def lookup(value, path):
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+
+    return value
+
+
+def reference_stop_times(payload, fixture):
+    document = json.loads(payload)
+
+    stop_times = StopTimes(fixture['pages'], STOP_TIMES_PER_PAGE, MAX_STOP_TIMES)
+    for item in lookup(document, STOP_TIMES_PATH) or []:
+        if stop_times.add(tuple(lookup(item, path) for path in STOP_TIME_FIELDS)):
+            break
+
+    return stop_times.stop_times
+
+
+# MEASURE
+def measure(pipeline, payload, fixture, chunk_size, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = pipeline(payload, fixture, chunk_size)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    pipeline(payload, fixture, chunk_size)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, elapsed, peak
+
+
+def normalize(value):
+    return json.loads(json.dumps(value)) # tuples as lists, as stored in the manifest
+
+
+# CORPUS
+def load_manifest(corpus):
+    with open(os.path.join(corpus, MANIFEST_NAME), 'r') as file:
+        return json.load(file)
+
+
+def save_manifest(corpus, manifest):
+    with open(os.path.join(corpus, MANIFEST_NAME), 'w') as file:
+        json.dump(manifest, file, indent=2, ensure_ascii=False)
+        file.write('\n')
+
+
+def record(corpus, manifest, kind, id):
+    url = (MTA_STOP_URL if kind == 'stop' else MTA_ROUTE_URL).format(id)
+    with urllib.request.urlopen(url, timeout=30) as response:
+        payload = response.read()
+        current_time = int(parsedate_to_datetime(response.headers['Date']).timestamp())
+
+    name = f"{kind}-{id.lower()}-{current_time}.json"
+    with open(os.path.join(corpus, name), 'wb') as file:
+        file.write(payload)
+
+    fixture = {'file': name, 'kind': kind, 'current_time': current_time, 'note': f"recorded from {url}"}
+    if kind == 'stop':
+        fixture['pages'] = [{'stop': id, 'routes': None, 'directions': RECORD_DIRECTIONS}]
+
+    manifest['fixtures'].append(fixture)
+    print(f"recorded {name} ({len(payload)} bytes)")
+
+    return fixture
+
+
+# RUN
+def main():
+    parser = argparse.ArgumentParser(description="run the subway parsing pipeline over a corpus of recorded responses")
+    parser.add_argument('--corpus', default=CORPUS_PATH, help="corpus directory (with %s)" % MANIFEST_NAME)
+    parser.add_argument('--chunk', type=int, default=256, help="chunk size fed to the streaming parser [bytes]")
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per fixture")
+    parser.add_argument('--update', action='store_true', help="store current output as expected output")
+    parser.add_argument('--record-stop', action='append', default=[], help="record live Transiter stop response (stop ID)")
+    parser.add_argument('--record-route', action='append', default=[], help="record live Transiter route response (route ID)")
+    args = parser.parse_args()
+
+    manifest = load_manifest(args.corpus)
+
+    recorded = [record(args.corpus, manifest, 'stop', id) for id in args.record_stop]
+    recorded += [record(args.corpus, manifest, 'route', id) for id in args.record_route]
+
+    print(f"{'fixture':36} {'bytes':>7} {'read':>7} {'records':>7} {'ms':>7} {'records/s':>10} {'MB/s':>6} {'peak':>8}  ok")
+
+    ok = True
+    total_records = total_bytes = total_read = total_time = 0
+    for fixture in manifest['fixtures']:
+        with open(os.path.join(args.corpus, fixture['file']), 'rb') as file:
+            payload = file.read()
+
+        pipeline = PIPELINES[fixture['kind']]
+        (records, read, stop_times, output), elapsed, peak = measure(pipeline, payload, fixture, args.chunk, args.repeat)
+        output = normalize(output)
+
+        # streamed stop times as parsed by json.loads, output as expected
+        problems = []
+        if stop_times is not None and stop_times != reference_stop_times(payload, fixture):
+            problems.append("stop times differ from json.loads")
+
+        if args.update or fixture in recorded:
+            fixture['expected'] = output
+        elif output != fixture.get('expected'):
+            problems.append(f"output {output} != expected {fixture.get('expected')}")
+
+        total_records += records
+        total_bytes += len(payload)
+        total_read += read
+        total_time += elapsed
+
+        print(
+            f"{fixture.get('name', fixture['file']):36} {len(payload):7d} {read:7d} {records:7d} {elapsed * 1000:7.2f} "
+            f"{records / elapsed:10.0f} {read / elapsed / 1e6:6.2f} {peak:8d}  {'no' if problems else 'yes'}"
+        )
+        for problem in problems:
+            print(f"  {problem}")
+
+        ok = ok and not problems
+
+    print(
+        f"{'total':36} {total_bytes:7d} {total_read:7d} {total_records:7d} {total_time * 1000:7.2f} "
+        f"{total_records / total_time:10.0f} {total_read / total_time / 1e6:6.2f}"
+    )
+
+    if args.update or recorded:
+        save_manifest(args.corpus, manifest)
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
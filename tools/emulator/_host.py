@@ -0,0 +1,216 @@
+# Host-side state shared by the emulator modules: configuration, frame statistics, frame dumps,
+# device filesystem mapping and heap accounting
+
+import os
+import sys
+import zlib
+import time
+import signal
+import struct
+import weakref
+import builtins
+import tracemalloc
+
+
+# CONFIGURATION (set by run.py)
+config = {
+    'root': None, # host directory mapped to the device filesystem root "/"
+    'dump_dir': None, # directory for frame dumps (None to disable)
+    'dump_format': 'png', # frame dump format ("png" or "npy")
+    'dump_every': 1, # dump every Nth frame
+    'heap_size': 2000000, # emulated heap size for gc.mem_free() [bytes]
+    'max_frames': None, # stop after this many frames (None to run until interrupted)
+}
+
+
+# STATISTICS
+stats = {
+    'start': None, # time of first frame [seconds]
+    'end': None, # time of last frame [seconds]
+    'frames': 0, # frames composited
+    'composite_times': [], # composite time per frame [seconds]
+    'mem_free_min': None, # lowest gc.mem_free() observed [bytes]
+    'alloc_count': 0, # displayio objects allocated
+    'alloc_bytes': 0, # device-equivalent bytes allocated by displayio objects [bytes]
+    'live_bytes': 0, # device-equivalent bytes held by live displayio objects [bytes]
+    'live_bytes_peak': 0, # peak of live_bytes [bytes]
+}
+
+_displays = []
+_heap_baseline = 0
+
+
+# HEAP ACCOUNTING
+def track_alloc(obj, size):
+    stats['alloc_count'] += 1
+    stats['alloc_bytes'] += size
+    stats['live_bytes'] += size
+    stats['live_bytes_peak'] = max(stats['live_bytes_peak'], stats['live_bytes'])
+
+    weakref.finalize(obj, _track_free, size)
+
+
+def _track_free(size):
+    stats['live_bytes'] -= size
+
+
+def start_heap():
+    global _heap_baseline
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _heap_baseline = tracemalloc.get_traced_memory()[0]
+
+
+def mem_alloc():
+    if not tracemalloc.is_tracing():
+        return stats['live_bytes']
+    return max(0, tracemalloc.get_traced_memory()[0] - _heap_baseline)
+
+
+def mem_free():
+    free = max(0, config['heap_size'] - mem_alloc())
+
+    if stats['mem_free_min'] is None or free < stats['mem_free_min']:
+        stats['mem_free_min'] = free
+
+    return free
+
+
+# DISPLAYS
+def register_display(display):
+    _displays.append(display)
+
+
+def release_displays():
+    while _displays:
+        _displays.pop()._release()
+
+
+def record_frame(width, height, rgb, composite_time):
+    now = time.monotonic()
+    if stats['start'] is None:
+        stats['start'] = now
+    stats['end'] = now
+
+    index = stats['frames']
+    stats['frames'] += 1
+    stats['composite_times'].append(composite_time)
+
+    if config['dump_dir'] and index % config['dump_every'] == 0:
+        dump_frame(index, width, height, rgb)
+
+    if config['max_frames'] and stats['frames'] >= config['max_frames']:
+        interrupt() # stop the app from the refresh thread
+
+
+# STOP THE APP (raises KeyboardInterrupt in the main thread, also during time.sleep)
+def interrupt():
+    os.kill(os.getpid(), signal.SIGINT)
+
+
+# RAISE KeyboardInterrupt ON SIGINT EVEN INSIDE asyncio.run (whose own handler only cancels the main task, so a blocking
+# time.sleep in a task, e.g. power.sleep, would resume)
+def install_interrupt():
+    def handler(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGINT, handler)
+
+
+# FRAME DUMPS
+def dump_frame(index, width, height, rgb):
+    path = os.path.join(config['dump_dir'], f"frame_{index:06d}.{config['dump_format']}")
+
+    if config['dump_format'] == 'npy':
+        data = _encode_npy(width, height, rgb)
+    else:
+        data = _encode_png(width, height, rgb)
+
+    with _host_open(path, 'wb') as file:
+        file.write(data)
+
+
+def _encode_png(width, height, rgb):
+    raw = b''.join(b'\x00' + bytes(rgb[y*width*3:(y+1)*width*3]) for y in range(height)) # filter type 0 per row
+
+    def chunk(tag, body):
+        return struct.pack('>I', len(body)) + tag + body + struct.pack('>I', zlib.crc32(tag + body) & 0xFFFFFFFF)
+
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        + chunk(b'IDAT', zlib.compress(raw))
+        + chunk(b'IEND', b'')
+    )
+
+
+def _encode_npy(width, height, rgb):
+    header = f"{{'descr': '|u1', 'fortran_order': False, 'shape': ({height}, {width}, 3), }}"
+    header += ' ' * (63 - (len(header) + 10) % 64) + '\n' # pad header so data is 64-byte aligned
+
+    return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1') + bytes(rgb)
+
+
+# REPORT
+def report(file=sys.stdout):
+    frames = stats['frames']
+    times = sorted(stats['composite_times'])
+
+    print(f"frames: {frames}", file=file)
+
+    if frames > 1:
+        elapsed = stats['end'] - stats['start']
+        print(f"elapsed: {elapsed:.2f} s", file=file)
+        print(f"fps: {(frames - 1) / elapsed:.1f}" if elapsed > 0 else "fps: n/a", file=file)
+
+    if times:
+        avg = sum(times) / len(times)
+        p95 = times[min(len(times) - 1, int(0.95 * len(times)))]
+        print(f"composite [ms]: min {1000*times[0]:.2f} avg {1000*avg:.2f} p95 {1000*p95:.2f} max {1000*times[-1]:.2f}", file=file)
+
+    print(f"displayio allocations: {stats['alloc_count']} ({stats['alloc_bytes']} bytes, peak live {stats['live_bytes_peak']} bytes)", file=file)
+
+    if stats['mem_free_min'] is not None:
+        print(f"mem_free min: {stats['mem_free_min']} bytes (of {config['heap_size']})", file=file)
+
+
+# DEVICE FILESYSTEM MAPPING
+_host_open = builtins.open
+_host_stat = os.stat
+_host_rename = os.rename
+_host_remove = os.remove
+_host_listdir = os.listdir
+_host_mkdir = os.mkdir
+
+
+def _host_exists(path):
+    try:
+        _host_stat(path)
+        return True
+    except OSError:
+        return False
+
+
+def device_path(path):
+    root = config['root']
+
+    if root is None or not isinstance(path, str) or not path.startswith('/'):
+        return path
+
+    parts = path.strip('/').split('/')
+    if len(parts) == 1 or _host_exists(os.path.join(root, parts[0])):
+        return os.path.join(root, *parts) # map top-level device files and existing device directories
+
+    return path # leave host paths (e.g. /usr/...) untouched
+
+
+def install_filesystem(root):
+    config['root'] = root
+
+    builtins.open = lambda file, *args, **kwargs: _host_open(device_path(file), *args, **kwargs)
+    os.stat = lambda path, *args, **kwargs: _host_stat(device_path(path), *args, **kwargs)
+    os.rename = lambda src, dst, *args, **kwargs: _host_rename(device_path(src), device_path(dst), *args, **kwargs)
+    os.remove = lambda path, *args, **kwargs: _host_remove(device_path(path), *args, **kwargs)
+    os.listdir = lambda path='.': _host_listdir(device_path(path))
+    os.mkdir = lambda path, *args, **kwargs: _host_mkdir(device_path(path), *args, **kwargs)
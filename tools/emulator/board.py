@@ -0,0 +1,19 @@
+# CPython stand-in for the Matrix Portal S3 board module (pins are named placeholders)
+
+
+# PIN
+class Pin:
+    def __init__(self, name):
+        self._name = name
+
+    def __repr__(self):
+        return f"board.{self._name}"
+
+
+for _name in [
+    'MTX_R1', 'MTX_G1', 'MTX_B1', 'MTX_R2', 'MTX_G2', 'MTX_B2',
+    'MTX_ADDRA', 'MTX_ADDRB', 'MTX_ADDRC', 'MTX_ADDRD', 'MTX_ADDRE',
+    'MTX_CLK', 'MTX_LAT', 'MTX_OE',
+    'NEOPIXEL', 'LED', 'BUTTON_UP', 'BUTTON_DOWN', 'ACCELEROMETER_INTERRUPT', 'SCL', 'SDA',
+]:
+    globals()[_name] = Pin(_name)
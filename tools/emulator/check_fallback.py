@@ -0,0 +1,138 @@
+# Check the subway app falls back to the static schedule when Transiter answers with an error status
+#
+# usage: python tools/emulator/check_fallback.py [--status CODE] [--duration SECONDS]
+#
+# Builds a schedule index from a generated GTFS (a downtown Q train every 10 minutes, every day), serves error
+# responses with a JSON body (as Transiter does for a 503) from a local server, and runs the subway app in the emulator
+# against it, with VERBOSE on and the board kept on at every hour. Passes (exit status 0) if the app shows scheduled
+# departures, which needs the error status to read as no live data rather than as an empty stop document.
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+
+# PARAMETERS
+HERE = os.path.dirname(os.path.abspath(__file__))
+SRC_PATH = os.path.join(HERE, '..', '..', 'src') # device filesystem
+SCHEDULE_SCRIPT = os.path.join(HERE, '..', '..', 'setup', 'app', 'subway', 'schedule.py')
+
+STOP = 'Q03' # as the default MTA_PAGES stop in subway/app.py
+ROUTE = 'Q'
+STATUS = 503 # error status served for every request
+DURATION = 8 # emulator run time [seconds]
+
+PASS_MARK = "scheduled: True" # printed per page by subway/app.py display_loop when VERBOSE
+
+
+# GTFS (departures at STOP every 10 minutes around the clock, trips after midnight past 24:00 as GTFS allows)
+def write_gtfs(path):
+    trips = [f"t{minute}" for minute in range(0, 28 * 60, 10)]
+
+    tables = {
+        'stops.txt': ["stop_id,stop_name", f"{STOP},72 St", "R27,Whitehall St"],
+        'calendar.txt': ["service_id,monday,tuesday,wednesday,thursday,friday,saturday,sunday", "D,1,1,1,1,1,1,1"],
+        'trips.txt': ["route_id,service_id,trip_id"] + [f"{ROUTE},D,{trip}" for trip in trips],
+        'stop_times.txt': ["trip_id,arrival_time,departure_time,stop_id,stop_sequence"],
+    }
+    for trip in trips:
+        minute = int(trip[1:])
+        for sequence, (stop_id, offset) in enumerate([(f"{STOP}S", 0), ("R27S", 20)]):
+            time = f"{(minute + offset) // 60:02d}:{(minute + offset) % 60:02d}:00"
+            tables['stop_times.txt'].append(f"{trip},{time},{time},{stop_id},{sequence + 1}")
+
+    for name, lines in tables.items():
+        with open(os.path.join(path, name), 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+
+# LOCAL SERVER (error status with a JSON body for every path, Date header set by the server)
+def serve(status):
+    body = json.dumps({'message': 'service unavailable'}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+# SET MODULE PARAMETERS IN A DEVICE FILE (NAME = value lines)
+def set_parameters(path, values):
+    with open(path) as file:
+        lines = file.read().split('\n')
+
+    for i, line in enumerate(lines):
+        name = line.split(' = ', 1)[0]
+        if name in values:
+            lines[i] = f"{name} = {values[name]}"
+
+    with open(path, 'w') as file:
+        file.write('\n'.join(lines))
+
+
+# RUN
+def main(status, duration):
+    work = tempfile.mkdtemp(prefix='led-matrix-check-')
+    root = os.path.join(work, 'CIRCUITPY')
+    gtfs = os.path.join(work, 'gtfs')
+    shutil.copytree(SRC_PATH, root)
+    os.makedirs(gtfs)
+
+    try:
+        write_gtfs(gtfs)
+        subprocess.run([sys.executable, SCHEDULE_SCRIPT, '--gtfs', gtfs, '--stop', STOP, '--route', ROUTE, '--output', os.path.join(root, 'app', 'subway')], check=True)
+
+        server = serve(status)
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        set_parameters(os.path.join(root, 'app', 'subway', 'app.py'), {
+            'VERBOSE': 'True',
+            'ON_HOUR': '0', # on at every hour
+            'OFF_HOUR': '0',
+            'AIO_TIME_URL': f'"{base}/time"',
+        })
+        set_parameters(os.path.join(root, 'lib', 'led_matrix', 'transit.py'), {
+            'MTA_STOP_URL': f'"{base}/stops/{{}}"',
+            'MTA_ROUTE_URL': f'"{base}/routes/{{}}"',
+        })
+
+        result = subprocess.run(
+            [sys.executable, os.path.join(HERE, 'run.py'), '/app/subway/app.py', '--root', root, '--duration', str(duration)],
+            capture_output=True, text=True, timeout=duration + 60,
+        )
+        server.shutdown()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    passed = PASS_MARK in result.stdout
+    print(f"status {status}: {'scheduled departures shown' if passed else 'no scheduled departures shown'}")
+    if not passed:
+        print(result.stdout[-2000:] + result.stderr[-2000:])
+
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="check the subway app falls back to the static schedule on error responses")
+    parser.add_argument('--status', type=int, default=STATUS, help="status served for every request")
+    parser.add_argument('--duration', type=float, default=DURATION, help="emulator run time [seconds]")
+    args = parser.parse_args()
+
+    sys.exit(main(args.status, args.duration))
@@ -0,0 +1,591 @@
+# CPython stand-in for the CircuitPython displayio module (Group tree, bitmaps, shaders and compositing)
+
+import struct
+
+import _host
+
+
+# COLORSPACES
+class Colorspace:
+    RGB888 = 'RGB888'
+    RGB565 = 'RGB565'
+    RGB565_SWAPPED = 'RGB565_SWAPPED'
+    RGB555 = 'RGB555'
+    RGB555_SWAPPED = 'RGB555_SWAPPED'
+    BGR565 = 'BGR565'
+    BGR565_SWAPPED = 'BGR565_SWAPPED'
+    BGR555 = 'BGR555'
+    BGR555_SWAPPED = 'BGR555_SWAPPED'
+    L8 = 'L8'
+
+
+def _rgb565_to_rgb888(value):
+    r = (value >> 11) & 0x1F
+    g = (value >> 5) & 0x3F
+    b = value & 0x1F
+
+    return ((r << 3 | r >> 2) << 16) | ((g << 2 | g >> 4) << 8) | (b << 3 | b >> 2)
+
+
+def _rgb555_to_rgb888(value):
+    r = (value >> 10) & 0x1F
+    g = (value >> 5) & 0x1F
+    b = value & 0x1F
+
+    return ((r << 3 | r >> 2) << 16) | ((g << 3 | g >> 2) << 8) | (b << 3 | b >> 2)
+
+
+def _swap16(value):
+    return ((value & 0xFF) << 8) | ((value >> 8) & 0xFF)
+
+
+def _bgr_to_rgb(value):
+    return ((value & 0xFF) << 16) | (value & 0xFF00) | ((value >> 16) & 0xFF)
+
+
+def _color_to_int(color):
+    if isinstance(color, int):
+        return color & 0xFFFFFF
+    if isinstance(color, (tuple, list)):
+        return (color[0] << 16) | (color[1] << 8) | color[2]
+    if isinstance(color, (bytes, bytearray)):
+        return (color[0] << 16) | (color[1] << 8) | color[2]
+
+    raise TypeError("color must be int, tuple or bytes")
+
+
+# BITMAP
+class Bitmap:
+    def __init__(self, width, height, value_count):
+        if width < 0 or height < 0:
+            raise ValueError("width and height must be non-negative")
+        if not 1 <= value_count <= 65536:
+            raise ValueError("value_count must be between 1 and 65536")
+
+        bits = 1
+        while (1 << bits) < value_count:
+            bits *= 2 # displayio rounds up to 1, 2, 4, 8, 16 bits per value
+
+        self._width = width
+        self._height = height
+        self._bits = bits
+        self._max = (1 << bits) - 1
+        self._data = [0] * (width * height)
+
+        _host.track_alloc(self, (width * height * bits + 7) // 8)
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def bits_per_value(self):
+        return self._bits
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            if not (0 <= x < self._width and 0 <= y < self._height):
+                raise IndexError("pixel coordinates out of bounds")
+            return y * self._width + x
+
+        if not 0 <= index < len(self._data):
+            raise IndexError("pixel index out of bounds")
+        return index
+
+    def __getitem__(self, index):
+        return self._data[self._index(index)]
+
+    def __setitem__(self, index, value):
+        if not 0 <= value <= self._max:
+            raise ValueError(f"value must be between 0 and {self._max}")
+        self._data[self._index(index)] = value
+
+    def __len__(self):
+        return len(self._data)
+
+    def fill(self, value):
+        if not 0 <= value <= self._max:
+            raise ValueError(f"value must be between 0 and {self._max}")
+        self._data = [value] * (self._width * self._height)
+
+    def blit(self, x, y, source_bitmap, *, x1=0, y1=0, x2=None, y2=None, skip_index=None):
+        x2 = source_bitmap.width if x2 is None else x2
+        y2 = source_bitmap.height if y2 is None else y2
+
+        for sy in range(y1, y2):
+            dy = y + sy - y1
+            if not 0 <= dy < self._height:
+                continue
+            for sx in range(x1, x2):
+                dx = x + sx - x1
+                if not 0 <= dx < self._width:
+                    continue
+                value = source_bitmap._data[sy * source_bitmap._width + sx]
+                if value != skip_index:
+                    self._data[dy * self._width + dx] = value
+
+    def dirty(self, x1=0, y1=0, x2=-1, y2=-1):
+        pass # the emulator composites the full frame on every refresh
+
+
+# PALETTE
+class Palette:
+    def __init__(self, color_count, *, dither=False):
+        self._colors = [0] * color_count
+        self._transparent = [False] * color_count
+        self.dither = dither
+
+        _host.track_alloc(self, 4 * color_count)
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        return self._colors[index]
+
+    def __setitem__(self, index, color):
+        self._colors[index] = _color_to_int(color)
+
+    def make_transparent(self, index):
+        self._transparent[index] = True
+
+    def make_opaque(self, index):
+        self._transparent[index] = False
+
+    def is_transparent(self, index):
+        return self._transparent[index]
+
+    def _shade(self, value):
+        if value >= len(self._colors) or self._transparent[value]:
+            return None
+        return self._colors[value]
+
+
+# COLOR CONVERTER
+class ColorConverter:
+    def __init__(self, *, input_colorspace=Colorspace.RGB888, dither=False):
+        self._colorspace = input_colorspace
+        self._transparent_color = None
+        self.dither = dither
+
+    @property
+    def input_colorspace(self):
+        return self._colorspace
+
+    def make_transparent(self, color):
+        self._transparent_color = color
+
+    def make_opaque(self, color):
+        if self._transparent_color == color:
+            self._transparent_color = None
+
+    def convert(self, color):
+        colorspace = self._colorspace
+
+        if colorspace == Colorspace.RGB888:
+            return color & 0xFFFFFF
+        if colorspace == Colorspace.RGB565:
+            return _rgb565_to_rgb888(color)
+        if colorspace == Colorspace.RGB565_SWAPPED:
+            return _rgb565_to_rgb888(_swap16(color))
+        if colorspace == Colorspace.RGB555:
+            return _rgb555_to_rgb888(color)
+        if colorspace == Colorspace.RGB555_SWAPPED:
+            return _rgb555_to_rgb888(_swap16(color))
+        if colorspace == Colorspace.BGR565:
+            return _bgr_to_rgb(_rgb565_to_rgb888(color))
+        if colorspace == Colorspace.BGR565_SWAPPED:
+            return _bgr_to_rgb(_rgb565_to_rgb888(_swap16(color)))
+        if colorspace == Colorspace.BGR555:
+            return _bgr_to_rgb(_rgb555_to_rgb888(color))
+        if colorspace == Colorspace.BGR555_SWAPPED:
+            return _bgr_to_rgb(_rgb555_to_rgb888(_swap16(color)))
+        if colorspace == Colorspace.L8:
+            return (color & 0xFF) * 0x010101
+
+        raise ValueError(f"unsupported colorspace: {colorspace}")
+
+    def _shade(self, value):
+        if value == self._transparent_color:
+            return None
+        return self.convert(value)
+
+
+# LAYER BASE (shared by Group and TileGrid)
+class _Layer:
+    def __init__(self, x, y):
+        self._x = x
+        self._y = y
+        self._hidden = False
+        self._in_group = False
+
+    @property
+    def x(self):
+        return self._x
+
+    @x.setter
+    def x(self, value):
+        self._x = int(value)
+
+    @property
+    def y(self):
+        return self._y
+
+    @y.setter
+    def y(self, value):
+        self._y = int(value)
+
+    @property
+    def hidden(self):
+        return self._hidden
+
+    @hidden.setter
+    def hidden(self, value):
+        self._hidden = bool(value)
+
+
+# TILEGRID
+class TileGrid(_Layer):
+    def __init__(self, bitmap, *, pixel_shader, width=1, height=1, tile_width=None, tile_height=None, default_tile=0, x=0, y=0):
+        super().__init__(x, y)
+
+        tile_width = bitmap.width if tile_width is None else tile_width
+        tile_height = bitmap.height if tile_height is None else tile_height
+
+        if tile_width <= 0 or tile_height <= 0:
+            raise ValueError("tile size must be positive")
+        if bitmap.width % tile_width or bitmap.height % tile_height:
+            raise ValueError("tile size must exactly divide bitmap size")
+
+        self._bitmap = bitmap
+        self._pixel_shader = pixel_shader
+        self._width = width
+        self._height = height
+        self._tile_width = tile_width
+        self._tile_height = tile_height
+        self._tiles = [default_tile] * (width * height)
+        self._flip_x = False
+        self._flip_y = False
+        self._transpose_xy = False
+
+        _host.track_alloc(self, 32 + width * height)
+
+    @property
+    def bitmap(self):
+        return self._bitmap
+
+    @bitmap.setter
+    def bitmap(self, bitmap):
+        if bitmap.width != self._bitmap.width or bitmap.height != self._bitmap.height:
+            raise ValueError("new bitmap must be the same size as the old one")
+        self._bitmap = bitmap
+
+    @property
+    def pixel_shader(self):
+        return self._pixel_shader
+
+    @pixel_shader.setter
+    def pixel_shader(self, pixel_shader):
+        self._pixel_shader = pixel_shader
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def tile_width(self):
+        return self._tile_width
+
+    @property
+    def tile_height(self):
+        return self._tile_height
+
+    @property
+    def flip_x(self):
+        return self._flip_x
+
+    @flip_x.setter
+    def flip_x(self, value):
+        self._flip_x = bool(value)
+
+    @property
+    def flip_y(self):
+        return self._flip_y
+
+    @flip_y.setter
+    def flip_y(self, value):
+        self._flip_y = bool(value)
+
+    @property
+    def transpose_xy(self):
+        return self._transpose_xy
+
+    @transpose_xy.setter
+    def transpose_xy(self, value):
+        self._transpose_xy = bool(value)
+
+    def _index(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            return y * self._width + x
+        return index
+
+    def __getitem__(self, index):
+        return self._tiles[self._index(index)]
+
+    def __setitem__(self, index, value):
+        self._tiles[self._index(index)] = value
+
+
+# GROUP
+class Group(_Layer):
+    def __init__(self, *, scale=1, x=0, y=0):
+        super().__init__(x, y)
+
+        if scale < 1:
+            raise ValueError("scale must be >= 1")
+
+        self._scale = scale
+        self._layers = []
+
+        _host.track_alloc(self, 32)
+
+    @property
+    def scale(self):
+        return self._scale
+
+    @scale.setter
+    def scale(self, value):
+        if value < 1:
+            raise ValueError("scale must be >= 1")
+        self._scale = value
+
+    def _claim(self, layer):
+        if not isinstance(layer, _Layer):
+            raise TypeError("layer must be a Group or TileGrid")
+        if layer._in_group:
+            raise ValueError("Layer already in a group")
+        layer._in_group = True
+
+    def append(self, layer):
+        self._claim(layer)
+        self._layers.append(layer)
+
+    def insert(self, index, layer):
+        self._claim(layer)
+        self._layers.insert(index, layer)
+
+    def index(self, layer):
+        return self._layers.index(layer)
+
+    def pop(self, i=-1):
+        layer = self._layers.pop(i)
+        layer._in_group = False
+        return layer
+
+    def remove(self, layer):
+        self._layers.remove(layer)
+        layer._in_group = False
+
+    def sort(self, key=None, reverse=False):
+        self._layers.sort(key=key, reverse=reverse)
+
+    def __len__(self):
+        return len(self._layers)
+
+    def __contains__(self, layer):
+        return layer in self._layers
+
+    def __iter__(self):
+        return iter(self._layers)
+
+    def __getitem__(self, index):
+        return self._layers[index]
+
+    def __setitem__(self, index, layer):
+        old = self._layers[index]
+        if old is layer:
+            return
+        self._claim(layer)
+        old._in_group = False
+        self._layers[index] = layer
+
+    def __delitem__(self, index):
+        self.pop(index)
+
+
+# ON DISK BITMAP (BMP files, loaded fully into memory on the host)
+class OnDiskBitmap:
+    def __init__(self, file):
+        if isinstance(file, str):
+            with open(file, 'rb') as f:
+                data = f.read()
+        else:
+            data = file.read()
+
+        if data[:2] != b'BM':
+            raise ValueError("invalid BMP file")
+
+        data_offset = struct.unpack_from('<I', data, 10)[0]
+        header_size = struct.unpack_from('<I', data, 14)[0]
+        width, height = struct.unpack_from('<ii', data, 18)
+        bpp = struct.unpack_from('<H', data, 28)[0]
+        compression = struct.unpack_from('<I', data, 30)[0]
+        colors_used = struct.unpack_from('<I', data, 46)[0]
+
+        if compression not in (0, 3):
+            raise ValueError("compressed BMP files are not supported")
+
+        bottom_up = height > 0
+        height = abs(height)
+        stride = ((width * bpp + 31) // 32) * 4
+
+        self._width = width
+        self._height = height
+        self._data = [0] * (width * height)
+
+        if bpp <= 8:
+            count = colors_used or (1 << bpp)
+            palette = Palette(count)
+            table = 14 + header_size
+            for i in range(count):
+                b, g, r = data[table + 4*i], data[table + 4*i + 1], data[table + 4*i + 2]
+                palette[i] = (r, g, b)
+            self._pixel_shader = palette
+        elif bpp == 16:
+            self._pixel_shader = ColorConverter(input_colorspace=Colorspace.RGB555 if compression == 0 else Colorspace.RGB565)
+        else:
+            self._pixel_shader = ColorConverter(input_colorspace=Colorspace.RGB888)
+
+        for row in range(height):
+            y = height - 1 - row if bottom_up else row
+            offset = data_offset + row * stride
+
+            for x in range(width):
+                if bpp <= 8:
+                    bit = x * bpp
+                    byte = data[offset + bit // 8]
+                    value = (byte >> (8 - bpp - bit % 8)) & ((1 << bpp) - 1)
+                elif bpp == 16:
+                    value = struct.unpack_from('<H', data, offset + 2*x)[0]
+                else:
+                    p = offset + x * (bpp // 8)
+                    value = (data[p + 2] << 16) | (data[p + 1] << 8) | data[p]
+
+                self._data[y * width + x] = value
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def pixel_shader(self):
+        return self._pixel_shader
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            x, y = index
+            return self._data[y * self._width + x]
+        return self._data[index]
+
+
+# RELEASE DISPLAYS
+def release_displays():
+    _host.release_displays()
+
+
+# COMPOSITE GROUP TREE INTO AN RGB888 FRAME
+def _composite(root, width, height):
+    frame = [0] * (width * height)
+
+    if root is not None:
+        _composite_group(root, 0, 0, 1, frame, width, height)
+
+    return frame
+
+
+def _composite_group(group, ox, oy, scale, frame, width, height):
+    if group._hidden:
+        return
+
+    ox += group._x * scale
+    oy += group._y * scale
+    scale *= group._scale
+
+    for layer in list(group._layers): # copy since the app may mutate the group while compositing
+        if isinstance(layer, Group):
+            _composite_group(layer, ox, oy, scale, frame, width, height)
+        else:
+            _composite_tilegrid(layer, ox, oy, scale, frame, width, height)
+
+
+def _composite_tilegrid(grid, ox, oy, scale, frame, width, height):
+    if grid._hidden:
+        return
+
+    tw = grid._tile_width
+    th = grid._tile_height
+    grid_w = grid._width * tw # unscaled size before transpose
+    grid_h = grid._height * th
+
+    out_w, out_h = (grid_h, grid_w) if grid._transpose_xy else (grid_w, grid_h)
+
+    x0 = ox + grid._x * scale
+    y0 = oy + grid._y * scale
+    x1 = min(width, x0 + out_w * scale)
+    y1 = min(height, y0 + out_h * scale)
+
+    if x1 <= 0 or y1 <= 0 or x0 >= width or y0 >= height:
+        return # fully off screen
+
+    bitmap = grid._bitmap
+    data = bitmap._data
+    bitmap_w = bitmap._width
+    tiles_per_row = bitmap_w // tw
+    tiles = grid._tiles
+    columns = grid._width
+    shade = grid._pixel_shader._shade
+    transpose = grid._transpose_xy
+    flip_x = grid._flip_x
+    flip_y = grid._flip_y
+
+    cache = {} # shade each source value once per tilegrid
+
+    for sy in range(max(0, y0), y1):
+        v = (sy - y0) // scale
+        row = sy * width
+
+        for sx in range(max(0, x0), x1):
+            u = (sx - x0) // scale
+
+            a, b = (v, u) if transpose else (u, v)
+            if flip_x:
+                a = grid_w - 1 - a
+            if flip_y:
+                b = grid_h - 1 - b
+
+            tile = tiles[(b // th) * columns + a // tw]
+            px = (tile % tiles_per_row) * tw + a % tw
+            py = (tile // tiles_per_row) * th + b % th
+            value = data[py * bitmap_w + px]
+
+            if value in cache:
+                color = cache[value]
+            else:
+                color = cache[value] = shade(value)
+
+            if color is not None:
+                frame[row + sx] = color
@@ -0,0 +1,44 @@
+# CPython stand-in for the CircuitPython fontio module
+
+from collections import namedtuple
+from typing import Protocol
+
+
+# GLYPH
+Glyph = namedtuple('Glyph', ['bitmap', 'tile_index', 'width', 'height', 'dx', 'dy', 'shift_x', 'shift_y'])
+
+
+# FONT PROTOCOL (used by adafruit_display_text type hints)
+class FontProtocol(Protocol):
+    def get_bounding_box(self):
+        ...
+
+    def get_glyph(self, codepoint):
+        ...
+
+
+# BUILT-IN FONT (fixed-width glyphs stored as tiles of one bitmap)
+class BuiltinFont:
+    def __init__(self, bitmap, width, height, first, count, missing=ord('?')):
+        self._bitmap = bitmap
+        self._width = width
+        self._height = height
+        self._first = first
+        self._count = count
+        self._missing = missing
+
+    @property
+    def bitmap(self):
+        return self._bitmap
+
+    def get_bounding_box(self):
+        return self._width, self._height
+
+    def get_glyph(self, codepoint):
+        if not self._first <= codepoint < self._first + self._count:
+            codepoint = self._missing # built-in font only covers printable ASCII
+
+        return Glyph(self._bitmap, codepoint - self._first, self._width, self._height, 0, 0, self._width, 0)
+
+    def load_glyphs(self, codepoints):
+        pass # all glyphs are always loaded
@@ -0,0 +1,101 @@
+# CPython stand-in for the CircuitPython framebufferio module (composites the root group and records frame timing)
+
+import time
+import threading
+
+import _host
+import displayio
+
+
+# PARAMETERS
+AUTO_REFRESH_FPS = 60 # background refresh rate while auto_refresh is on [frames per second]
+
+
+# FRAMEBUFFER DISPLAY
+class FramebufferDisplay:
+    def __init__(self, framebuffer, *, rotation=0, auto_refresh=True):
+        if rotation != 0:
+            raise NotImplementedError("emulator only supports rotation=0")
+
+        self._framebuffer = framebuffer
+        self._root_group = None
+        self._lock = threading.Lock()
+        self._last_refresh = None
+        self._released = False
+        self._auto_refresh = False
+        self._thread = None
+
+        _host.register_display(self)
+
+        self.auto_refresh = auto_refresh
+
+    @property
+    def width(self):
+        return self._framebuffer.width
+
+    @property
+    def height(self):
+        return self._framebuffer.height
+
+    @property
+    def framebuffer(self):
+        return self._framebuffer
+
+    @property
+    def brightness(self):
+        return self._framebuffer.brightness
+
+    @brightness.setter
+    def brightness(self, value):
+        self._framebuffer.brightness = value
+
+    @property
+    def root_group(self):
+        return self._root_group
+
+    @root_group.setter
+    def root_group(self, group):
+        self._root_group = group
+
+    @property
+    def auto_refresh(self):
+        return self._auto_refresh
+
+    @auto_refresh.setter
+    def auto_refresh(self, value):
+        self._auto_refresh = bool(value)
+
+        if self._auto_refresh and self._thread is None:
+            self._thread = threading.Thread(target=self._auto_refresh_loop, daemon=True)
+            self._thread.start()
+
+    def refresh(self, *, target_frames_per_second=None, minimum_frames_per_second=0):
+        if target_frames_per_second and self._last_refresh is not None:
+            delay = self._last_refresh + 1 / target_frames_per_second - time.monotonic()
+            if delay > 0:
+                time.sleep(delay) # wait until next frame time
+
+        self._composite()
+        return True
+
+    def _composite(self):
+        with self._lock:
+            start = time.perf_counter()
+            pixels = displayio._composite(self._root_group, self.width, self.height)
+            self._framebuffer._show(pixels)
+            composite_time = time.perf_counter() - start
+
+            self._last_refresh = time.monotonic()
+
+        _host.record_frame(self.width, self.height, self._framebuffer.frame, composite_time)
+
+    def _auto_refresh_loop(self):
+        period = 1 / AUTO_REFRESH_FPS
+
+        while not self._released:
+            if self._auto_refresh:
+                self._composite()
+            time.sleep(period)
+
+    def _release(self):
+        self._released = True
@@ -0,0 +1,392 @@
+# CPython stand-in for the CircuitPython jpegio module (pure Python baseline JPEG decoder, RGB565_SWAPPED output)
+
+import io
+import math
+
+
+# PARAMETERS
+ZIGZAG = [
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+] # zigzag index to natural (row-major) index
+
+IDCT_TABLE = [
+    [(math.sqrt(0.5) if u == 0 else 1.0) * math.cos((2*x + 1) * u * math.pi / 16) / 2 for u in range(8)]
+    for x in range(8)
+]
+
+UNSUPPORTED_MARKERS = (0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF) # progressive, lossless, arithmetic
+
+
+# JPEG DECODER
+class JpegDecoder:
+    def __init__(self):
+        self._data = None
+        self._size = None
+        self._pixels = None
+
+    def open(self, data_or_filename):
+        if isinstance(data_or_filename, str):
+            with open(data_or_filename, 'rb') as file:
+                data = file.read()
+        elif isinstance(data_or_filename, (bytes, bytearray, memoryview)):
+            data = bytes(data_or_filename)
+        elif isinstance(data_or_filename, io.IOBase) or hasattr(data_or_filename, 'read'):
+            data = data_or_filename.read()
+        else:
+            raise TypeError("expected filename, buffer or stream")
+
+        if data[:2] != b'\xff\xd8':
+            raise ValueError("not a JPEG file")
+
+        self._data = data
+        self._size = _read_size(data)
+        self._pixels = None
+
+        return self._size
+
+    def decode(self, bitmap, scale=0, x=0, y=0):
+        if self._data is None:
+            raise RuntimeError("no JPEG open")
+        if not 0 <= scale <= 3:
+            raise ValueError("scale must be between 0 and 3")
+
+        if self._pixels is None:
+            self._pixels = _decode(self._data) # cache decoded RGB888 pixels until next open
+
+        width, height = self._size
+        factor = 1 << scale
+        out_width = (width + factor - 1) // factor
+        out_height = (height + factor - 1) // factor
+        pixels = self._pixels
+
+        for oy in range(out_height):
+            by = oy + y
+            if not 0 <= by < bitmap.height:
+                continue
+
+            for ox in range(out_width):
+                bx = ox + x
+                if not 0 <= bx < bitmap.width:
+                    continue
+
+                r = g = b = n = 0
+                for sy in range(oy * factor, min(height, (oy + 1) * factor)):
+                    for sx in range(ox * factor, min(width, (ox + 1) * factor)):
+                        pr, pg, pb = pixels[sy * width + sx]
+                        r += pr
+                        g += pg
+                        b += pb
+                        n += 1
+
+                value = ((r // n) >> 3) << 11 | ((g // n) >> 2) << 5 | (b // n) >> 3
+                bitmap[bx, by] = ((value & 0xFF) << 8) | (value >> 8) # RGB565 byte-swapped like the device decoder
+
+
+# READ IMAGE SIZE FROM FRAME HEADER
+def _read_size(data):
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            raise ValueError("invalid JPEG marker")
+
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+
+        length = (data[i + 2] << 8) | data[i + 3]
+        if marker in (0xC0, 0xC1) or marker in UNSUPPORTED_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+
+        i += 2 + length
+
+    raise ValueError("JPEG frame header not found")
+
+
+# ENTROPY-CODED DATA READER
+class _Bits:
+    def __init__(self, data, pos):
+        self._data = data
+        self._pos = pos
+        self._acc = 0
+        self._count = 0
+
+    def bit(self):
+        if self._count == 0:
+            data = self._data
+            byte = data[self._pos] if self._pos < len(data) else 0
+
+            if byte == 0xFF:
+                following = data[self._pos + 1] if self._pos + 1 < len(data) else 0xD9
+                if following == 0x00:
+                    self._pos += 2 # stuffed byte
+                else:
+                    byte = 0 # marker reached, feed zeros
+            else:
+                self._pos += 1
+
+            self._acc = byte
+            self._count = 8
+
+        self._count -= 1
+        return (self._acc >> self._count) & 1
+
+    def bits(self, count):
+        value = 0
+        for _ in range(count):
+            value = (value << 1) | self.bit()
+        return value
+
+    def receive_extend(self, count):
+        if count == 0:
+            return 0
+        value = self.bits(count)
+        if value < (1 << (count - 1)):
+            value -= (1 << count) - 1
+        return value
+
+    def huffman(self, table):
+        code = 0
+        for length in range(1, 17):
+            code = (code << 1) | self.bit()
+            symbol = table.get((length, code))
+            if symbol is not None:
+                return symbol
+        raise ValueError("invalid Huffman code")
+
+    def restart(self):
+        self._count = 0
+        data = self._data
+        while self._pos + 1 < len(data):
+            if data[self._pos] == 0xFF and 0xD0 <= data[self._pos + 1] <= 0xD7:
+                self._pos += 2
+                return
+            self._pos += 1
+
+
+def _build_huffman(counts, symbols):
+    table = {}
+    code = 0
+    k = 0
+    for length in range(1, 17):
+        for _ in range(counts[length - 1]):
+            table[(length, code)] = symbols[k]
+            k += 1
+            code += 1
+        code <<= 1
+    return table
+
+
+# DECODE 8x8 BLOCK
+def _decode_block(bits, dc_table, ac_table, quant, prediction):
+    coefficients = [0] * 64
+
+    prediction += bits.receive_extend(bits.huffman(dc_table))
+    coefficients[0] = prediction * quant[0]
+
+    k = 1
+    while k < 64:
+        rs = bits.huffman(ac_table)
+        run, size = rs >> 4, rs & 0x0F
+
+        if size == 0:
+            if run == 15:
+                k += 16 # zero run length
+                continue
+            break # end of block
+
+        k += run
+        if k > 63:
+            break
+        coefficients[ZIGZAG[k]] = bits.receive_extend(size) * quant[k]
+        k += 1
+
+    return _idct(coefficients), prediction
+
+
+def _idct(coefficients):
+    rows = [0.0] * 64
+    for v in range(8):
+        row = coefficients[v*8:v*8 + 8]
+        if not any(row):
+            continue
+        for x in range(8):
+            t = IDCT_TABLE[x]
+            rows[v*8 + x] = sum(t[u] * row[u] for u in range(8))
+
+    output = [0] * 64
+    for x in range(8):
+        column = [rows[v*8 + x] for v in range(8)]
+        for y in range(8):
+            t = IDCT_TABLE[y]
+            value = int(round(sum(t[v] * column[v] for v in range(8)) + 128))
+            output[y*8 + x] = 0 if value < 0 else 255 if value > 255 else value
+
+    return output
+
+
+# DECODE IMAGE INTO RGB888 PIXEL TUPLES
+def _decode(data):
+    quant_tables = {}
+    huffman_tables = {}
+    components = []
+    restart_interval = 0
+    width = height = 0
+
+    i = 2
+    while i < len(data):
+        if data[i] != 0xFF:
+            raise ValueError("invalid JPEG marker")
+
+        marker = data[i + 1]
+        i += 2
+
+        if marker == 0xFF:
+            i -= 1 # fill byte
+            continue
+        if marker == 0xD9:
+            break
+
+        length = (data[i] << 8) | data[i + 1]
+        segment = data[i + 2:i + length]
+        i += length
+
+        if marker in UNSUPPORTED_MARKERS:
+            raise ValueError("unsupported JPEG (only baseline JPEG is supported)")
+
+        if marker == 0xDB: # quantization tables
+            p = 0
+            while p < len(segment):
+                precision, index = segment[p] >> 4, segment[p] & 0x0F
+                p += 1
+                if precision:
+                    quant_tables[index] = [(segment[p + 2*k] << 8) | segment[p + 2*k + 1] for k in range(64)]
+                    p += 128
+                else:
+                    quant_tables[index] = list(segment[p:p + 64])
+                    p += 64
+
+        elif marker in (0xC0, 0xC1): # baseline frame header
+            height = (segment[1] << 8) | segment[2]
+            width = (segment[3] << 8) | segment[4]
+            for c in range(segment[5]):
+                p = 6 + 3*c
+                components.append({
+                    'id': segment[p],
+                    'h': segment[p + 1] >> 4,
+                    'v': segment[p + 1] & 0x0F,
+                    'quant': segment[p + 2],
+                })
+
+        elif marker == 0xC4: # huffman tables
+            p = 0
+            while p < len(segment):
+                table_class, index = segment[p] >> 4, segment[p] & 0x0F
+                counts = segment[p + 1:p + 17]
+                total = sum(counts)
+                huffman_tables[(table_class, index)] = _build_huffman(counts, segment[p + 17:p + 17 + total])
+                p += 17 + total
+
+        elif marker == 0xDD: # restart interval
+            restart_interval = (segment[0] << 8) | segment[1]
+
+        elif marker == 0xDA: # start of scan
+            if len(components) not in (1, 3):
+                raise ValueError("unsupported JPEG color components")
+
+            for c in range(segment[0]):
+                component_id, tables = segment[1 + 2*c], segment[2 + 2*c]
+                for component in components:
+                    if component['id'] == component_id:
+                        component['dc'] = huffman_tables[(0, tables >> 4)]
+                        component['ac'] = huffman_tables[(1, tables & 0x0F)]
+
+            _decode_scan(data, i, width, height, components, quant_tables, restart_interval)
+            break
+
+    if not components or 'plane' not in components[0]:
+        raise ValueError("JPEG scan data not found")
+
+    return _convert_color(width, height, components)
+
+
+def _decode_scan(data, pos, width, height, components, quant_tables, restart_interval):
+    h_max = max(c['h'] for c in components)
+    v_max = max(c['v'] for c in components)
+
+    if len(components) == 1:
+        h_max = v_max = components[0]['h'] = components[0]['v'] = 1 # single-component scans are not interleaved
+
+    mcu_columns = (width + 8*h_max - 1) // (8*h_max)
+    mcu_rows = (height + 8*v_max - 1) // (8*v_max)
+
+    for c in components:
+        c['stride'] = mcu_columns * c['h'] * 8
+        c['plane'] = [0] * (c['stride'] * mcu_rows * c['v'] * 8)
+        c['prediction'] = 0
+
+    bits = _Bits(data, pos)
+    mcu_count = 0
+
+    for mcu_y in range(mcu_rows):
+        for mcu_x in range(mcu_columns):
+            if restart_interval and mcu_count and mcu_count % restart_interval == 0:
+                bits.restart()
+                for c in components:
+                    c['prediction'] = 0
+
+            for c in components:
+                quant = quant_tables[c['quant']]
+                plane = c['plane']
+                stride = c['stride']
+
+                for block_y in range(c['v']):
+                    for block_x in range(c['h']):
+                        block, c['prediction'] = _decode_block(bits, c['dc'], c['ac'], quant, c['prediction'])
+
+                        x0 = (mcu_x * c['h'] + block_x) * 8
+                        y0 = (mcu_y * c['v'] + block_y) * 8
+                        for row in range(8):
+                            start = (y0 + row) * stride + x0
+                            plane[start:start + 8] = block[row*8:row*8 + 8]
+
+            mcu_count += 1
+
+    for c in components:
+        c['h_max'] = h_max
+        c['v_max'] = v_max
+
+
+def _convert_color(width, height, components):
+    pixels = []
+
+    def sampler(c):
+        plane, stride, h, v = c['plane'], c['stride'], c['h'], c['v']
+        h_max, v_max = c['h_max'], c['v_max']
+        return lambda x, y: plane[(y * v // v_max) * stride + x * h // h_max]
+
+    if len(components) == 1:
+        luma = sampler(components[0])
+        for y in range(height):
+            for x in range(width):
+                value = luma(x, y)
+                pixels.append((value, value, value))
+        return pixels
+
+    luma, blue, red = (sampler(c) for c in components)
+    for y in range(height):
+        for x in range(width):
+            l = luma(x, y)
+            cb = blue(x, y) - 128
+            cr = red(x, y) - 128
+            r = int(l + 1.402 * cr)
+            g = int(l - 0.344136 * cb - 0.714136 * cr)
+            b = int(l + 1.772 * cb)
+            pixels.append((min(255, max(0, r)), min(255, max(0, g)), min(255, max(0, b))))
+
+    return pixels
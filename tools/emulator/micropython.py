@@ -0,0 +1,13 @@
+# CPython stand-in for the CircuitPython micropython module
+
+
+def const(value):
+    return value
+
+
+def native(function):
+    return function
+
+
+def viper(function):
+    return function
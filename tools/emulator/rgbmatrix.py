@@ -0,0 +1,48 @@
+# CPython stand-in for the CircuitPython rgbmatrix module (holds the RGB frame shown on the panel)
+
+
+# RGB MATRIX
+class RGBMatrix:
+    def __init__(self, *, width, bit_depth, rgb_pins, addr_pins, clock_pin, latch_pin, output_enable_pin, doublebuffer=True, framebuffer=None, height=0, tile=1, serpentine=True):
+        if not 1 <= bit_depth <= 6:
+            raise ValueError("bit_depth must be between 1 and 6")
+
+        self._width = width
+        self._height = height or 2 * len(rgb_pins) // 6 * (1 << len(addr_pins))
+        self._bit_depth = bit_depth
+        self._frame = bytearray(self._width * self._height * 3) # RGB888 as displayed by the panel
+        self.brightness = 1.0
+
+    @property
+    def width(self):
+        return self._width
+
+    @property
+    def height(self):
+        return self._height
+
+    @property
+    def bit_depth(self):
+        return self._bit_depth
+
+    @property
+    def frame(self):
+        return self._frame
+
+    def refresh(self):
+        pass
+
+    def deinit(self):
+        pass
+
+    # store composited RGB888 pixels, keeping only the bit_depth most significant bits per channel
+    def _show(self, pixels):
+        shift = 8 - self._bit_depth
+        levels = (1 << self._bit_depth) - 1
+        lookup = bytes(((v >> shift) * 255) // levels for v in range(256))
+
+        frame = self._frame
+        for i, color in enumerate(pixels):
+            frame[3*i] = lookup[(color >> 16) & 0xFF]
+            frame[3*i + 1] = lookup[(color >> 8) & 0xFF]
+            frame[3*i + 2] = lookup[color & 0xFF]
@@ -0,0 +1,116 @@
+# Run a device script (code.py or an app) on the host with the displayio/rgbmatrix emulator and report frame timing
+#
+# usage: python tools/emulator/run.py [script] [--duration SECONDS] [--frames N] [--dump DIR] [--format png|npy] [--tracemalloc]
+#
+# The device filesystem (src/) is copied to a temporary root unless --root is given, so logs, tokens and images
+# written by the apps never touch the repository. Network libraries shipped as .mpy in src/lib must be installed
+# from PyPI (see requirements.txt).
+
+import os
+import sys
+import types
+import shutil
+import argparse
+import tempfile
+import traceback
+import threading
+
+
+# PARAMETERS
+EMULATOR_PATH = os.path.dirname(os.path.abspath(__file__)) # stand-in modules
+SRC_PATH = os.path.join(EMULATOR_PATH, '..', '..', 'src') # device filesystem
+
+
+# INSTALL gc STAND-IN (gc is built in, so it cannot be shadowed on sys.path)
+def install_gc():
+    import gc
+    import _host
+
+    module = types.ModuleType('gc')
+    module.__dict__.update({k: getattr(gc, k) for k in dir(gc) if not k.startswith('__')})
+    module.mem_free = _host.mem_free
+    module.mem_alloc = _host.mem_alloc
+
+    sys.modules['gc'] = module
+
+
+# KEEP HOST asyncio (lib/asyncio is CircuitPython's, built on select.poll().ipoll, and would shadow it once lib is on
+# sys.path)
+def install_asyncio():
+    import asyncio
+
+    sys.modules['asyncio'] = asyncio # imported before lib is on sys.path, so later imports get this module
+
+
+# PARSE ARGUMENTS
+def parse_args():
+    parser = argparse.ArgumentParser(description="run a device script on the host with the display emulator")
+    parser.add_argument('script', nargs='?', default='/code.py', help="device path of the script to run (default: /code.py)")
+    parser.add_argument('--root', help="host directory used as the device filesystem (default: temporary copy of src/)")
+    parser.add_argument('--duration', type=float, help="stop after this many seconds")
+    parser.add_argument('--frames', type=int, help="stop after this many frames")
+    parser.add_argument('--dump', help="directory to write frames to")
+    parser.add_argument('--format', choices=['png', 'npy'], default='png', help="frame dump format")
+    parser.add_argument('--every', type=int, default=1, help="dump every Nth frame")
+    parser.add_argument('--heap', type=int, default=2000000, help="emulated heap size for gc.mem_free() [bytes]")
+    parser.add_argument('--tracemalloc', action='store_true', help="trace host allocations for gc.mem_free() (slow, otherwise only displayio objects are counted)")
+    return parser.parse_args()
+
+
+# RUN
+def main():
+    args = parse_args()
+
+    if args.root:
+        root = os.path.abspath(args.root)
+    else:
+        root = os.path.join(tempfile.mkdtemp(prefix='led-matrix-'), 'CIRCUITPY')
+        shutil.copytree(SRC_PATH, root)
+
+    install_asyncio()
+    sys.path[:0] = [EMULATOR_PATH, root, os.path.join(root, 'lib')] # mirror CircuitPython's "/" and "/lib" search path
+
+    import _host
+
+    _host.config['dump_dir'] = os.path.abspath(args.dump) if args.dump else None
+    _host.config['dump_format'] = args.format
+    _host.config['dump_every'] = max(1, args.every)
+    _host.config['heap_size'] = args.heap
+    _host.config['max_frames'] = args.frames
+
+    if args.dump:
+        os.makedirs(args.dump, exist_ok=True)
+
+    install_gc()
+    _host.install_filesystem(root)
+
+    os.chdir(root) # relative device paths resolve from "/"
+
+    _host.install_interrupt()
+    if args.duration:
+        threading.Timer(args.duration, _host.interrupt).start()
+
+    if args.tracemalloc:
+        _host.start_heap()
+
+    script = args.script if args.script.startswith('/') else '/' + args.script
+    with open(script) as file:
+        source = file.read()
+
+    exit_code = 0
+    try:
+        exec(compile(source, _host.device_path(script), 'exec'), {'__name__': '__main__'})
+    except KeyboardInterrupt:
+        pass
+    except Exception:
+        traceback.print_exc()
+        exit_code = 1
+    finally:
+        _host.release_displays()
+        _host.report()
+
+    os._exit(exit_code) # do not wait for the timer or open sockets
+
+
+if __name__ == '__main__':
+    main()
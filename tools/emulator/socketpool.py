@@ -0,0 +1,30 @@
+# CPython stand-in for the CircuitPython socketpool module (hands out host sockets)
+
+import socket
+
+
+# SOCKET POOL
+class SocketPool:
+    AF_INET = socket.AF_INET
+    AF_INET6 = socket.AF_INET6
+    SOCK_STREAM = socket.SOCK_STREAM
+    SOCK_DGRAM = socket.SOCK_DGRAM
+    SOCK_RAW = socket.SOCK_RAW
+    IPPROTO_IP = socket.IPPROTO_IP
+    IPPROTO_TCP = socket.IPPROTO_TCP
+    IPPROTO_UDP = socket.IPPROTO_UDP
+    SOL_SOCKET = socket.SOL_SOCKET
+    SO_REUSEADDR = socket.SO_REUSEADDR
+    TCP_NODELAY = socket.TCP_NODELAY
+    EAI_NONAME = socket.EAI_NONAME
+
+    gaierror = socket.gaierror
+
+    def __init__(self, radio):
+        self._radio = radio
+
+    def socket(self, family=socket.AF_INET, type=socket.SOCK_STREAM, proto=0):
+        return socket.socket(family, type, proto)
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        return socket.getaddrinfo(host, port, family, type, proto, flags)
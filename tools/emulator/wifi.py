@@ -0,0 +1,32 @@
+# CPython stand-in for the CircuitPython wifi module (the host network is always connected)
+
+import socket
+
+
+# RADIO
+class Radio:
+    def __init__(self):
+        self.enabled = True
+        self.hostname = socket.gethostname()
+        self.mac_address = bytes(6)
+        self._ssid = None
+
+    @property
+    def connected(self):
+        return self._ssid is not None
+
+    @property
+    def ipv4_address(self):
+        return '127.0.0.1' if self.connected else None
+
+    def connect(self, ssid, password='', *, channel=0, bssid=None, timeout=None):
+        self._ssid = ssid
+
+    def disconnect(self):
+        self._ssid = None
+
+    def ping(self, ip, *, timeout=0.5):
+        return 0.0
+
+
+radio = Radio()